@@ -1,46 +1,45 @@
-import pandas as pd
-from pathlib import Path
-
-current_dir = Path(__file__).parent
-file_path = current_dir
+from join_index import join_raw_tables
+from memory_report import report_memory
+from pipeline_io import save_table
+from profiling import span
+from schema import load_raw_table
 
 # --- Data Loading ---
-df_features = pd.read_csv(file_path / "features.csv")
-df_train = pd.read_csv(file_path / "train.csv")
-df_stores = pd.read_csv(file_path / "stores.csv")
-
-# --- Validation: Check 'IsHoliday' consistency before merging ---
-# Perform an inner join to check if 'IsHoliday' flags match in both datasets for the same Store/Date.
-merge_validation = pd.merge(df_train, df_features, on=['Store', 'Date'], how='inner')
-is_holiday_consistent = (merge_validation['IsHoliday_x'] == merge_validation['IsHoliday_y']).all()
-print(f"Validation - All IsHoliday columns match: {is_holiday_consistent}")
-
-# --- Pre-processing ---
-# Drop 'IsHoliday' from features to prevent duplicate columns after merge
-df_features_clean = df_features.drop(columns = ['IsHoliday'])
-
-# --- Merging Data ---
-# 1. Merge Train + Stores (Many-to-One relationship)
-df_train_stores_merged = pd.merge(df_train, df_stores, on='Store', how='left', validate='m:1')
-
-# 2. Merge Result + Features (Many-to-One relationship based on Store and Date)
-df_merged = pd.merge(df_train_stores_merged, df_features_clean, on=['Store', 'Date'], how='left', validate='m:1')
+# Declared schema (see schema.py): small ints for IDs, categorical 'Type', booleans and optional float32 measures.
+# 'Date' is parsed once here; the typed hand-off format keeps it as datetime for every later stage
+# Every step runs in a profiling span (timed and memory-tracked with WALMART_PROFILE=1, see profiling.py)
+with span('load'):
+    df_features = load_raw_table('features')
+    df_train = load_raw_table('train')
+    df_stores = load_raw_table('stores')
+
+# --- Validation + Merging (single pass) ---
+# stores is indexed on Store and features on (Store, Date) once; one pass over train then resolves both lookups
+# and yields the IsHoliday consistency check (rows present in both tables), the m:1 validation (duplicate keys
+# raise MergeError), the enriched table (train + stores + features without its 'IsHoliday') and the
+# missing-value counts, without extra merges or rescans (see join_index.py)
+with span('merge'):
+    df_merged, join_report = join_raw_tables(df_train, df_features, df_stores)
+print(f"Validation - All IsHoliday columns match: {join_report['holiday_consistent']}")
 print(f"Columns after merge: {df_merged.columns.tolist()}")
 
 # --- Post-Merge Checks ---
 print(f"Final Table Shape: {df_merged.shape}")
 
-missing_values = df_merged.isnull().sum()
+missing_values = join_report['missing_values']
 print(f"Missing values in each column: \n{missing_values}")
 
 # Uniqueness Checks
 # Note: 'Store' is NOT unique in features/train (repeated over time), but MUST be unique in stores.csv
-print(f"Is 'Store' unique in Features? {df_features['Store'].is_unique} (Expected: False)")
-print(f"Is 'Store' unique in Train? {df_train['Store'].is_unique} (Expected: False)")
-print(f"Is 'Store' unique in Stores? {df_stores['Store'].is_unique} (Expected: True)")
+print(f"Is 'Store' unique in Features? {join_report['store_unique']['features']} (Expected: False)")
+print(f"Is 'Store' unique in Train? {join_report['store_unique']['train']} (Expected: False)")
+print(f"Is 'Store' unique in Stores? {join_report['store_unique']['stores']} (Expected: True)")
+
+report_memory('01_data_loading_and_merging', {'train': df_train, 'features': df_features, 'stores': df_stores, 'merged': df_merged})
 
 # --- Save Semi-Finished Data ---
-output_path = current_dir / 'merged_raw_data.csv'
-df_merged.to_csv(output_path, index=False) 
+# Stored in a typed columnar format (see pipeline_io.py) so the next stage does not re-parse text
+with span('save'):
+    output_path = save_table(df_merged, 'merged_raw_data')
 
 print(f"\nSUCCESS: Merged data saved to: {output_path}")
\ No newline at end of file
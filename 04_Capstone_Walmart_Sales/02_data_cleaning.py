@@ -1,14 +1,17 @@
-import pandas as pd
-from pathlib import Path
+from calendar_features import add_calendar_features
+from memory_report import report_memory
+from pipeline_io import load_table, save_table
+from profiling import span
+from schema import MARKDOWN_COLS
 
-current_dir = Path(__file__).parent
-file_path = current_dir
-df = pd.read_csv(file_path / "merged_raw_data.csv")
+with span('load'):
+    df = load_table('merged_raw_data')
 
 # --- Imputation (Filling Missing Values) ---
 # Assumption: Missing Markdown values indicate no promotion was active, so we replace NaN with 0.
-markdown_col_names = ['MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5']
-df[markdown_col_names] = df[markdown_col_names].fillna(0)
+markdown_col_names = MARKDOWN_COLS
+with span('impute'):
+    df[markdown_col_names] = df[markdown_col_names].fillna(0)
 
 print("Verification - Missing values in MarkDown columns: ")
 print(df[markdown_col_names].isnull().sum())
@@ -16,25 +19,26 @@ print(df[markdown_col_names].isnull().sum())
 # --- Data Cleaning: Negative Sales ---
 # Negative sales usually indicate returns or errors. We filter them out for training.
 initial_row_count = df.shape[0]
-df = df[df['Weekly_Sales'] >= 0]
+with span('filter'):
+    df = df[df['Weekly_Sales'] >= 0]
 dropped_rows = initial_row_count - df.shape[0]
 
 print(f"Dropped {dropped_rows} rows with negative sales ({(dropped_rows/initial_row_count) * 100:.2f}% of data).")
 
-# --- Date Formatting & Feature Engineering ---
-# Convert 'Date' column to datetime object
-df['Date'] =pd.to_datetime(df['Date'], format='%Y-%m-%d')
-
-# Extract temporal features
-df['Year'] = df['Date'].dt.year
-df['Month'] = df['Date'].dt.month
-df['Week'] = df['Date'].dt.isocalendar().week
+# --- Date Feature Engineering ---
+# Note: 'Date' is already a datetime column (dtypes are preserved by the pipeline storage format)
+# Year / Month / ISO Week are computed once per unique week-ending date and broadcast to every row
+# (see calendar_features.py), already downcast to small ints.
+with span('calendar'):
+    df = add_calendar_features(df, columns=['Year', 'Month', 'Week'])
 
 # Quick inspection
 print(f"\nFirst 5 rows of cleaned data: {df.head()}")
 
+report_memory('02_data_cleaning', {'cleaned': df})
+
 # --- Save Cleaned Data ---
-output_path = current_dir / 'walmart_cleaned_data.csv'
-df.to_csv(output_path, index=False) 
+with span('save'):
+    output_path = save_table(df, 'walmart_cleaned_data')
 
 print(f"\nSUCCESS: Cleaned data saved to: {output_path}")
\ No newline at end of file
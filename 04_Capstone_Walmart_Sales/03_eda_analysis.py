@@ -1,13 +1,12 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from pathlib import Path
+from calendar_features import SPECIAL_DATES
+from sales_cube import correlation_matrix, holiday_box_stats, holiday_means, refresh_cube, sales_by_date
 
-current_dir = Path(__file__).parent
-file_path = current_dir / "walmart_cleaned_data.csv"
-df = pd.read_csv(file_path)
-
-df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
+# Every figure is drawn from the pre-aggregated sales cube (see sales_cube.py) instead of the full table.
+# The refresh only aggregates the rows appended since the last run (nothing when the table did not change)
+refresh_cube()
 
 # Set visual style
 sns.set_theme(style="whitegrid")
@@ -15,8 +14,8 @@ sns.set_theme(style="whitegrid")
 # ==========================================
 # 1. VISUALIZATION: Sales Over Time
 # ==========================================
-# Group data by Date to see the total trend
-daily_sales = df.groupby('Date')['Weekly_Sales'].sum()
+# Total sales per Date (summed in the cube)
+daily_sales = sales_by_date()
 
 plt.figure(figsize=(15, 5))
 plt.plot(daily_sales.index, daily_sales.values, color='tab:blue')
@@ -30,12 +29,8 @@ plt.plot(daily_sales.index, daily_sales.values, color='tab:blue')
 #
 # Logic: If a holiday falls within the week (Sat-Fri), 
 # the 'IsHoliday' flag is set to True for that Friday's date.
-special_dates = {
-    'Super Bowl':   ['2010-02-12', '2011-02-11', '2012-02-10'],
-    'Labor Day':    ['2010-09-10', '2011-09-09', '2012-09-07'],
-    'Thanksgiving': ['2010-11-26', '2011-11-25'],
-    'Christmas':    ['2010-12-31', '2011-12-30']
-}
+# The holiday week-ending dates live in calendar_features.py (shared with the feature engineering stage).
+special_dates = SPECIAL_DATES
 # Since the holiday flag is on the week-ending date, the actual shopping spike
 # (e.g., buying gifts) might appear in the week BEFORE the flagged date.
 # Keep this lag in mind during analysis!
@@ -73,19 +68,24 @@ print(daily_sales.sort_values(ascending=False).head(5))
 # ==========================================
 
 # --- Plot A: Boxplot (Statistical Summary & Outliers) ---
+# Quartiles and whiskers come from the merged quantile sketches (within 1% of the exact values)
+palette = sns.color_palette("Set2")
 plt.figure(figsize=(10, 6))
-# Fix: Added hue='IsHoliday' and legend=False to prevent FutureWarning
-sns.boxplot(x='IsHoliday', y='Weekly_Sales', data=df, hue='IsHoliday', legend=False, palette="Set2")
+ax = plt.gca()
+boxes = ax.bxp(holiday_box_stats(), patch_artist=True, widths=0.8)
+for patch, color in zip(boxes['boxes'], palette):
+    patch.set_facecolor(color)
 plt.title("Sales Statistics: Holiday vs Non-Holiday")
 plt.xlabel("Is Holiday?")
 plt.ylabel("Weekly Sales ($)")
 plt.show()
 
 # --- Plot B: Barplot (Average Comparison with Annotation) ---
+# Averages = summed sales / row counts of the cube
+holiday_avg = holiday_means()
 plt.figure(figsize=(8, 6))
-# Fix: Added hue='IsHoliday' and legend=False to prevent FutureWarning
-# ci=None removes the confidence interval bars for a cleaner look
-ax = sns.barplot(x='IsHoliday', y='Weekly_Sales', data=df, hue='IsHoliday', legend=False, palette="Set2", errorbar=None)
+ax = plt.gca()
+ax.bar(holiday_avg.index.astype(str), holiday_avg.values, color=palette[:len(holiday_avg)], width=0.8)
 
 plt.title("Average Sales: Holiday vs Non-Holiday")
 plt.xlabel("Is Holiday?")
@@ -106,14 +106,10 @@ plt.show()
 # ==========================================
 # Objective: Identify relationships between features
 
-# Select only numeric columns for correlation analysis
-# 'Store' is dropped because it's a categorical ID
-df_numeric = df.select_dtypes(include='number').drop(columns=['Store'], errors='ignore')
-# For testing
-print(df_numeric.head(3))
-
-# Correlation Matrix
-corr_matrix = df_numeric.corr()
+# Correlation Matrix of the numeric columns ('Store' is dropped because it's a categorical ID),
+# computed from the co-moments kept in the cube
+corr_matrix = correlation_matrix()
+print(f"Correlation columns: {corr_matrix.columns.tolist()}")
 
 # Visualize: Heatmap
 plt.figure(figsize=(12, 10))
@@ -1,65 +1,53 @@
-import pandas as pd
-from pathlib import Path
-
-current_dir = Path(__file__).parent
-df = pd.read_csv(current_dir / "walmart_cleaned_data.csv", parse_dates=['Date'])
-
-# --- TIME SERIES PREPARATION ---
-# Sort by Store and Date to ensure correct lag calculations
-df = df.sort_values(by=['Store', 'Date'])
-
-# --- LAG FEATURES ---
-# Lag 1: Sales from the previous week
-df['Sales_Lag_1'] = df.groupby('Store')['Weekly_Sales'].shift(1)
-
-# Lag 4: Sales from 4 weeks ago
-df['Sales_Lag_4'] = df.groupby('Store')['Weekly_Sales'].shift(4)
-
-# Lag 52: Sales from 52 weeks ago
-df['Sales_Lag_52'] = df.groupby('Store')['Weekly_Sales'].shift(52)
-
-# --- ROLLING MEAN ---
-# Captures the general trend by smoothing out weekly fluctuations (Noise Reduction).
-# Note: Calculated on 'Sales_Lag_1' to prevent data leakage (future peeking).
-df['Sales_MA4'] = df.groupby('Store')['Sales_Lag_1'].transform(lambda x: x.rolling(window=4).mean())
+from calendar_features import add_calendar_features
+from chunk_processing import HISTORY, STATE_COLS
+from lag_engine import FEATURE_LAGS, FEATURE_WINDOWS, SERIES_KEYS, add_lag_features, series_tail
+from memory_report import report_memory
+from pipeline_io import load_table, save_table
+from profiling import span
+
+with span('load'):
+    df = load_table('walmart_cleaned_data')
+
+# --- LAG & ROLLING FEATURES ---
+# Each Store/Dept pair is its own weekly time series (see lag_engine.py).
+# The engine sorts by (Store, Dept, Date) once and builds every feature in a single vectorized pass:
+# - Lag 1 / 4 / 52: Sales from the previous week, 4 weeks ago and 52 weeks ago
+# - MA4: Rolling mean that captures the general trend by smoothing out weekly fluctuations (Noise Reduction).
+#   Note: Calculated on 'Sales_Lag_1' to prevent data leakage (future peeking).
+with span('lag_rolling'):
+    df = add_lag_features(df, value_col='Weekly_Sales', group_cols=SERIES_KEYS,
+                          lags=FEATURE_LAGS, windows=FEATURE_WINDOWS, stats=['mean'])
+
+# Per-series state (last 52 weeks of every Store/Dept), so incremental_update.py can extend the series next week
+with span('save_state'):
+    save_table(series_tail(df[STATE_COLS], HISTORY, presorted=True), 'feature_state')
 
 # Inspection
 print("\nSample Data (Check Lag & Moving Average):")
-print(df[['Date', 'Store', 'Weekly_Sales', 'Sales_Lag_1', 'Sales_MA4']].iloc[40:45])
+print(df[['Date', 'Store', 'Dept', 'Weekly_Sales', 'Sales_Lag_1', 'Sales_MA4']].iloc[40:45])
 
 # --- EVENT COUNTDOWN FEATURES ---
-
-# A.Weeks to Christmas (Target: Week 52)
-def calculate_weeks_to_christmas(week_number):
-    if week_number < 52:
-        return 52 - week_number
-    else:
-        return 0
-
-df['Weeks_to_Christmas'] = df['Week'].apply(calculate_weeks_to_christmas)
-
+# A. Weeks to Christmas (Target: Week 52)
 # B. Weeks to Thanksgiving / Black Friday (Target: Week 47)
-def calculate_weeks_to_thanksgiving(week_number):
-    black_friday_week = 47
-    if week_number <= black_friday_week:
-        return black_friday_week - week_number
-    else:
-        return 0
-    
-df['Weeks_to_Thanksgiving'] = df['Week'].apply(calculate_weeks_to_thanksgiving)
+# Computed once per unique date and broadcast to every row (see calendar_features.py)
+with span('calendar'):
+    df = add_calendar_features(df, columns=['Weeks_to_Christmas', 'Weeks_to_Thanksgiving'])
 
 # --- DATA CLEANING ---
 # Drop rows with NaN values generated by Lag_52 (First year of data)
 initial_shape = df.shape
-df = df.dropna()
+with span('dropna'):
+    df = df.dropna()
 final_shape = df.shape
 
 print(f"Dropped rows: {initial_shape[0] - final_shape[0]}")
 print(f"Data ready! New Columns: Sales_Lag_1, Sales_Lag_4, Sales_Lag_52, Sales_MA4, Weeks_to_Christmas, Weeks_to_Thanksgiving")
 
+report_memory('04_feature_engineering', {'final': df})
+
 # Save Final Dataset
-output_path = current_dir / "final_train_data.csv"
-df.to_csv(output_path, index=False)
+with span('save'):
+    output_path = save_table(df, 'final_train_data')
 print(f"\nSUCCESS: Engineered data saved to: {output_path}")
 
 # Final Check
@@ -4,9 +4,15 @@ from pathlib import Path
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 from matplotlib import pyplot as plt
+from forest_export import export_forest
+from model_config import N_ESTIMATORS, RANDOM_STATE
+from pipeline_io import load_table
+from profiling import span
 
 current_dir = Path(__file__).parent
-df = pd.read_csv(current_dir / "final_train_data.csv", parse_dates=['Date'])
+# Column projection: 'Type' is never used by the model, so it is not loaded at all
+with span('load'):
+    df = load_table('final_train_data', exclude=['Type'])
 plot_save_path = current_dir / "model_performance_plot.png"
 
 # Convert boolean to int
@@ -36,13 +42,15 @@ print(f"Test Data    : {X_test.shape[0]} rows (Feb 2012 - Oct 2012)")
 print(f"Features Used: {X_train.columns.tolist()}")
 
 # --- MODEL TRAINING ---
-model = RandomForestRegressor(n_estimators=100, n_jobs=-1, random_state=42)
-model.fit(X_train, y_train)
+model = RandomForestRegressor(n_estimators=N_ESTIMATORS, n_jobs=-1, random_state=RANDOM_STATE)
+with span('fit', rows=len(X_train)):
+    model.fit(X_train, y_train)
 
 print("Model Trained Successfully!")
 
 # --- MODEL EVALUATION ---
-y_pred = model.predict(X_test)
+with span('predict', rows=len(X_test)):
+    y_pred = model.predict(X_test)
 
 mae = mean_absolute_error(y_test, y_pred)
 r2 = r2_score(y_test, y_pred)
@@ -77,5 +85,11 @@ print(importances.sort_values(ascending=False).head(5))
 # --- SAVE MODEL ---
 # Save the trained model to a file so we can use it later without retraining
 model_path = current_dir / "random_forest_model.pkl"
-joblib.dump(model, model_path)
-print(f"Trained model saved to: {model_path}")
\ No newline at end of file
+with span('save'):
+    joblib.dump(model, model_path)
+print(f"Trained model saved to: {model_path}")
+
+# Flattened copy of the forest for fast serving (used by app.py)
+with span('export'):
+    export_dir = export_forest(model, current_dir / "forest_arrays", source_path=model_path)
+print(f"Flattened forest exported to: {export_dir}")
\ No newline at end of file
@@ -1,7 +1,26 @@
+import io
+import json
+import os
+import threading
+import time
 import joblib
+import numpy as np
 import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from pathlib import Path
+from batching import MicroBatcher
+from feature_store import LAG_COLS, MA_COLS, FeatureStore, unserved_features
+from forest_export import FlatForest, export_is_current
+from metrics import RequestTimer, render_metrics
+from partitions import PartitionRouter
+from prediction_cache import PredictionCache, row_key
+
+# Faster JSON decoder for the request hot path (falls back to the standard library)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 """
 Walmart Sales Prediction API
@@ -11,67 +30,346 @@ It handles:
 1. Model Loading
 2. Request Processing
 3. Feature Alignment
-4. Prediction & Response
+4. Prediction & Response (single row: /predict, many rows: /predict_batch)
 """
 
 app = Flask(__name__)
 
+# --- BATCH LIMITS ---
+# Requests above these limits are rejected with HTTP 413 before any prediction work is done
+MAX_BATCH_ROWS = int(os.environ.get('WALMART_MAX_BATCH_ROWS', 100_000))
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('WALMART_MAX_BATCH_MB', 64)) * 1024 * 1024
+
+# Predictions are streamed back in slices of this many rows
+STREAM_CHUNK_ROWS = 10_000
+
+# --- PREDICTION CACHE ---
+# Identical /predict payloads are answered from memory (see prediction_cache.py).
+# WALMART_PREDICTION_CACHE_SIZE=0 disables the cache.
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('WALMART_PREDICTION_CACHE_SIZE', 100_000)),
+    ttl_seconds=float(os.environ.get('WALMART_PREDICTION_CACHE_TTL', 300)),
+    max_bytes=int(os.environ.get('WALMART_PREDICTION_CACHE_MB', 32)) * 1024 * 1024
+)
+
+# --- MICRO-BATCHING ---
+# WALMART_MICRO_BATCH=1 coalesces concurrent /predict rows into one batched predict (see batching.py):
+# a row waits at most WALMART_BATCH_MAX_WAIT_MS for others, batches hold at most WALMART_BATCH_MAX_ROWS rows.
+# Only useful when requests are served concurrently (threaded dev server, or serve.py --threads N).
+micro_batcher = None
+if os.environ.get('WALMART_MICRO_BATCH') == '1':
+    micro_batcher = MicroBatcher(
+        lambda X: predict_rows(X),
+        max_batch_rows=int(os.environ.get('WALMART_BATCH_MAX_ROWS', 64)),
+        max_wait_ms=float(os.environ.get('WALMART_BATCH_MAX_WAIT_MS', 2))
+    )
+
+# --- FEATURE STORE ---
+# Requests carrying Store, Dept and Date get their omitted lag / moving-average / calendar features
+# from the latest per-series history (see feature_store.py). WALMART_FEATURE_STORE=0 disables it.
+feature_store = FeatureStore() if os.environ.get('WALMART_FEATURE_STORE', '1') != '0' else None
+
+# --- PARTITIONED MODELS ---
+# WALMART_PARTITIONED=1 predicts every row with the model of its Store's partition (train_partitions.py);
+# rows of stores without a partition use the global model. Partition models are loaded on first use
+# and at most WALMART_PARTITION_CACHE of them stay loaded (least recently used are evicted).
+partition_router = None
+if os.environ.get('WALMART_PARTITIONED') == '1':
+    partition_router = PartitionRouter(max_loaded=int(os.environ.get('WALMART_PARTITION_CACHE', 8)))
+
+# The model and feature files are checked for changes at most this often (seconds)
+MODEL_CHECK_INTERVAL = 2.0
+
 # --- LOAD MODEL ---
+# The flattened forest (forest_export.py) is preferred when it was exported from the current model file:
+# same predictions, a fraction of the memory and much faster single-row traversal.
+# Its arrays are memory-mapped read-only, so every worker process of serve.py shares one copy (the OS page cache).
+# Set WALMART_FLAT_FOREST=0 to always serve the pickled sklearn model.
 current_dir = Path(__file__).parent
 model_path = current_dir / "random_forest_model.pkl"
+flat_forest_dir = current_dir / "forest_arrays"
 
-print(f"Loading model from: {model_path} ...")
 
-try:
-    model = joblib.load(model_path)
-    print("Model Loaded Successfully!")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    model = None
+def model_signature():
+    """
+    (size, mtime) of the files the served model comes from. Changes when 05_train_model.py retrains.
+    """
+    signature = []
+    for path in [model_path, flat_forest_dir / 'meta.json']:
+        stat = path.stat() if path.exists() else None
+        signature.append((stat.st_size, stat.st_mtime_ns) if stat else None)
+    return tuple(signature)
+
+
+def load_model():
+    use_flat_forest = os.environ.get('WALMART_FLAT_FOREST', '1') != '0' and export_is_current(flat_forest_dir, model_path)
+    print(f"Loading model from: {flat_forest_dir if use_flat_forest else model_path} ...")
+
+    try:
+        loaded = FlatForest.load(flat_forest_dir, mmap_mode='r') if use_flat_forest else joblib.load(model_path)
+        print("Model Loaded Successfully!")
+        return loaded
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        return None
+
+
+def set_model(new_model):
+    """
+    Installs a model and its precompiled feature layout, resolved once at load time (instead of per request):
+    - feature_index: feature name -> column position in the training order (model.feature_names_in_)
+    - default_row: a preallocated row holding the default value (0) of every feature
+    Trees compare features as float32, so the row is built in float32 directly.
+    """
+    global model, feature_index, default_row, model_generation
+    if new_model is not None:
+        feature_index = {name: i for i, name in enumerate(new_model.feature_names_in_)}
+        default_row = np.zeros((1, len(feature_index)), dtype=np.float32)
+    model = new_model
+    model_generation += 1
+
+
+def refresh_model():
+    """
+    Reloads the model when its files changed on disk (and invalidates the prediction cache),
+    and refreshes the feature store when new history landed.
+    """
+    global loaded_signature, last_model_check
+    now = time.monotonic()
+    if now - last_model_check < MODEL_CHECK_INTERVAL:
+        return
+    with reload_lock:
+        if now - last_model_check < MODEL_CHECK_INTERVAL:
+            return
+        last_model_check = now
+        signature = model_signature()
+        if signature != loaded_signature:
+            loaded_signature = signature
+            set_model(load_model())
+            prediction_cache.clear()
+        if feature_store is not None:
+            feature_store.refresh()
+        # Retrained partitions: their loaded models are dropped, and so are cached predictions
+        if partition_router is not None and partition_router.refresh():
+            prediction_cache.clear()
+
+
+model, feature_index, default_row, model_generation = None, None, None, 0
+reload_lock = threading.Lock()
+last_model_check = time.monotonic()
+loaded_signature = model_signature()
+set_model(load_model())
+
+
+def vectorize_request(data):
+    """
+    Maps a JSON feature dict straight into a model-ordered float32 row.
+    Missing features keep their default (0); unexpected keys are ignored.
+    """
+    row = default_row.copy()
+    for name, value in data.items():
+        i = feature_index.get(name)
+        if i is not None:
+            row[0, i] = value
+    return row
+
+
+def predict_rows(X):
+    """
+    Forest predictions for prepared rows (model-ordered float32): the average of every tree's prediction.
+    Calls the trees directly (no per-call input validation, feature-name check or thread-pool dispatch),
+    accumulating in the same order as RandomForestRegressor.predict.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if isinstance(model, FlatForest):
+        return model.predict(X)
+
+    total = np.zeros(len(X))
+    for tree in model.estimators_:
+        total += tree.predict(X, check_input=False)
+    return total / len(model.estimators_)
+
+
+def predict_vector(row):
+    """
+    Forest prediction for one prepared row.
+    """
+    return predict_rows(row)[0]
+
 
 # --- PREDICTION ENDPOINT ---
 @app.route('/predict', methods=['POST'])
 def predict():
-    # Ensure model is loaded
-    if not model:
-        return jsonify({'status': 'error', 'message': 'Model could not be loaded.'})
+    # Every stage is timed for GET /metrics (parse -> align -> predict -> serialize)
+    with RequestTimer('/predict') as timer:
+        # Pick up a retrained model (and drop cached predictions of the old one)
+        refresh_model()
 
-    try:
-        # Get Data
-        data = request.get_json()
-        input_df = pd.DataFrame([data])
-        
-        # --- ROBUST FEATURE ALIGNMENT ---
-        # Ensure input features match the training features exactly
-        
-        # Get the feature names expected by the model
-        expected_cols = model.feature_names_in_
-        
-        # Add missing columns with 0
-        for col in expected_cols:
-            if col not in input_df.columns:
-                input_df[col] = 0
-                
-        # Reorder columns to match training order & drop unexpected columns
-        input_df = input_df[expected_cols]
-        
-        # -----------------------------------------------
-
-        # Make Prediction
-        prediction = model.predict(input_df)[0]
-        
-        # Return Response
-        return jsonify({
-            'status': 'success',
-            'predicted_sales': round(prediction, 2),
-            'currency': 'USD'
-        })
-        
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)})
+        # Ensure model is loaded
+        if not model:
+            timer.error()
+            return jsonify({'status': 'error', 'message': 'Model could not be loaded.'})
+
+        try:
+            # Get Data
+            data = json_loads(request.get_data())
+            timer.stage('parse')
+
+            # --- FAST FEATURE ALIGNMENT ---
+            # Omitted lag / calendar features are served from the feature store (client values win),
+            # then JSON dict -> NumPy row in training order, without building a DataFrame
+            # Lags the store couldn't serve (unknown series, stale history) are reported in the response
+            unserved = []
+            if feature_store is not None:
+                data = feature_store.fill(data)
+                if {'Store', 'Dept', 'Date'} <= data.keys():
+                    unserved = unserved_features(data)
+            row = vectorize_request(data)
+            timer.stage('align')
+
+            # Make Prediction (or reuse the cached one for an identical feature vector)
+            key = row_key(row) if prediction_cache.enabled else None
+            prediction = prediction_cache.get(key) if key is not None else None
+            if prediction is None:
+                generation = model_generation
+                prediction = None
+                if partition_router is not None:
+                    prediction = partition_router.predict_row(data.get('Store'), row, model.feature_names_in_)
+                if prediction is None:
+                    prediction = micro_batcher.predict(row) if micro_batcher else predict_vector(row)
+                if key is not None and generation == model_generation:
+                    prediction_cache.put(key, prediction)
+            timer.stage('predict')
+
+            # Return Response
+            body = {
+                'status': 'success',
+                'predicted_sales': round(prediction, 2),
+                'currency': 'USD'
+            }
+            if unserved:
+                body['unserved_features'] = unserved
+            response = jsonify(body)
+            timer.stage('serialize')
+            return response
+
+        except Exception as e:
+            timer.error()
+            return jsonify({'status': 'error', 'message': str(e)})
+
+# --- BATCH PREDICTION ENDPOINT ---
+def parse_batch(body, content_type):
+    """
+    Parses a batch request body into a DataFrame (one row per feature record).
+    Supported formats: JSON array, NDJSON (one JSON object per line) and CSV with a header row.
+    """
+    if 'csv' in content_type:
+        return pd.read_csv(io.BytesIO(body)), 'csv'
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        return pd.read_json(io.BytesIO(body), lines=True), 'ndjson'
+
+    records = json_loads(body)
+    if not isinstance(records, list):
+        raise ValueError('Batch body must be a JSON array of feature objects.')
+    return pd.DataFrame.from_records(records), 'json'
+
+
+def stream_predictions(predictions, output_format):
+    """
+    Yields the predictions in slices, in the same format family as the request.
+    """
+    if output_format == 'csv':
+        yield 'predicted_sales\n'
+    elif output_format == 'json':
+        yield f'{{"status": "success", "currency": "USD", "count": {len(predictions)}, "predicted_sales": ['
+
+    for start in range(0, len(predictions), STREAM_CHUNK_ROWS):
+        chunk = predictions[start:start + STREAM_CHUNK_ROWS]
+        if output_format == 'csv':
+            yield '\n'.join(map(str, chunk)) + '\n'
+        elif output_format == 'ndjson':
+            yield ''.join(f'{{"row": {start + i}, "predicted_sales": {value}}}\n' for i, value in enumerate(chunk))
+        else:
+            yield (',' if start else '') + ','.join(map(str, chunk))
+
+    if output_format == 'json':
+        yield ']}'
+
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    with RequestTimer('/predict_batch') as timer:
+        refresh_model()
+
+        # Ensure model is loaded
+        if not model:
+            timer.error()
+            return jsonify({'status': 'error', 'message': 'Model could not be loaded.'}), 503
+
+        try:
+            input_df, output_format = parse_batch(request.get_data(), request.content_type or '')
+        except Exception as e:
+            timer.error()
+            return jsonify({'status': 'error', 'message': f'Could not parse batch: {e}'}), 400
+        timer.stage('parse')
+
+        if len(input_df) > MAX_BATCH_ROWS:
+            timer.error()
+            return jsonify({'status': 'error',
+                            'message': f'Batch has {len(input_df)} rows; the limit is {MAX_BATCH_ROWS}.'}), 413
+
+        try:
+            # --- VECTORIZED FEATURE ALIGNMENT ---
+            # One step for the whole batch: reorder to the training order, drop unexpected columns,
+            # and fill missing columns / missing values with 0 (same rule as /predict).
+            # Rows with Store, Dept and Date first get their omitted features from the feature store.
+            # Rows whose lags could not be served are counted in the X-Unserved-Feature-Rows header.
+            has_keys = {'Store', 'Dept', 'Date'} <= set(input_df.columns)
+            unserved_rows = 0
+            if feature_store is not None and feature_store.snapshot is not None and has_keys:
+                input_df = feature_store.snapshot.fill_frame(input_df)
+                unserved_rows = int(input_df[LAG_COLS + MA_COLS].isna().any(axis=1).sum())
+            input_df = input_df.reindex(columns=model.feature_names_in_, fill_value=0).fillna(0)
+            timer.stage('align')
+
+            # Single model call for every row (one per Store partition when partitioned)
+            if partition_router is not None:
+                predictions = partition_router.predict_frame(input_df, input_df['Store'], fallback=model)
+            else:
+                predictions = model.predict(input_df)
+            timer.stage('predict')
+            predictions = np.round(predictions, 2).tolist()
+        except Exception as e:
+            timer.error()
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+
+        # The body itself is serialized lazily, while it is streamed
+        mimetypes = {'json': 'application/json', 'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+        response = Response(stream_with_context(stream_predictions(predictions, output_format)),
+                            mimetype=mimetypes[output_format])
+        if unserved_rows:
+            response.headers['X-Unserved-Feature-Rows'] = str(unserved_rows)
+        timer.stage('serialize')
+        return response
+
+# --- METRICS ENDPOINT ---
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# --- STATS ENDPOINT ---
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        'model': {'loaded': model is not None, 'type': type(model).__name__, 'generation': model_generation},
+        'prediction_cache': prediction_cache.stats(),
+        'feature_store': feature_store.stats() if feature_store is not None else None,
+        'micro_batching': micro_batcher.stats() if micro_batcher else None,
+        'partitions': partition_router.stats() if partition_router else None
+    })
 
 # --- RUN SERVER ---
 if __name__ == '__main__':
     # debug=True allows auto-restart on code changes. 
-    # Disable this in a real production environment.
-    app.run(debug=True)
\ No newline at end of file
+    # Disable this in a real production environment (serve.py runs the app with a worker pool).
+    app.run(debug=True, port=int(os.environ.get('WALMART_PORT', 5000)))
\ No newline at end of file
@@ -0,0 +1,163 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from model_config import N_ESTIMATORS, RANDOM_STATE
+from pipeline_io import load_table
+
+"""
+Rolling-Origin Backtest
+-----------------------
+05_train_model.py scores one split (2012-02-01). This script measures how stable that score is over time:
+every fold trains on all weeks before its cutoff (expanding window) and is tested on the following weeks.
+
+Folds are trained in parallel in a process pool. The feature matrix is placed once in shared memory:
+rows are sorted by Date, so every fold's train / test sets are contiguous row ranges of the same block,
+and workers read them as zero-copy NumPy views (nothing is pickled per fold).
+
+Output: per-fold MAE / R² with fit wall time and worker CPU time, plus the total wall time,
+the CPU time summed over workers and the resulting speedup over a serial run
+(saved to backtest_results.csv).
+
+Usage:
+    python backtest.py --folds 6 --horizon 8 --workers 4
+"""
+
+TARGET = 'Weekly_Sales'
+DROP_COLS = ['Weekly_Sales', 'Date', 'Type']
+
+# Shared-memory views, attached once per worker process
+_shared = {}
+
+
+def share_array(array):
+    """
+    Copies an array into a new shared memory block. Returns (block, spec needed to attach to it).
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_shared(specs):
+    """
+    Worker initializer: maps the shared blocks as read-only arrays.
+    """
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+        _shared[key] = (block, array)
+
+
+def run_fold(fold, train_end, test_end, n_estimators):
+    """
+    Trains on rows [0, train_end) and scores rows [train_end, test_end) of the shared matrix.
+    """
+    X, y = _shared['X'][1], _shared['y'][1]
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+    # Same estimator as 05_train_model.py, single-threaded: parallelism comes from the folds
+    model = RandomForestRegressor(n_estimators=n_estimators, n_jobs=1, random_state=RANDOM_STATE)
+    model.fit(X[:train_end], y[:train_end])
+    y_pred = model.predict(X[train_end:test_end])
+
+    return {
+        'fold': fold,
+        'mae': mean_absolute_error(y[train_end:test_end], y_pred),
+        'r2': r2_score(y[train_end:test_end], y_pred),
+        'fit_s': time.perf_counter() - wall_start,
+        'cpu_s': time.process_time() - cpu_start,
+        'worker_pid': os.getpid()
+    }
+
+
+def make_folds(dates, n_folds, horizon, min_train_weeks):
+    """
+    Expanding-window folds over the sorted unique dates: the last n_folds * horizon weeks are split
+    into consecutive test windows, each trained on every earlier week.
+    Returns (fold, cutoff date, test end date) tuples.
+    """
+    weeks = np.unique(dates)
+    first_cutoff = len(weeks) - n_folds * horizon
+    if first_cutoff < min_train_weeks:
+        raise ValueError(f"{len(weeks)} weeks of data can't hold {n_folds} folds of {horizon} weeks "
+                         f"after {min_train_weeks} training weeks")
+    folds = []
+    for fold in range(n_folds):
+        cutoff = first_cutoff + fold * horizon
+        test_end = weeks[cutoff + horizon] if cutoff + horizon < len(weeks) else weeks[-1] + np.timedelta64(1, 'D')
+        folds.append((fold, weeks[cutoff], test_end))
+    return folds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel expanding-window backtest of the sales model.')
+    parser.add_argument('--folds', type=int, default=6, help='Number of folds.')
+    parser.add_argument('--horizon', type=int, default=8, help='Test weeks per fold.')
+    parser.add_argument('--min-train-weeks', type=int, default=52, help='Minimum training history of the first fold.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes.')
+    parser.add_argument('--n-estimators', type=int, default=N_ESTIMATORS, help='Trees per fold model.')
+    args = parser.parse_args()
+
+    current_dir = Path(__file__).parent
+    results_path = current_dir / "backtest_results.csv"
+
+    # --- DATA (sorted by Date, so every fold is a contiguous row range) ---
+    df = load_table('final_train_data', exclude=['Type'])
+    df['IsHoliday'] = df['IsHoliday'].astype(int)
+    df = df.sort_values('Date', kind='stable', ignore_index=True)
+    features = df.drop(columns=DROP_COLS, errors='ignore').select_dtypes(include=['number']).columns
+
+    dates = df['Date'].to_numpy()
+    folds = make_folds(dates, args.folds, args.horizon, args.min_train_weeks)
+    tasks = [(fold, int(np.searchsorted(dates, cutoff)), int(np.searchsorted(dates, test_end)))
+             for fold, cutoff, test_end in folds]
+
+    # float32 features: the dtype the trees train on, so fit() does not convert a copy per fold
+    X_block, X_spec = share_array(np.ascontiguousarray(df[features].to_numpy(dtype=np.float32)))
+    y_block, y_spec = share_array(df[TARGET].to_numpy(dtype=np.float64))
+    shared_mb = (X_block.size + y_block.size) / 1e6
+    del df
+
+    print(f"Backtest: {len(folds)} folds x {args.horizon} weeks, {len(features)} features, "
+          f"{args.workers} workers ({shared_mb:,.1f} MB in shared memory)")
+
+    try:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(args.workers, initializer=attach_shared,
+                                 initargs=({'X': X_spec, 'y': y_spec},)) as pool:
+            futures = [pool.submit(run_fold, *task, args.n_estimators) for task in tasks]
+            results = [future.result() for future in futures]
+        wall_time = time.perf_counter() - start
+    finally:
+        for block in (X_block, y_block):
+            block.close()
+            block.unlink()
+
+    # --- REPORT ---
+    report = pd.DataFrame(results).set_index('fold')
+    report.insert(0, 'cutoff', [pd.Timestamp(cutoff).date() for _, cutoff, _ in folds])
+    report.insert(1, 'train_rows', [train_end for _, train_end, _ in tasks])
+    report.insert(2, 'test_rows', [test_end - train_end for _, train_end, test_end in tasks])
+
+    print("\nPER-FOLD RESULTS:")
+    print(report.drop(columns='worker_pid').round({'mae': 2, 'r2': 4, 'fit_s': 2, 'cpu_s': 2}).to_string())
+    print(f"\nMAE mean ± std : ${report['mae'].mean():,.2f} ± {report['mae'].std():,.2f}")
+    print(f"R² mean ± std  : {report['r2'].mean():.4f} ± {report['r2'].std():.4f}")
+
+    # Folds run back to back would take about their summed CPU time (fit_s also counts waiting for a core)
+    cpu_time = report['cpu_s'].sum()
+    print(f"\nWall time      : {wall_time:.2f}s")
+    print(f"Worker CPU time: {cpu_time:.2f}s over {report['worker_pid'].nunique()} processes")
+    print(f"Speedup        : {cpu_time / wall_time:.2f}x vs running the folds serially "
+          f"(parallel efficiency {cpu_time / wall_time / args.workers:.0%})")
+
+    report.to_csv(results_path)
+    print(f"Results saved to: {results_path}")
@@ -0,0 +1,161 @@
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+"""
+Adaptive Micro-Batching
+-----------------------
+Under concurrent load, every /predict request runs the forest on its own single row.
+The forest is much cheaper per row on a batch (one vectorized traversal, sklearn's n_jobs),
+so the MicroBatcher coalesces concurrent single-row requests:
+
+1. Request threads put their prepared row on a queue and wait on a Future
+2. One batching thread takes the first queued row, collects more rows for up to max_wait_ms
+   (or until the target batch size is reached), runs one predict on the stacked batch
+   and fans the results back to the waiting requests
+
+Adaptive sizing, from two exponentially weighted averages updated on every arrival:
+- arrival rate: rows expected to arrive within max_wait_ms = rate x max_wait
+- concurrency: rows already in flight when a row arrives (a lone client that waits for each answer
+  arrives quickly, but never has a second row in flight, so waiting for it is pointless)
+The target batch size is the smaller of the two (capped at max_batch_rows). When it is below 2,
+the batch is run right away, so low traffic never pays the wait.
+"""
+
+# Smoothing factor of the inter-arrival gap and concurrency averages (higher: reacts faster)
+EWMA_ALPHA = 0.1
+
+
+class MicroBatcher:
+    """
+    Coalesces single-row predictions into batches.
+
+    Args:
+        predict_fn (callable): Batch predictor, (n_rows, n_features) array -> n_rows predictions.
+        max_batch_rows (int): Upper bound on the batch size.
+        max_wait_ms (float): Longest time the first row of a batch waits for more rows.
+    """
+
+    def __init__(self, predict_fn, max_batch_rows=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_arrival = None
+        self._mean_gap = None
+        self._in_flight = 0
+        self._mean_concurrency = 1.0
+        self.counters = {'requests': 0, 'batches': 0, 'queue_wait_s': 0.0, 'predict_s': 0.0, 'max_batch': 0}
+
+    def _start(self):
+        # Started lazily: in a prefork server the thread must be created in the worker, after the fork
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def _record_arrival(self, now):
+        with self._lock:
+            if self._last_arrival is not None:
+                gap = now - self._last_arrival
+                self._mean_gap = gap if self._mean_gap is None else self._mean_gap + EWMA_ALPHA * (gap - self._mean_gap)
+            self._last_arrival = now
+            self._in_flight += 1
+            self._mean_concurrency += EWMA_ALPHA * (self._in_flight - self._mean_concurrency)
+
+    @property
+    def arrival_rate(self):
+        return 1 / self._mean_gap if self._mean_gap else 0.0
+
+    def target_batch_rows(self):
+        """
+        Rows worth waiting for: expected arrivals within max_wait, bounded by the observed concurrency
+        (1 means: don't wait).
+        """
+        expected = min(self.arrival_rate * self.max_wait, self._mean_concurrency)
+        return 1 if expected < 2 else min(self.max_batch_rows, math.ceil(expected))
+
+    def submit(self, row):
+        """
+        Queues one prepared (1, n_features) row; returns a Future resolving to its prediction.
+        """
+        if self._thread is None:
+            self._start()
+        now = time.perf_counter()
+        self._record_arrival(now)
+        future = Future()
+        self._queue.put((row, future, now))
+        return future
+
+    def predict(self, row):
+        return self.submit(row).result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        target = self.target_batch_rows()
+        deadline = batch[0][2] + self.max_wait
+
+        # Take whatever is already queued, then wait for more only while the target isn't met
+        while len(batch) < self.max_batch_rows:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if len(batch) >= target or remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            rows, futures, arrivals = zip(*batch)
+
+            start = time.perf_counter()
+            try:
+                predictions = self.predict_fn(np.vstack(rows))
+            except Exception as e:
+                with self._lock:
+                    self._in_flight -= len(batch)
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            end = time.perf_counter()
+
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
+
+            with self._lock:
+                self._in_flight -= len(batch)
+                self.counters['requests'] += len(batch)
+                self.counters['batches'] += 1
+                self.counters['queue_wait_s'] += sum(start - arrival for arrival in arrivals)
+                self.counters['predict_s'] += end - start
+                self.counters['max_batch'] = max(self.counters['max_batch'], len(batch))
+
+    def stats(self):
+        with self._lock:
+            requests, batches = self.counters['requests'], self.counters['batches']
+            return {
+                'requests': requests,
+                'batches': batches,
+                'mean_batch_rows': round(requests / batches, 2) if batches else None,
+                'max_batch_rows_seen': self.counters['max_batch'],
+                'mean_queue_wait_ms': round(self.counters['queue_wait_s'] / requests * 1000, 3) if requests else None,
+                'mean_predict_ms_per_batch': round(self.counters['predict_s'] / batches * 1000, 3) if batches else None,
+                'arrival_rate_per_s': round(self.arrival_rate, 1),
+                'mean_concurrency': round(self._mean_concurrency, 2),
+                'target_batch_rows': self.target_batch_rows(),
+                'max_batch_rows': self.max_batch_rows,
+                'max_wait_ms': self.max_wait * 1000
+            }
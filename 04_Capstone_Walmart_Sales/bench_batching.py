@@ -0,0 +1,81 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from app import model, predict_vector, vectorize_request
+from batching import MicroBatcher
+
+"""
+Micro-Batching Tradeoff Benchmark
+---------------------------------
+Simulates N concurrent clients calling the single-row prediction path in-process (no HTTP),
+with and without the MicroBatcher, for several max-wait settings:
+- Throughput (rows/s) and p50 / p99 latency per request
+- Mean batch size actually formed
+
+Waiting longer forms bigger batches (more throughput under load) but adds latency at low load;
+the adaptive target keeps a single client from waiting at all.
+
+Usage:
+    python bench_batching.py --clients 1 8 32 --requests 20 --waits 1 2 5
+"""
+
+parser = argparse.ArgumentParser(description='Throughput/latency of micro-batched vs direct single-row predictions.')
+parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32], help='Concurrent client threads.')
+parser.add_argument('--requests', type=int, default=20, help='Requests per client.')
+parser.add_argument('--waits', type=float, nargs='+', default=[1, 2, 5], help='max_wait_ms settings to test.')
+parser.add_argument('--max-batch-rows', type=int, default=64, help='Upper bound on the batch size.')
+args = parser.parse_args()
+
+if model is None:
+    raise SystemExit('Model could not be loaded. Run 05_train_model.py first.')
+
+rng = np.random.default_rng(42)
+
+
+def make_row():
+    return vectorize_request({'Store': 1, 'Dept': 1, 'Size': 151315, 'Week': 48, 'Year': 2012, 'Month': 12,
+                              'Sales_Lag_1': rng.uniform(5000, 50000), 'Sales_Lag_4': 18000,
+                              'Sales_Lag_52': 19000, 'Sales_MA4': 19500, 'Weeks_to_Christmas': 4})
+
+
+def run_clients(predict, clients):
+    """
+    Every client sends its requests back to back; returns (rows/s, latencies in ms).
+    """
+    rows = [[make_row() for _ in range(args.requests)] for _ in range(clients)]
+
+    def client(client_rows):
+        latencies = []
+        for row in client_rows:
+            start = time.perf_counter()
+            predict(row)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        latencies = np.concatenate(list(pool.map(client, rows)))
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+results = []
+for clients in args.clients:
+    configs = {'direct': None, **{f'batched, wait {wait:g}ms': wait for wait in args.waits}}
+    for name, wait in configs.items():
+        batcher = None if wait is None else MicroBatcher(model.predict, args.max_batch_rows, wait)
+        predict = predict_vector if batcher is None else batcher.predict
+        throughput, latencies = run_clients(predict, clients)
+        results.append({
+            'Clients': clients,
+            'Mode': name,
+            'Rows/s': throughput,
+            'p50 (ms)': np.percentile(latencies, 50),
+            'p99 (ms)': np.percentile(latencies, 99),
+            'Mean Batch': batcher.stats()['mean_batch_rows'] if batcher else 1.0
+        })
+
+report = pd.DataFrame(results).set_index(['Clients', 'Mode'])
+print(f"\nMICRO-BATCHING TRADEOFFS ({args.requests} requests per client, model: {type(model).__name__}):")
+print(report.to_string(float_format=lambda x: f"{x:,.2f}"))
@@ -0,0 +1,114 @@
+import argparse
+import json
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import app
+from app import json_loads, model, predict_vector, vectorize_request
+
+"""
+Single-Row Inference Microbenchmark
+-----------------------------------
+Compares the per-request cost of /predict before and after the fast path in app.py:
+- Before: json.loads -> pd.DataFrame([data]) -> add missing columns one by one -> reindex -> model.predict
+- After : fast JSON decoder -> precompiled NumPy row -> direct tree traversal
+          (the flattened forest of forest_export.py when it has been exported)
+
+Both paths start from the raw request body (bytes) and end with the predicted value.
+An end-to-end measurement through Flask's test client (no network) is reported as well,
+with the prediction cache disabled and on a cache hit.
+
+Usage:
+    python bench_inference.py --iterations 2000
+"""
+
+parser = argparse.ArgumentParser(description='Latency of the single-row prediction path (before vs after).')
+parser.add_argument('--iterations', type=int, default=2000, help='Number of timed calls per path.')
+args = parser.parse_args()
+
+if model is None:
+    raise SystemExit('Model could not be loaded. Run 05_train_model.py first.')
+
+# The "before" path always uses the pickled sklearn model, whatever app.py serves
+sklearn_model = joblib.load(app.model_path)
+
+# Same payload as test_api.py (one feature left out on purpose, to exercise the default path)
+sample_data = {
+    'Store': 1, 'Dept': 1, 'Size': 151315, 'IsHoliday': 0,
+    'Week': 48, 'Year': 2012, 'Month': 12,
+    'Sales_Lag_1': 20000, 'Sales_Lag_4': 18000, 'Sales_Lag_52': 19000, 'Sales_MA4': 19500,
+    'Weeks_to_Christmas': 4, 'Weeks_to_Thanksgiving': 0,
+    'Temperature': 45.0, 'Fuel_Price': 3.4, 'CPI': 223.0, 'Unemployment': 6.5,
+    'MarkDown1': 0.0, 'MarkDown2': 0.0, 'MarkDown3': 0.0, 'MarkDown4': 0.0
+}
+body = json.dumps(sample_data).encode()
+
+
+def legacy_predict(body):
+    """
+    The original /predict implementation (DataFrame-based alignment).
+    """
+    data = json.loads(body)
+    input_df = pd.DataFrame([data])
+    expected_cols = sklearn_model.feature_names_in_
+    for col in expected_cols:
+        if col not in input_df.columns:
+            input_df[col] = 0
+    input_df = input_df[expected_cols]
+    return sklearn_model.predict(input_df)[0]
+
+
+def fast_predict(body):
+    """
+    The precompiled fast path used by /predict now.
+    """
+    return predict_vector(vectorize_request(json_loads(body)))
+
+
+def measure(func, iterations):
+    """
+    Returns per-call latencies in microseconds (after a short warm-up).
+    """
+    for _ in range(20):
+        func()
+    latencies = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    return latencies
+
+
+# --- Correctness ---
+legacy_value, fast_value = legacy_predict(body), fast_predict(body)
+print(f"Legacy prediction: {legacy_value:.6f} | Fast prediction: {fast_value:.6f}")
+
+# --- Latency ---
+client = app.app.test_client()
+post = lambda: client.post('/predict', data=body, content_type='application/json')
+# (function, prediction cache enabled) - the repeated payload would otherwise always hit the cache
+paths = {
+    'Before (DataFrame path)': (lambda: legacy_predict(body), False),
+    'After (fast path)': (lambda: fast_predict(body), False),
+    'After, end-to-end via Flask': (post, False),
+    'After, end-to-end, cache hit': (post, True)
+}
+
+cache_size = app.prediction_cache.max_entries
+results = []
+for name, (func, cached) in paths.items():
+    app.prediction_cache.max_entries = cache_size if cached else 0
+    latencies = measure(func, args.iterations)
+    results.append({
+        'Path': name,
+        'p50 (us)': np.percentile(latencies, 50),
+        'p99 (us)': np.percentile(latencies, 99),
+        'Mean (us)': latencies.mean()
+    })
+
+report = pd.DataFrame(results).set_index('Path')
+print(f"\nSINGLE-ROW LATENCY ({args.iterations} calls, JSON decoder: {json_loads.__module__}, "
+      f"served model: {type(model).__name__}):")
+print(report.to_string(float_format=lambda x: f"{x:,.1f}"))
+print(f"\np50 speedup: {report['p50 (us)'].iloc[0] / report['p50 (us)'].iloc[1]:,.1f}x")
@@ -0,0 +1,90 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from lag_engine import SERIES_KEYS, add_lag_features
+from pipeline_io import load_table
+
+"""
+Lag Engine Benchmark
+--------------------
+Compares the original groupby-based feature code with lag_engine.py at several data sizes.
+Larger sizes are simulated by replicating the cleaned table with shifted Store IDs,
+so every copy is a new set of independent series.
+
+Both implementations are checked for equal results (within float tolerance) before timings are reported.
+
+Usage:
+    python bench_lag_engine.py --scales 1 10 100
+"""
+
+parser = argparse.ArgumentParser(description='Benchmark the vectorized lag engine against groupby/transform.')
+parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='Data size multipliers.')
+args = parser.parse_args()
+
+
+def legacy_features(df, group_cols):
+    """
+    Original implementation: one groupby per lag plus a per-group Python lambda for the rolling mean.
+    """
+    df = df.sort_values(by=group_cols + ['Date'])
+    df['Sales_Lag_1'] = df.groupby(group_cols)['Weekly_Sales'].shift(1)
+    df['Sales_Lag_4'] = df.groupby(group_cols)['Weekly_Sales'].shift(4)
+    df['Sales_Lag_52'] = df.groupby(group_cols)['Weekly_Sales'].shift(52)
+    df['Sales_MA4'] = df.groupby(group_cols)['Sales_Lag_1'].transform(lambda x: x.rolling(window=4).mean())
+    return df
+
+
+def replicate(df, scale):
+    """
+    Stacks `scale` copies of the table, giving each copy its own Store IDs.
+    """
+    store_offset = int(df['Store'].max())
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        copy['Store'] = copy['Store'].astype('int64') + i * store_offset
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+base_df = load_table('walmart_cleaned_data', columns=['Store', 'Dept', 'Date', 'Weekly_Sales'])
+feature_cols = ['Sales_Lag_1', 'Sales_Lag_4', 'Sales_Lag_52', 'Sales_MA4']
+results = []
+
+for scale in args.scales:
+    df = replicate(base_df, scale)
+    print(f"Scale x{scale}: {len(df):,} rows ...")
+
+    start = time.perf_counter()
+    legacy = legacy_features(df, SERIES_KEYS)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = add_lag_features(df, group_cols=SERIES_KEYS, lags=[1, 4, 52], windows=[4], stats=['mean'])
+    engine_time = time.perf_counter() - start
+
+    # --- Equivalence Check ---
+    legacy = legacy.reset_index(drop=True)
+    for col in feature_cols:
+        if not np.allclose(legacy[col], engine[col], equal_nan=True):
+            raise AssertionError(f"Mismatch in {col} at scale x{scale}")
+
+    results.append({
+        'Scale': f"x{scale}",
+        'Rows': len(df),
+        'Legacy (s)': legacy_time,
+        'Engine (s)': engine_time,
+        'Speedup': legacy_time / engine_time
+    })
+
+# --- Extended Feature Set (engine only) ---
+# Same single pass, with extra rolling statistics and EWMs
+start = time.perf_counter()
+add_lag_features(df, group_cols=SERIES_KEYS, lags=[1, 2, 4, 52], windows=[4, 13],
+                 stats=['mean', 'std', 'min', 'max'], ewm_spans=[4, 13])
+extended_time = time.perf_counter() - start
+
+print("\nLAG ENGINE REPORT (all features verified equal to the legacy output):")
+print(pd.DataFrame(results).to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+print(f"\nExtended set (4 lags, 8 rolling stats, 2 EWMs) at x{args.scales[-1]}: {extended_time:,.3f}s")
@@ -0,0 +1,121 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import requests
+
+"""
+Serving Throughput vs Workers
+-----------------------------
+Starts serve.py with 1, 2, 4... workers on this machine, sends the same /predict load to each
+configuration and reports throughput, latency and memory:
+- Requests/s and p50 / p99 latency (client side, keep-alive sessions)
+- Total PSS of the worker pool: proportional set size, where pages shared between processes
+  (e.g. the memory-mapped model) are split between them instead of counted once per worker
+
+The prediction cache is disabled, so every request runs the forest.
+Note: the load generator runs on the same box and competes with the workers for CPU.
+
+Usage:
+    python bench_serving.py --workers 1 2 4 8 --requests 2000 --concurrency 16
+"""
+
+parser = argparse.ArgumentParser(description='Throughput of serve.py for a growing number of workers.')
+parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to measure.')
+parser.add_argument('--requests', type=int, default=2000, help='Requests per configuration.')
+parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client connections.')
+parser.add_argument('--port', type=int, default=5055, help='Port used for the benchmark server.')
+args = parser.parse_args()
+
+current_dir = Path(__file__).parent
+url = f"http://127.0.0.1:{args.port}"
+
+# Same payload as test_api.py, with a varying lag so no two requests are identical
+rng = np.random.default_rng(42)
+payloads = [{
+    'Store': 1, 'Dept': 1, 'Size': 151315, 'IsHoliday': 0, 'Week': 48, 'Year': 2012, 'Month': 12,
+    'Sales_Lag_1': float(lag), 'Sales_Lag_4': 18000, 'Sales_Lag_52': 19000, 'Sales_MA4': 19500,
+    'Weeks_to_Christmas': 4, 'Weeks_to_Thanksgiving': 0, 'Temperature': 45.0, 'Fuel_Price': 3.4,
+    'CPI': 223.0, 'Unemployment': 6.5
+} for lag in rng.uniform(5000, 50000, args.requests)]
+
+
+def pool_pss_mb(master_pid):
+    """
+    Total PSS (MB) of the master and its workers, from /proc (Linux only; None elsewhere).
+    """
+    try:
+        children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text().split()
+        total_kb = 0
+        for pid in [str(master_pid)] + children:
+            for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+                if line.startswith('Pss:'):
+                    total_kb += int(line.split()[1])
+        return total_kb / 1024
+    except OSError:
+        return None
+
+
+def wait_until_ready(workers, timeout=60):
+    """
+    Waits until every worker has loaded the model (each one answers /stats once it is up).
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/stats", timeout=5).ok:
+                time.sleep(0.5 * workers)
+                return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError('Server did not start in time.')
+
+
+def run_load():
+    """
+    Sends every payload with `concurrency` keep-alive sessions; returns (wall seconds, latencies in ms).
+    """
+    def send(chunk):
+        latencies = []
+        with requests.Session() as session:
+            for payload in chunk:
+                start = time.perf_counter()
+                session.post(f"{url}/predict", json=payload).raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    chunks = [payloads[i::args.concurrency] for i in range(args.concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = np.concatenate(list(pool.map(send, chunks)))
+    return time.perf_counter() - start, latencies
+
+
+results = []
+for workers in args.workers:
+    env = {**os.environ, 'WALMART_PREDICTION_CACHE_SIZE': '0'}
+    server = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(workers), '--bind', url.split('//')[1]],
+                              cwd=current_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(workers)
+        elapsed, latencies = run_load()
+        results.append({
+            'Workers': workers,
+            'Requests/s': len(latencies) / elapsed,
+            'p50 (ms)': np.percentile(latencies, 50),
+            'p99 (ms)': np.percentile(latencies, 99),
+            'Pool PSS (MB)': pool_pss_mb(server.pid)
+        })
+    finally:
+        # Graceful shutdown: SIGTERM lets the workers finish in-flight requests
+        server.terminate()
+        server.wait(timeout=60)
+
+report = pd.DataFrame(results).set_index('Workers')
+print(f"\nSERVING THROUGHPUT ({args.requests} requests, concurrency {args.concurrency}, {os.cpu_count()} CPU cores):")
+print(report.to_string(float_format=lambda x: f"{x:,.1f}"))
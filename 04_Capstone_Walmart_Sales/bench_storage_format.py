@@ -0,0 +1,79 @@
+import argparse
+import time
+import pandas as pd
+import pipeline_io
+from pipeline_io import FILE_EXTENSIONS, load_table, save_table
+
+"""
+Storage Format Benchmark
+------------------------
+Compares the legacy CSV hand-off with the columnar formats (Parquet, Feather/Arrow IPC)
+on the engineered training table:
+1. Write time and file size
+2. Full read time
+3. Projected read time (only the columns 05_train_model.py uses)
+4. Dtype preservation after the round trip
+
+Usage:
+    python bench_storage_format.py --table final_train_data --scale 10
+"""
+
+parser = argparse.ArgumentParser(description='Benchmark CSV vs Parquet vs Feather hand-off.')
+parser.add_argument('--table', default='final_train_data', help='Intermediate table to benchmark.')
+parser.add_argument('--source-format', default=pipeline_io.PIPELINE_FORMAT, help='Format the table is currently stored in.')
+parser.add_argument('--scale', type=int, default=1, help='Replicate the table N times to simulate more data.')
+parser.add_argument('--repeat', type=int, default=3, help='Repetitions per measurement (best time is reported).')
+args = parser.parse_args()
+
+
+def best_time(func, repeat):
+    """
+    Runs a function several times and returns (best wall time in seconds, last result).
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# --- Load Source Table ---
+df = load_table(args.table, fmt=args.source_format)
+if args.scale > 1:
+    df = pd.concat([df] * args.scale, ignore_index=True)
+
+# Columns the training stage actually needs
+projected_cols = [col for col in df.columns if col != 'Type']
+
+print(f"Benchmark table: {args.table} x{args.scale} -> {df.shape[0]:,} rows, {df.shape[1]} columns")
+
+# --- Benchmark Each Format ---
+bench_name = f"_bench_{args.table}"
+results = []
+
+for fmt in FILE_EXTENSIONS:
+    write_time, path = best_time(lambda: save_table(df, bench_name, fmt=fmt), args.repeat)
+    read_time, df_read = best_time(lambda: load_table(bench_name, fmt=fmt), args.repeat)
+    projected_time, _ = best_time(lambda: load_table(bench_name, columns=projected_cols, fmt=fmt), args.repeat)
+
+    # A column "survives" if its dtype is identical after the round trip
+    lost_dtypes = [col for col in df.columns if df_read[col].dtype != df[col].dtype]
+
+    results.append({
+        'Format': fmt,
+        'Size (MB)': path.stat().st_size / 1e6,
+        'Write (s)': write_time,
+        'Read (s)': read_time,
+        'Projected Read (s)': projected_time,
+        'Dtypes Lost': ', '.join(lost_dtypes) or '-'
+    })
+    path.unlink()
+
+# --- Report ---
+report = pd.DataFrame(results).set_index('Format')
+csv_read = report.loc['csv', 'Read (s)']
+report['Read Speedup vs CSV'] = csv_read / report['Read (s)']
+
+print("\nSTORAGE FORMAT REPORT:")
+print(report.to_string(float_format=lambda x: f"{x:,.3f}"))
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from pipeline_io import PIPELINE_FORMAT, table_path
+
+"""
+Scaling Benchmark Suite
+-----------------------
+Measures how every capstone stage scales with the data size, on synthetic data
+(generate_synthetic_data.py; scale 1 = the Kaggle size, 45 stores x 81 depts x 143 weeks;
+scale N = N x the stores):
+
+- merge (01), cleaning (02), feature engineering (04), training (05): the scripts themselves
+- single-row inference (/predict) and batch inference (/predict_batch): app.py through Flask's test client
+
+Every step runs in its own process, inside a per-scale work folder holding a copy of the scripts
+(so the repo's model and data are never touched). For each step: wall time, peak RSS of the process
+and throughput (rows/s, or requests/s for /predict).
+
+Results are saved as JSON (bench_results/<timestamp>_<commit>.json). With --compare, every metric is
+checked against a previous results file: wall time / peak RSS growing, or throughput dropping, by more than
+--tolerance is flagged as a regression and the script exits with status 1 (usable as a CI gate).
+
+Usage:
+    python bench_suite.py --scales 1 10
+    python bench_suite.py --scales 1 10 100 --compare bench_results/baseline.json --tolerance 0.15
+"""
+
+STAGES = [
+    ('merge', '01_data_loading_and_merging.py'),
+    ('cleaning', '02_data_cleaning.py'),
+    ('features', '04_feature_engineering.py'),
+    ('training', '05_train_model.py'),
+]
+
+# Runs inside the work folder: times /predict and /predict_batch through app.py, prints one JSON line
+INFERENCE_SCRIPT = '''
+import json, sys, time
+import numpy as np
+from pipeline_io import load_table
+import app
+
+n_requests, batch_rows = int(sys.argv[1]), int(sys.argv[2])
+df = load_table('final_train_data', exclude=['Type', 'Date', 'Weekly_Sales'])
+df['IsHoliday'] = df['IsHoliday'].astype(int)
+records = json.loads(df.sample(n=min(batch_rows, len(df)), replace=len(df) < batch_rows, random_state=42).to_json(orient='records'))
+app.prediction_cache.max_entries = 0
+client = app.app.test_client()
+
+latencies = []
+start = time.perf_counter()
+for record in records[:n_requests]:
+    t = time.perf_counter()
+    client.post('/predict', json=record)
+    latencies.append(time.perf_counter() - t)
+single_time = time.perf_counter() - start
+
+start = time.perf_counter()
+client.post('/predict_batch', json=records).get_data()
+batch_time = time.perf_counter() - start
+print(json.dumps({'requests': len(latencies), 'single_time': single_time,
+                  'p50_ms': float(np.percentile(latencies, 50) * 1000), 'p99_ms': float(np.percentile(latencies, 99) * 1000),
+                  'batch_rows': len(records), 'batch_time': batch_time}))
+'''
+
+parser = argparse.ArgumentParser(description='Wall time / peak RSS / throughput of every stage at several data sizes.')
+parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help='Data sizes (multiples of the Kaggle store count).')
+parser.add_argument('--requests', type=int, default=500, help='/predict requests per scale.')
+parser.add_argument('--batch-rows', type=int, default=20_000, help='Rows in the /predict_batch request.')
+parser.add_argument('--work-dir', default=str(Path(__file__).parent / 'bench_suite_data'), help='Per-scale work folders.')
+parser.add_argument('--output', help='Results file (default: bench_results/<timestamp>_<commit>.json).')
+parser.add_argument('--compare', help='Previous results file (baseline) to check for regressions.')
+parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative change before a metric is flagged.')
+args = parser.parse_args()
+
+current_dir = Path(__file__).parent
+
+
+def run_measured(command, cwd, env):
+    """
+    Runs a command and returns (wall seconds, peak RSS MB of the process, stdout).
+    The child's own rusage comes from wait4 (Linux / macOS); peak RSS is None elsewhere.
+    """
+    with tempfile.TemporaryFile('w+') as stdout, tempfile.TemporaryFile('w+') as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=stdout, stderr=stderr, text=True)
+        peak_mb = None
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            returncode = os.waitstatus_to_exitcode(status)
+            peak_mb = usage.ru_maxrss / 1024**2 if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+        else:
+            returncode = process.wait()
+        wall = time.perf_counter() - start
+
+        stdout.seek(0)
+        stderr.seek(0)
+        if returncode != 0:
+            raise RuntimeError(f"{' '.join(map(str, command))} failed:\n{stderr.read()[-2000:]}")
+        return wall, peak_mb, stdout.read()
+
+
+def table_rows(work_dir, name):
+    """
+    Row count of a stage's input table in the work folder, in the pipeline format the stages use
+    (WALMART_PIPELINE_FORMAT is passed through to them).
+    """
+    path = work_dir / table_path(name).name
+    if PIPELINE_FORMAT == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_metadata(path).num_rows
+    if PIPELINE_FORMAT == 'feather':
+        import pyarrow as pa
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    with open(path) as f:
+        return sum(1 for _ in f) - 1
+
+
+def prepare(scale):
+    """
+    Work folder of one scale: synthetic raw CSVs (generated once, then reused) and a fresh copy of the scripts.
+    """
+    work_dir = Path(args.work_dir) / f"scale_{scale}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    for script in current_dir.glob('*.py'):
+        shutil.copy(script, work_dir / script.name)
+    if not (work_dir / 'train.csv').exists():
+        print(f"Generating scale x{scale} data ...")
+        subprocess.run([sys.executable, 'generate_synthetic_data.py', '--out', '.', '--stores', str(45 * scale)],
+                       cwd=work_dir, check=True, stdout=subprocess.DEVNULL)
+    return work_dir
+
+
+def bench_scale(scale):
+    work_dir = prepare(scale)
+    env = {**os.environ, 'WALMART_DATA_DIR': str(work_dir), 'MPLBACKEND': 'Agg', 'WALMART_PROFILE': '0'}
+    with open(work_dir / 'train.csv') as f:
+        input_rows = {'merge': sum(1 for _ in f) - 1}
+
+    results = {}
+    for stage, script in STAGES:
+        rows = input_rows.get(stage) or table_rows(work_dir, {'cleaning': 'merged_raw_data',
+                                                              'features': 'walmart_cleaned_data',
+                                                              'training': 'final_train_data'}[stage])
+        wall, peak_mb, _ = run_measured([sys.executable, script], work_dir, env)
+        results[stage] = {'wall_s': round(wall, 3), 'peak_rss_mb': peak_mb and round(peak_mb, 1),
+                          'throughput': round(rows / wall, 1), 'unit': 'rows/s', 'rows': rows}
+        print(f"  x{scale:<4} {stage:<18} {wall:9.2f}s  {peak_mb or 0:8,.0f} MB  {rows / wall:>12,.0f} rows/s")
+
+    wall, peak_mb, stdout = run_measured([sys.executable, '-c', INFERENCE_SCRIPT, str(args.requests), str(args.batch_rows)],
+                                         work_dir, env)
+    inference = json.loads(stdout.strip().splitlines()[-1])
+    results['single_row_inference'] = {
+        'wall_s': round(inference['single_time'], 3), 'peak_rss_mb': peak_mb and round(peak_mb, 1),
+        'throughput': round(inference['requests'] / inference['single_time'], 1), 'unit': 'requests/s',
+        'p50_ms': round(inference['p50_ms'], 3), 'p99_ms': round(inference['p99_ms'], 3)
+    }
+    results['batch_inference'] = {
+        'wall_s': round(inference['batch_time'], 3), 'peak_rss_mb': peak_mb and round(peak_mb, 1),
+        'throughput': round(inference['batch_rows'] / inference['batch_time'], 1), 'unit': 'rows/s',
+        'rows': inference['batch_rows']
+    }
+    for stage in ['single_row_inference', 'batch_inference']:
+        r = results[stage]
+        print(f"  x{scale:<4} {stage:<18} {r['wall_s']:9.2f}s  {peak_mb or 0:8,.0f} MB  {r['throughput']:>12,.0f} {r['unit']}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=current_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(previous, current, tolerance):
+    """
+    Metrics that got worse by more than `tolerance` (relative): wall time / peak RSS up, throughput down.
+    """
+    regressions = []
+    for scale, stages in current.items():
+        for stage, metrics in stages.items():
+            before = previous.get(scale, {}).get(stage)
+            if not before:
+                continue
+            for metric, higher_is_worse in [('wall_s', True), ('peak_rss_mb', True), ('throughput', False)]:
+                old, new = before.get(metric), metrics.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                    regressions.append((scale, stage, metric, old, new, change))
+    return regressions
+
+
+results = {}
+print(f"{'scale':<6} {'step':<20} {'wall':>9}  {'peak RSS':>11}  {'throughput':>12}")
+for scale in args.scales:
+    results[str(scale)] = bench_scale(scale)
+
+report = {
+    'timestamp': datetime.now().isoformat(timespec='seconds'),
+    'commit': git_commit(),
+    'settings': {**vars(args), 'host_cpus': os.cpu_count(), 'python': platform.python_version()},
+    'results': results
+}
+output = Path(args.output) if args.output else current_dir / 'bench_results' / f"{datetime.now():%Y%m%d_%H%M%S}_{report['commit']}.json"
+output.parent.mkdir(parents=True, exist_ok=True)
+output.write_text(json.dumps(report, indent=2))
+print(f"\nResults saved to: {output}")
+
+if args.compare:
+    baseline = json.loads(Path(args.compare).read_text())
+    regressions = find_regressions(baseline['results'], results, args.tolerance)
+    print(f"\nCOMPARISON vs {args.compare} (commit {baseline.get('commit')}, tolerance {args.tolerance:.0%}):")
+    if not regressions:
+        print("  No regressions.")
+    for scale, stage, metric, old, new, change in regressions:
+        print(f"  REGRESSION x{scale} {stage:<20} {metric:<12} {old:>12,.2f} -> {new:>12,.2f} ({change:+.1%})")
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from schema import CALENDAR_DTYPES
+
+"""
+Calendar Feature Lookup Table
+-----------------------------
+Every date-derived feature depends only on the week-ending 'Date', and the dataset has only
+~143 distinct dates for hundreds of thousands of rows. So instead of a Python call per row
+(Series.apply) or a full-column dt.isocalendar(), features are:
+1. Computed once per unique date (a small lookup table)
+2. Broadcast back to every row through factorized date codes (one NumPy take per column)
+
+Available features:
+- Year, Month, Week (ISO week)
+- Weeks_to_Christmas / Weeks_to_Thanksgiving: ISO-week countdowns used by the model
+- Weeks_to_Next_<Event>: weeks until the next occurrence of each configured event (NaN if unknown)
+- Holiday_Lag_<k> / Holiday_Lead_<k>: the week k weeks before / after was an event week
+"""
+
+# Week-ending Fridays of the holiday weeks (Walmart 'FRIDAY' rule, see 03_eda_analysis.py)
+SPECIAL_DATES = {
+    'Super Bowl':   ['2010-02-12', '2011-02-11', '2012-02-10', '2013-02-08'],
+    'Labor Day':    ['2010-09-10', '2011-09-09', '2012-09-07', '2013-09-06'],
+    'Thanksgiving': ['2010-11-26', '2011-11-25', '2012-11-23', '2013-11-29'],
+    'Christmas':    ['2010-12-31', '2011-12-30', '2012-12-28', '2013-12-27']
+}
+
+# ISO-week targets of the countdown features
+# A. Weeks to Christmas (Target: Week 52)
+# B. Weeks to Thanksgiving / Black Friday (Target: Week 47)
+# The countdown is 0 once the target week is reached or passed.
+WEEK_COUNTDOWNS = {
+    'Weeks_to_Christmas': 52,
+    'Weeks_to_Thanksgiving': 47
+}
+
+
+def event_column(name):
+    """
+    Column name of a date-based event countdown (e.g. 'Super Bowl' -> 'Weeks_to_Next_Super_Bowl').
+    """
+    return f"Weeks_to_Next_{name.replace(' ', '_')}"
+
+
+def holiday_lag_column(k):
+    """
+    Column name of a holiday-week lag (k > 0) or lead (k < 0).
+    """
+    return f"Holiday_Lag_{k}" if k > 0 else f"Holiday_Lead_{-k}"
+
+
+def calendar_table(dates, events=None, holiday_lags=()):
+    """
+    Computes the calendar features for a set of (unique) dates.
+
+    Args:
+        dates (array-like): Distinct dates.
+        events (dict): Event name -> list of week-ending dates. Adds 'Weeks_to_Next_<Event>' columns.
+        holiday_lags (list): Week offsets k; adds 'Holiday_Lag_<k>' (k > 0) / 'Holiday_Lead_<-k>' (k < 0).
+
+    Returns:
+        DataFrame indexed by date, one column per feature.
+    """
+    dates = pd.DatetimeIndex(dates)
+    table = pd.DataFrame(index=dates)
+
+    table['Year'] = dates.year
+    table['Month'] = dates.month
+    table['Week'] = dates.isocalendar()['week']
+    table = table.astype(CALENDAR_DTYPES)
+
+    # Signed arithmetic: 'Week' is unsigned, so 52 - 53 would otherwise wrap around
+    week = table['Week'].astype('Int64')
+    for col, target_week in WEEK_COUNTDOWNS.items():
+        table[col] = (target_week - week).clip(lower=0).astype('UInt8')
+
+    for name, event_dates in (events or {}).items():
+        event_dates = pd.DatetimeIndex(sorted(pd.to_datetime(event_dates)))
+        next_idx = event_dates.searchsorted(dates, side='left')
+        has_next = next_idx < len(event_dates)
+        weeks = np.full(len(dates), np.nan)
+        weeks[has_next] = (event_dates[next_idx[has_next]] - dates[has_next]).days // 7
+        table[event_column(name)] = weeks
+
+    if holiday_lags:
+        all_event_dates = pd.DatetimeIndex(np.concatenate([pd.to_datetime(d) for d in (events or SPECIAL_DATES).values()]))
+        for k in holiday_lags:
+            table[holiday_lag_column(k)] = (dates - pd.Timedelta(weeks=k)).isin(all_event_dates)
+
+    return table
+
+
+def add_calendar_features(df, columns=None, events=None, holiday_lags=(), date_col='Date'):
+    """
+    Adds calendar features to every row, computing them only once per unique date.
+
+    Args:
+        df (DataFrame): Data with a datetime date column.
+        columns (list): Features to add. Defaults to every feature computed by calendar_table.
+        events (dict): See calendar_table.
+        holiday_lags (list): See calendar_table.
+        date_col (str): Name of the date column.
+    """
+    codes, unique_dates = pd.factorize(df[date_col])
+    table = calendar_table(unique_dates, events=events, holiday_lags=holiday_lags)
+
+    # factorize codes missing dates (NaT) as -1: those rows get missing features (as the .dt accessors gave),
+    # not the last date's row
+    has_missing = bool((codes < 0).any())
+    for col in columns or table.columns:
+        df[col] = table[col].array.take(codes, allow_fill=has_missing)
+    return df
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from calendar_features import add_calendar_features
+from join_index import RawTableJoin
+from lag_engine import FEATURE_LAGS, FEATURE_WINDOWS, SERIES_KEYS, add_lag_features, required_history, series_positions, series_tail
+from schema import MARKDOWN_COLS, load_raw_table
+
+"""
+Chunk Processing
+----------------
+Merge (01), cleaning (02) and feature engineering (04) applied to a *slice* of train.csv,
+given the per-series state carried from the rows before it.
+
+Used by:
+- stream_pipeline.py: train.csv processed chunk by chunk (out-of-core mode)
+- incremental_update.py: only the new week's rows processed (weekly update mode)
+
+The per-series state holds the last HISTORY weeks of every Store/Dept series
+(Store, Dept, Date, Weekly_Sales), which is all that lags and moving averages need.
+"""
+
+STATE_COLS = SERIES_KEYS + ['Date', 'Weekly_Sales']
+HISTORY = required_history(FEATURE_LAGS, FEATURE_WINDOWS)
+FEATURE_COLS = [f"Sales_Lag_{k}" for k in FEATURE_LAGS] + [f"Sales_MA{w}" for w in FEATURE_WINDOWS]
+
+
+def check_series_order(lagged, positions):
+    """
+    Raises if a series goes back in time, either inside the new rows or relative to the carried state.
+    """
+    dates = lagged['Date'].to_numpy()
+    is_new = lagged['_row'].to_numpy() >= 0
+    inside = positions[1:] > 0
+    out_of_order = inside & ((dates[1:] <= dates[:-1]) | (is_new[:-1] & ~is_new[1:]))
+    if out_of_order.any():
+        raise ValueError("Every Store/Dept series must arrive in date order, after the weeks already "
+                         "in the carried state. Sort the rows by Store, Dept, Date and do not re-send old weeks.")
+
+
+def extend_features(cleaned, state):
+    """
+    Builds the feature rows (04) for new cleaned rows, continuing the series held in `state`.
+
+    Args:
+        cleaned (DataFrame): New rows in the cleaned (02) layout.
+        state (DataFrame): Per-series state (STATE_COLS), or None when starting from scratch.
+
+    Returns:
+        (final rows with NaN rows dropped, new per-series state)
+    """
+    if state is None:
+        state = cleaned[STATE_COLS].iloc[:0]
+
+    # Lags are computed on a narrow frame: carried history (_row = -1) + the new rows
+    narrow = pd.concat([state.assign(_row=-1), cleaned[STATE_COLS].assign(_row=np.arange(len(cleaned)))],
+                       ignore_index=True)
+    lagged = add_lag_features(narrow, lags=FEATURE_LAGS, windows=FEATURE_WINDOWS, stats=['mean'])
+    positions, _ = series_positions(lagged)
+    check_series_order(lagged, positions)
+
+    new_rows = lagged[lagged['_row'] >= 0]
+    final = cleaned.iloc[new_rows['_row'].to_numpy()].reset_index(drop=True)
+    for col in FEATURE_COLS:
+        final[col] = new_rows[col].to_numpy()
+    final = add_calendar_features(final, columns=['Weeks_to_Christmas', 'Weeks_to_Thanksgiving'])
+    final = final.dropna()
+
+    new_state = series_tail(lagged[STATE_COLS], HISTORY, presorted=True)
+    return final, new_state
+
+
+class ChunkProcessor:
+    """
+    Holds the small lookup tables (stores, features) in memory, indexed once (join_index.py),
+    and processes slices of train.csv.
+    Running statistics (negative rows dropped, IsHoliday mismatches) are collected in self.stats.
+    """
+
+    def __init__(self, data_dir=None):
+        self.df_stores = load_raw_table('stores', data_dir)
+        self.df_features = load_raw_table('features', data_dir)
+        self.joiner = RawTableJoin(self.df_features, self.df_stores)
+        self.stats = {'negative_rows': 0, 'holiday_mismatches': 0}
+
+    def merge_and_clean(self, chunk):
+        """
+        Merge (01) + cleaning (02) of raw train rows.
+        """
+        # Merge and IsHoliday consistency check (rows that found a match in features.csv) in one pass
+        merged, join_report = self.joiner.join(chunk)
+        self.stats['holiday_mismatches'] += join_report['holiday_mismatches']
+
+        merged[MARKDOWN_COLS] = merged[MARKDOWN_COLS].fillna(0)
+        cleaned = merged[merged['Weekly_Sales'] >= 0].reset_index(drop=True)
+        self.stats['negative_rows'] += len(merged) - len(cleaned)
+        return add_calendar_features(cleaned, columns=['Year', 'Month', 'Week'])
+
+    def process(self, chunk, state):
+        """
+        Full 01 -> 02 -> 04 processing of raw train rows. Returns (cleaned rows, final rows, new state).
+        """
+        cleaned = self.merge_and_clean(chunk)
+        final, new_state = extend_features(cleaned, state)
+        return cleaned, final, new_state
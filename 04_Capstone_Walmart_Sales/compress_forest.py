@@ -0,0 +1,135 @@
+import argparse
+import json
+import shutil
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+from forest_export import FlatForest, export_forest
+from pipeline_io import load_table
+
+"""
+Forest Compression Report
+-------------------------
+The 100 deep trees of the Random Forest dominate the model's size and latency. This script exports
+compressed variants of the trained forest (no retraining) and measures what each one costs in accuracy:
+
+Structural (fewer nodes, see forest_export.flatten_forest):
+- depth cap: nodes at depth d become leaves predicting their node mean
+- pruning: nodes holding fewer than k training samples become leaves
+- fewer trees: only the first n trees are kept
+Storage (smaller dtypes, see forest_export.compact_storage):
+- compact: uint8 feature ids + float32 thresholds rounded down (lossless)
+- float32 / 16-bit quantized leaf values (lossy)
+
+For every variant: size on disk, load time, single-row p50 latency, batch time and MAE / R² on the
+time-based test split of 05_train_model.py (Feb 2012 onwards).
+The report is saved to forest_compression_report.json.
+
+Usage:
+    python compress_forest.py
+    python compress_forest.py --export depth16_compact   # serve a variant (app.py reads forest_arrays/)
+"""
+
+# Variant name -> export_forest options (None: the pickled sklearn model itself)
+VARIANTS = {
+    'sklearn_pickle': None,
+    'flat_float64': {},
+    'compact_lossless': {'compact': True},
+    'compact_value_f32': {'compact': True, 'value_bits': 32},
+    'compact_value_u16': {'compact': True, 'value_bits': 16},
+    'depth20': {'max_depth': 20},
+    'depth16': {'max_depth': 16},
+    'depth12': {'max_depth': 12},
+    'min_samples_5': {'min_samples_split': 5},
+    'min_samples_20': {'min_samples_split': 20},
+    'trees50': {'n_trees': 50},
+    'trees25': {'n_trees': 25},
+    'depth16_compact': {'max_depth': 16, 'compact': True, 'value_bits': 32},
+    'trees50_depth16_u16': {'n_trees': 50, 'max_depth': 16, 'compact': True, 'value_bits': 16},
+}
+
+parser = argparse.ArgumentParser(description='Size / latency / accuracy of compressed forest variants.')
+parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS), help='Variants to measure.')
+parser.add_argument('--export', choices=[name for name, options in VARIANTS.items() if options is not None],
+                    help='Also write this variant to forest_arrays/ (served by app.py).')
+parser.add_argument('--repeats', type=int, default=200, help='Single-row predictions timed per variant.')
+args = parser.parse_args()
+
+current_dir = Path(__file__).parent
+model_path = current_dir / "random_forest_model.pkl"
+variants_dir = current_dir / "forest_variants"
+report_path = current_dir / "forest_compression_report.json"
+
+# --- TEST SPLIT (same as 05_train_model.py) ---
+df = load_table('final_train_data', exclude=['Type'])
+df['IsHoliday'] = df['IsHoliday'].astype(int)
+test_df = df[df['Date'] >= '2012-02-01']
+
+start = time.perf_counter()
+model = joblib.load(model_path)
+pickle_load_time = time.perf_counter() - start
+# Sequential accumulation: same summation order as FlatForest
+model.n_jobs = 1
+
+X_test = test_df[model.feature_names_in_]
+y_test = test_df['Weekly_Sales']
+X_array = X_test.to_numpy(dtype=np.float32)
+
+
+def single_row_p50_us(predict, row):
+    timings = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def measure(name, options):
+    if options is None:
+        predictor, size, load_time, n_nodes = model, model_path.stat().st_size, pickle_load_time, \
+            sum(estimator.tree_.node_count for estimator in model.estimators_)
+        X, row = X_test, X_test.iloc[[0]]
+    else:
+        out_dir = export_forest(model, variants_dir / name, **options)
+        size = sum(path.stat().st_size for path in out_dir.iterdir())
+        start = time.perf_counter()
+        predictor = FlatForest.load(out_dir)
+        load_time = time.perf_counter() - start
+        n_nodes = predictor.n_nodes
+        X, row = X_array, X_array[:1]
+
+    start = time.perf_counter()
+    y_pred = predictor.predict(X)
+    batch_time = time.perf_counter() - start
+
+    return {
+        'variant': name,
+        'nodes': n_nodes,
+        'size_mb': round(size / 1e6, 2),
+        'load_ms': round(load_time * 1000, 1),
+        'single_row_p50_us': round(single_row_p50_us(predictor.predict, row), 1),
+        'batch_s': round(batch_time, 3),
+        'mae': round(mean_absolute_error(y_test, y_pred), 2),
+        'r2': round(r2_score(y_test, y_pred), 5)
+    }
+
+
+print(f"Test split: {len(X_test):,} rows (Feb 2012 onwards) | {len(model.estimators_)} trees")
+results = [measure(name, VARIANTS[name]) for name in args.variants]
+shutil.rmtree(variants_dir, ignore_errors=True)
+
+report = pd.DataFrame(results).set_index('variant')
+print("\nFOREST COMPRESSION REPORT:")
+print(report.to_string())
+report_path.write_text(json.dumps(results, indent=2))
+print(f"\nReport saved to: {report_path}")
+
+# --- SERVE A VARIANT ---
+# Recorded against the current .pkl, so app.py treats it as the up-to-date export
+if args.export:
+    export_dir = export_forest(model, current_dir / "forest_arrays", source_path=model_path, **VARIANTS[args.export])
+    print(f"Variant '{args.export}' exported to: {export_dir}")
@@ -0,0 +1,219 @@
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from calendar_features import calendar_table
+from chunk_processing import HISTORY
+from lag_engine import FEATURE_LAGS, FEATURE_WINDOWS
+from pipeline_io import load_table, parts_dir, table_path
+
+"""
+Online Feature Store
+--------------------
+Serves the lag / moving-average features of a Store/Dept series at request time, so API clients
+only need to send Store, Dept and Date (instead of computing Sales_Lag_1/4/52 and Sales_MA4 themselves).
+
+Source: the per-series state written by 04_feature_engineering.py / incremental_update.py
+('feature_state': the last 52 weeks of every Store/Dept series).
+
+Layout (one snapshot, rebuilt on every refresh):
+- series_index: (Store, Dept) -> row of the arrays below (dict, O(1))
+- days:  (n_series x 52) int64 day numbers of the series' last weeks, oldest first
+- sales: (n_series x 52) Weekly_Sales of those weeks (NaN-padded for short series)
+
+Feature semantics match 04_feature_engineering.py: for a requested Date, Sales_Lag_k is the sales
+of the k-th stored week before that date, and Sales_MA4 the mean of the 4 weeks before it.
+The next week after the latest data therefore gets exactly the features stage 04 would compute.
+A stored week is only used as lag k if it actually lies k weeks before the requested date
+(within LAG_TOLERANCE_DAYS): a date far past the stored history does not get last week's sales as its lags.
+Features that can't be served (unknown series, not enough or stale history) are left out and
+reported by unserved_features().
+
+Calendar features (Year, Month, Week, countdowns) are derived from the Date as well.
+
+Refresh: when the state table changes on disk, a new snapshot is built next to the current one
+and swapped in with a single reference assignment (readers never see a partial update).
+"""
+
+LAG_COLS = [f"Sales_Lag_{k}" for k in FEATURE_LAGS]
+MA_COLS = [f"Sales_MA{w}" for w in FEATURE_WINDOWS]
+CALENDAR_COLS = ['Year', 'Month', 'Week', 'Weeks_to_Christmas', 'Weeks_to_Thanksgiving']
+# Allowed distance between a stored week and the week k weeks before the request (one missing week)
+LAG_TOLERANCE_DAYS = 7
+
+
+def unserved_features(data):
+    """
+    Lag / moving-average features still missing from a (filled) request.
+    """
+    return [col for col in LAG_COLS + MA_COLS if col not in data]
+
+
+def day_number(date):
+    """
+    Days since 1970-01-01 of a date string / datetime (the unit used in the store's arrays).
+    """
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+
+@lru_cache(maxsize=4096)
+def calendar_lookup(date):
+    """
+    Calendar features of one date (computed once per distinct date, like calendar_features.py).
+    """
+    row = calendar_table([np.datetime64(date, 'D')]).iloc[0]
+    return {col: int(row[col]) for col in CALENDAR_COLS}
+
+
+class FeatureSnapshot:
+    """
+    Immutable, array-backed copy of the per-series state.
+    """
+
+    def __init__(self, state):
+        state = state.sort_values(['Store', 'Dept', 'Date'])
+        keys = np.column_stack([state['Store'].to_numpy(np.int64), state['Dept'].to_numpy(np.int64)])
+        unique_keys, series_id = np.unique(keys, axis=0, return_inverse=True)
+        series_id = series_id.ravel()
+
+        counts = np.bincount(series_id, minlength=len(unique_keys))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        # Right-aligned: the latest week of every series is in the last column
+        column = np.arange(len(state)) - starts[series_id] + (HISTORY - counts[series_id])
+
+        self.days = np.full((len(unique_keys), HISTORY), np.iinfo(np.int64).min)
+        self.sales = np.full((len(unique_keys), HISTORY), np.nan)
+        self.days[series_id, column] = state['Date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        self.sales[series_id, column] = state['Weekly_Sales'].to_numpy(dtype=np.float64)
+
+        self.series_index = {(int(store), int(dept)): i for i, (store, dept) in enumerate(unique_keys)}
+        self.latest_date = state['Date'].max() if len(state) else None
+
+    def lookup(self, store, dept, date):
+        """
+        Lag / moving-average features of one series for the week of `date` (only the available ones).
+        """
+        i = self.series_index.get((int(store), int(dept)))
+        if i is None:
+            return {}
+        sales, days = self.sales[i], self.days[i]
+        request_day = day_number(date)
+        # Number of stored weeks strictly before the requested date
+        before = int(np.searchsorted(days, request_day))
+
+        def weeks_back(k):
+            # Sales of the stored week k positions back, if it really is ~k weeks before the request
+            if before - k < 0 or np.isnan(sales[before - k]):
+                return None
+            if abs(request_day - int(days[before - k]) - 7 * k) > LAG_TOLERANCE_DAYS:
+                return None
+            return float(sales[before - k])
+
+        features = {}
+        for k, col in zip(FEATURE_LAGS, LAG_COLS):
+            value = weeks_back(k)
+            if value is not None:
+                features[col] = value
+        for w, col in zip(FEATURE_WINDOWS, MA_COLS):
+            window = [weeks_back(k) for k in range(w, 0, -1)]
+            if None not in window:
+                features[col] = float(np.mean(window))
+        return features
+
+    def fill_frame(self, df):
+        """
+        Vectorized lookup for a batch (Store, Dept, Date columns). Only fills missing / NaN feature values;
+        lags that can't be served stay NaN. Rows with a missing or invalid Store, Dept or Date are treated
+        as unknown series (and get no calendar features), so one bad row never fails the batch.
+        """
+        stores = pd.to_numeric(df['Store'], errors='coerce').to_numpy(dtype=float)
+        depts = pd.to_numeric(df['Dept'], errors='coerce').to_numpy(dtype=float)
+        dates = pd.to_datetime(df['Date'], errors='coerce')
+        has_keys = ~np.isnan(stores) & ~np.isnan(depts) & dates.notna().to_numpy()
+
+        series = np.full(len(df), -1, dtype=int)
+        series[has_keys] = [self.series_index.get((int(store), int(dept)), -1)
+                            for store, dept in zip(stores[has_keys], depts[has_keys])]
+        known = series >= 0
+        request_days = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+        before = np.zeros(len(df), dtype=int)
+        before[known] = (self.days[series[known]] < request_days[known, None]).sum(axis=1)
+        rows = np.where(known, series, 0)
+
+        def weeks_back(k):
+            # NaN unless the stored week k positions back is ~k weeks before the request (same rule as lookup)
+            values = np.full(len(df), np.nan)
+            valid = known & (before - k >= 0)
+            gap = request_days[valid] - self.days[rows[valid], (before - k)[valid]]
+            valid[valid] = np.abs(gap - 7 * k) <= LAG_TOLERANCE_DAYS
+            values[valid] = self.sales[rows[valid], (before - k)[valid]]
+            return values
+
+        served = {col: weeks_back(k) for k, col in zip(FEATURE_LAGS, LAG_COLS)}
+        for w, col in zip(FEATURE_WINDOWS, MA_COLS):
+            served[col] = np.column_stack([weeks_back(k) for k in range(w, 0, -1)]).mean(axis=1)
+
+        # Missing dates (NaT) are left out of the calendar and map to NaN
+        calendar = calendar_table(dates.dropna().unique())
+        for col in CALENDAR_COLS:
+            served[col] = dates.map(calendar[col].astype(float)).to_numpy()
+
+        for col, values in served.items():
+            values = pd.Series(values, index=df.index)
+            df[col] = df[col].fillna(values) if col in df.columns else values
+        return df
+
+
+class FeatureStore:
+    """
+    Holds the current snapshot and swaps in a new one when the state table changes on disk.
+    """
+
+    def __init__(self, table='feature_state'):
+        self.table = table
+        self.snapshot = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def signature(self):
+        paths = [table_path(self.table)] + sorted(parts_dir(self.table).glob('*'))
+        return tuple((str(p), p.stat().st_size, p.stat().st_mtime_ns) for p in paths if p.exists())
+
+    def refresh(self):
+        """
+        Rebuilds the snapshot if the state table changed. Returns True when a new snapshot was swapped in.
+        A table that can't be read (missing, or being rewritten) keeps the previous snapshot.
+        """
+        with self._lock:
+            signature = self.signature()
+            if signature == self._signature:
+                return False
+            try:
+                snapshot = FeatureSnapshot(load_table(self.table, columns=['Store', 'Dept', 'Date', 'Weekly_Sales']))
+            except Exception as e:
+                print(f"Feature store not refreshed: {e}")
+                return False
+            self.snapshot, self._signature = snapshot, signature
+            return True
+
+    def fill(self, data):
+        """
+        Adds the features a request omitted (lags, moving average, calendar) when it carries Store, Dept and Date.
+        Values sent by the client always win. Returns the completed feature dict.
+        """
+        snapshot = self.snapshot
+        if snapshot is None or 'Date' not in data or 'Store' not in data or 'Dept' not in data:
+            return data
+        served = {**calendar_lookup(str(data['Date'])[:10]),
+                  **snapshot.lookup(data['Store'], data['Dept'], str(data['Date'])[:10])}
+        return {**served, **data}
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            'series': len(snapshot.series_index) if snapshot else 0,
+            'latest_date': str(snapshot.latest_date.date()) if snapshot and snapshot.latest_date is not None else None,
+            'bytes': int(snapshot.days.nbytes + snapshot.sales.nbytes) if snapshot else 0
+        }
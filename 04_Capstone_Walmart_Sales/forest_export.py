@@ -0,0 +1,328 @@
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+"""
+Flattened Random Forest
+-----------------------
+Exports the trained RandomForestRegressor into a handful of contiguous NumPy arrays and
+predicts with a vectorized traversal, instead of sklearn's per-tree Python-level dispatch.
+
+Export layout (one .npy file per array, plus meta.json):
+- feature   (int32)  : feature index tested at each node (0 at leaves)
+- threshold (float64): split threshold of each node (+inf at leaves)
+- children  (int32)  : global indices of the [left, right] children (leaves point to themselves)
+- value     (float64): prediction stored at each node (only read at leaves)
+- roots     (int32)  : global index of the root node of each tree
+
+Because leaves point to themselves, every tree can be traversed in lock-step for a whole batch:
+each iteration moves all (tree, row) pairs one level down with a few array-wide gathers.
+Pairs that reached a leaf are dropped from the active set, so the loop ends with the deepest path.
+Input rows must be NaN-free (like the training data).
+
+Compressed exports (see compress_forest.py) can also cap the depth, prune small nodes or drop trees
+(flatten_forest) and store the arrays in smaller dtypes (compact_storage); FlatForest reads either layout.
+
+Predictions are bit-for-bit identical to model.predict (run with n_jobs=1):
+rows are compared as float32 (like sklearn does), and tree outputs are summed in tree order.
+
+Usage:
+    python forest_export.py   # export random_forest_model.pkl and verify it on final_train_data
+"""
+
+ARRAY_NAMES = ['feature', 'threshold', 'children', 'value', 'roots']
+
+# Rows traversed at once (bounds the (n_trees x rows) node-index matrix)
+BLOCK_ROWS = 8192
+
+
+def node_depths(children_left, children_right):
+    """
+    Depth of every node of one sklearn tree (root = 0; -1 for nodes not reachable from the root),
+    one array operation per level.
+    """
+    depth = np.full(len(children_left), -1, dtype=np.int64)
+    frontier, level = np.array([0]), 0
+    while frontier.size:
+        depth[frontier] = level
+        children = np.concatenate([children_left[frontier], children_right[frontier]])
+        frontier, level = children[children >= 0], level + 1
+    return depth
+
+
+def flatten_forest(model, n_trees=None, max_depth=None, min_samples_split=None):
+    """
+    Concatenates every tree of a fitted forest into flat node arrays with global child indices.
+
+    Optional structural compression (no retraining: sklearn stores the mean target of every
+    node, so any internal node can become a leaf predicting that mean):
+        n_trees (int): Keep only the first n trees.
+        max_depth (int): Depth cap; nodes at this depth become leaves.
+        min_samples_split (int): Pruning; nodes holding fewer (bootstrap) samples become leaves.
+    """
+    arrays = {name: [] for name in ARRAY_NAMES}
+    offset, forest_depth = 0, 0
+
+    for estimator in model.estimators_[:n_trees]:
+        tree = estimator.tree_
+        left, right = tree.children_left.copy(), tree.children_right.copy()
+        depth = node_depths(left, right)
+
+        cut = np.zeros(tree.node_count, dtype=bool)
+        if max_depth is not None:
+            cut |= depth >= max_depth
+        if min_samples_split is not None:
+            cut |= tree.weighted_n_node_samples < min_samples_split
+        left[cut], right[cut] = -1, -1
+
+        # Drop the nodes below the new leaves (kept nodes stay in sklearn's depth-first order)
+        reachable = node_depths(left, right) >= 0
+        new_id = np.cumsum(reachable) - 1
+        node_ids = np.arange(reachable.sum())
+
+        is_leaf = left[reachable] == -1
+        arrays['feature'].append(np.where(is_leaf, 0, tree.feature[reachable]))
+        arrays['threshold'].append(np.where(is_leaf, np.inf, tree.threshold[reachable]))
+        arrays['children'].append(np.column_stack([np.where(is_leaf, node_ids, new_id[left[reachable]]),
+                                                   np.where(is_leaf, node_ids, new_id[right[reachable]])]) + offset)
+        arrays['value'].append(tree.value[reachable, 0, 0])
+        arrays['roots'].append([offset])
+        offset += len(node_ids)
+        forest_depth = max(forest_depth, int(depth[reachable].max()))
+
+    dtypes = {'feature': np.int32, 'threshold': np.float64, 'children': np.int32,
+              'value': np.float64, 'roots': np.int32}
+    arrays = {name: np.ascontiguousarray(np.concatenate(parts), dtype=dtypes[name])
+              for name, parts in arrays.items()}
+    return arrays, {'n_trees': len(arrays['roots']), 'max_depth': forest_depth}
+
+
+def compact_storage(arrays, value_bits=None):
+    """
+    Smaller dtypes for the node arrays.
+
+    Lossless:
+    - feature: uint8 when there are fewer than 256 features
+    - threshold: float32, rounded *down*. Rows are float32, and for a float32 x,
+      x > t  <=>  x > (largest float32 <= t), so every split decision is unchanged.
+    Lossy (optional):
+    - value_bits=32: leaf values stored as float32
+    - value_bits=16 / 8: leaf values linearly quantized to uint16 / uint8 codes
+      (value = offset + code * scale), error <= scale / 2 per tree
+
+    Returns (arrays, meta entries needed to decode them).
+    """
+    arrays = dict(arrays)
+    if arrays['feature'].max() < 256:
+        arrays['feature'] = arrays['feature'].astype(np.uint8)
+
+    threshold = arrays['threshold'].astype(np.float32)
+    rounded_up = threshold.astype(np.float64) > arrays['threshold']
+    threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+    arrays['threshold'] = threshold
+
+    meta = {}
+    value = arrays['value']
+    if value_bits == 32:
+        arrays['value'] = value.astype(np.float32)
+    elif value_bits in (8, 16):
+        offset = float(value.min())
+        scale = float(value.max() - offset) / (2 ** value_bits - 1) or 1.0
+        codes = np.rint((value - offset) / scale)
+        arrays['value'] = codes.astype(np.uint16 if value_bits == 16 else np.uint8)
+        meta['value_quantization'] = {'offset': offset, 'scale': scale}
+    elif value_bits is not None:
+        raise ValueError(f"value_bits must be None, 32, 16 or 8 (got {value_bits})")
+    return arrays, meta
+
+
+def write_export(arrays, meta, out_dir):
+    """
+    Writes flat node arrays (one .npy file each) and meta.json to out_dir.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Every file is written next to its target and renamed over it: processes that memory-mapped
+    # the previous export keep reading the old (unlinked) file instead of a truncated one
+    for name, array in arrays.items():
+        tmp_path = out_dir / f"{name}.npy.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, out_dir / f"{name}.npy")
+
+    # meta.json goes last: a complete export is in place once it changes
+    tmp_path = out_dir / 'meta.json.tmp'
+    tmp_path.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp_path, out_dir / 'meta.json')
+    return out_dir
+
+
+def export_forest(model, out_dir, source_path=None, n_trees=None, max_depth=None, min_samples_split=None,
+                  compact=False, value_bits=None):
+    """
+    Writes the flattened forest to out_dir (one .npy file per array + meta.json).
+
+    Args:
+        model (RandomForestRegressor): Fitted forest.
+        out_dir (Path): Export folder.
+        source_path (Path): Model file the export was made from (its size/mtime are recorded,
+                            so loaders can detect a stale export).
+        n_trees, max_depth, min_samples_split: Structural compression (see flatten_forest).
+        compact (bool), value_bits (int): Storage compression (see compact_storage).
+    """
+    arrays, meta = flatten_forest(model, n_trees, max_depth, min_samples_split)
+    if compact or value_bits is not None:
+        arrays, storage_meta = compact_storage(arrays, value_bits)
+        meta.update(storage_meta)
+
+    meta = {'feature_names': [str(name) for name in model.feature_names_in_], **meta, 'source': None}
+    if source_path is not None:
+        stat = Path(source_path).stat()
+        meta['source'] = {'path': str(source_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    return write_export(arrays, meta, out_dir)
+
+
+def export_is_current(out_dir, source_path):
+    """
+    True if out_dir holds an export of exactly this model file (same size and modification time).
+    """
+    meta_path = Path(out_dir) / 'meta.json'
+    if not meta_path.exists() or not Path(source_path).exists():
+        return False
+    source = json.loads(meta_path.read_text()).get('source') or {}
+    stat = Path(source_path).stat()
+    return source.get('size') == stat.st_size and source.get('mtime_ns') == stat.st_mtime_ns
+
+
+class FlatForest:
+    """
+    Array-backed forest predictor. Exposes feature_names_in_ and predict() like the sklearn model,
+    so it can be used as a drop-in replacement for inference.
+    """
+
+    def __init__(self, arrays, meta):
+        # Plain ndarray views (memory-mapped arrays stay mapped, without np.memmap's per-operation overhead)
+        for name in ARRAY_NAMES:
+            setattr(self, name, np.asarray(arrays[name]))
+        self.feature_names_in_ = np.array(meta['feature_names'], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.n_trees = meta['n_trees']
+        self.max_depth = meta['max_depth']
+        self.n_nodes = len(self.value)
+        # Quantized leaf values (compact_storage): value = offset + code * scale
+        quantization = meta.get('value_quantization')
+        self.value_offset, self.value_scale = (quantization['offset'], quantization['scale']) if quantization else (0.0, 1.0)
+
+    @classmethod
+    def load(cls, out_dir, mmap_mode=None):
+        """
+        Loads an export. With mmap_mode='r' the arrays are memory-mapped read-only instead of copied.
+        """
+        out_dir = Path(out_dir)
+        arrays = {name: np.load(out_dir / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        meta = json.loads((out_dir / 'meta.json').read_text())
+        return cls(arrays, meta)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def _predict_block(self, X):
+        n_rows, n_features = X.shape
+        X = X.ravel()
+        children = self.children.ravel()
+
+        # One entry per (tree, row) pair, tree-major
+        nodes = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.int32) * n_features, self.n_trees)
+        leaves, active = nodes, None
+
+        while True:
+            # Lock-step: every active pair moves one level down (children[node, x > threshold])
+            go_right = X.take(row_offsets + self.feature.take(nodes)) > self.threshold.take(nodes)
+            next_nodes = children.take(2 * nodes + go_right)
+            at_leaf = next_nodes == nodes
+            nodes = next_nodes
+
+            n_done = np.count_nonzero(at_leaf)
+            if n_done == len(nodes):
+                break
+            # Compacting costs a few copies, so only do it once enough pairs have finished
+            if 2 * n_done >= len(nodes):
+                if active is None:
+                    leaves, active = nodes, np.flatnonzero(~at_leaf)
+                else:
+                    leaves[active] = nodes
+                    active = active[~at_leaf]
+                nodes, row_offsets = nodes[~at_leaf], row_offsets[~at_leaf]
+
+        if active is None:
+            leaves = nodes
+        else:
+            leaves[active] = nodes
+
+        # Same accumulation order as sklearn: tree outputs summed one by one (cumsum is sequential), then divided
+        leaf_values = self.value.take(leaves).reshape(self.n_trees, n_rows)
+        mean = np.cumsum(leaf_values, axis=0, dtype=np.float64)[-1] / self.n_trees
+        if self.value.dtype.kind == 'u':
+            return self.value_offset + mean * self.value_scale
+        return mean
+
+    def predict(self, X):
+        """
+        Predicts a 2D batch (NumPy array or DataFrame with columns in feature_names_in_ order).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[0] <= BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.concatenate([self._predict_block(X[start:start + BLOCK_ROWS])
+                               for start in range(0, X.shape[0], BLOCK_ROWS)])
+
+
+if __name__ == '__main__':
+    import time
+    import joblib
+    from pipeline_io import load_table
+
+    current_dir = Path(__file__).parent
+    model_path = current_dir / "random_forest_model.pkl"
+    export_dir = current_dir / "forest_arrays"
+
+    # --- Export ---
+    model = joblib.load(model_path)
+    export_forest(model, export_dir, source_path=model_path)
+    flat = FlatForest.load(export_dir)
+    print(f"Exported {flat.n_trees} trees ({flat.n_nodes:,} nodes, max depth {flat.max_depth}) to: {export_dir}")
+
+    # --- Verification on the training data (bit-for-bit) ---
+    df = load_table('final_train_data', exclude=['Type'])
+    df['IsHoliday'] = df['IsHoliday'].astype(int)
+    X = df[model.feature_names_in_]
+
+    # Sequential accumulation makes sklearn's summation order deterministic
+    model.n_jobs = 1
+    start = time.perf_counter()
+    expected = model.predict(X)
+    sklearn_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = flat.predict(X)
+    flat_time = time.perf_counter() - start
+
+    print(f"Bit-for-bit identical on {len(X):,} rows: {np.array_equal(expected, actual)}")
+    print(f"Batch time  - sklearn: {sklearn_time:.3f}s | flat: {flat_time:.3f}s")
+
+    # --- Single-row latency ---
+    row = X.iloc[[0]].to_numpy(dtype=np.float32)
+    latencies = {}
+    for name, func in {'sklearn': lambda: model.predict(X.iloc[[0]]), 'flat': lambda: flat.predict(row)}.items():
+        start = time.perf_counter()
+        for _ in range(200):
+            func()
+        latencies[name] = (time.perf_counter() - start) / 200 * 1e6
+    print(f"Single row  - sklearn: {latencies['sklearn']:,.0f}us | flat: {latencies['flat']:,.0f}us")
+
+    # --- Size ---
+    print(f"Model size  - pickle: {model_path.stat().st_size / 1e6:,.1f} MB | flat arrays: {flat.nbytes / 1e6:,.1f} MB")
@@ -0,0 +1,237 @@
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from memory_report import peak_rss_mb
+from pipeline_io import DATA_DIR
+
+"""
+Synthetic Walmart Data Generator
+--------------------------------
+Writes train.csv, features.csv and stores.csv with the exact schema read by 01_data_loading_and_merging.py
+(see schema.py), at any size: --stores x --depts x --weeks train rows (the Kaggle extract is
+45 x 81 x 143, ~420k rows). Used to benchmark the pipeline offline.
+
+Realism:
+- Weekly_Sales: per-department level and store-size factor, yearly seasonality, a Thanksgiving-to-Christmas
+  ramp (strongest in holiday-sensitive departments), holiday-week uplift, slow trend and multiplicative noise.
+  A few rows are returns (negative sales) and ~3% of Store/Dept/week rows are missing, like the real data.
+- IsHoliday: the weeks of Super Bowl, Labor Day, Thanksgiving and Christmas, derived for any year
+  (matches calendar_features.SPECIAL_DATES), identical in train and features.
+- features.csv: seasonal temperature per store climate, a shared fuel-price random walk, slowly rising CPI,
+  drifting unemployment. MarkDowns are missing before November 2011 and sparse afterwards; CPI / Unemployment
+  are missing for the last 13 weeks. The table extends --future-weeks beyond the train weeks (as Kaggle's).
+- stores.csv: Type A / B / C by store size.
+
+Determinism: every block of DEPT_BLOCK departments of a store draws from its own seeded generator,
+so the output depends only on --seed and the sizes, never on the chunk size.
+
+Memory: rows are generated and appended to the CSVs chunk by chunk; a chunk holds about
+--memory-budget-mb worth of rows, so generating 100M+ rows needs no more memory than 1M.
+
+Usage:
+    python generate_synthetic_data.py --out synthetic/ --stores 450 --depts 81 --weeks 143   # 10x Kaggle
+    WALMART_DATA_DIR=synthetic/ python run_pipeline.py
+"""
+
+# Departments drawn from one generator (the unit of determinism)
+DEPT_BLOCK = 16
+
+# Bytes held per generated train row while a chunk is built and formatted to CSV (measured, rounded up)
+BYTES_PER_ROW = 600
+
+# First markdown week of the Kaggle data, relative to its first week (2010-02-05 -> 2011-11-11)
+MARKDOWN_START_WEEK = 92
+MARKDOWN_PRESENCE = [0.50, 0.35, 0.45, 0.45, 0.50]
+
+parser = argparse.ArgumentParser(description='Generate train/features/stores CSVs with the Walmart schema.')
+parser.add_argument('--out', default=str(DATA_DIR), help='Output folder.')
+parser.add_argument('--stores', type=int, default=45, help='Number of stores.')
+parser.add_argument('--depts', type=int, default=81, help='Departments per store.')
+parser.add_argument('--weeks', type=int, default=143, help='Weeks of sales history.')
+parser.add_argument('--future-weeks', type=int, default=39, help='Extra weeks covered by features.csv only.')
+parser.add_argument('--start', default='2010-02-05', help='First week-ending date (a Friday, like the Kaggle data).')
+parser.add_argument('--seed', type=int, default=42, help='Random seed.')
+parser.add_argument('--memory-budget-mb', type=float, default=256, help='Approximate memory per chunk.')
+parser.add_argument('--overwrite', action='store_true', help='Replace existing CSVs in --out.')
+
+
+def holiday_weeks(dates):
+    """
+    Boolean mask of the week-ending dates whose week contains Super Bowl (first Sunday of February),
+    Labor Day (first Monday of September), Thanksgiving (fourth Thursday of November) or Christmas.
+    """
+    days = []
+    for year in range(dates[0].year, dates[-1].year + 1):
+        feb, sep, nov = pd.Timestamp(year, 2, 1), pd.Timestamp(year, 9, 1), pd.Timestamp(year, 11, 1)
+        days += [feb + pd.Timedelta(days=(6 - feb.weekday()) % 7),
+                 sep + pd.Timedelta(days=(0 - sep.weekday()) % 7),
+                 nov + pd.Timedelta(days=(3 - nov.weekday()) % 7 + 21),
+                 pd.Timestamp(year, 12, 25)]
+    # Each holiday falls in the week ending on the first week-ending date on or after it
+    positions = np.searchsorted(dates.to_numpy(), pd.DatetimeIndex(days).to_numpy())
+    mask = np.zeros(len(dates), dtype=bool)
+    mask[positions[positions < len(dates)]] = True
+    return mask
+
+
+def make_stores(n_stores, seed):
+    rng = np.random.default_rng([seed, 0])
+    size = rng.integers(34_000, 220_000, n_stores)
+    store_type = np.where(size > 150_000, 'A', np.where(size > 80_000, 'B', 'C'))
+    return pd.DataFrame({'Store': np.arange(1, n_stores + 1), 'Type': store_type, 'Size': size})
+
+
+def make_dept_profiles(n_depts, seed):
+    """
+    Per-department sales level, seasonality amplitude / phase and holiday sensitivity.
+    """
+    rng = np.random.default_rng([seed, 1])
+    return {
+        'level': rng.lognormal(mean=8.8, sigma=1.1, size=n_depts),
+        'season_amp': rng.uniform(0.02, 0.25, n_depts),
+        'season_phase': rng.uniform(0, 2 * np.pi, n_depts),
+        'holiday_boost': rng.gamma(1.2, 0.25, n_depts)
+    }
+
+
+def sales_block(store, size, depts, dates, week_of_year, is_holiday, profiles, seed):
+    """
+    Train rows of one store and a block of departments, in (Dept, Date) order.
+    """
+    rng = np.random.default_rng([seed, 2, store, depts[0]])
+    n_weeks = len(dates)
+    dept_ix = depts - 1
+
+    # Christmas ramp: builds up from Thanksgiving (ISO week 47) to week 51, Christmas week itself is smaller
+    ramp = np.select([week_of_year == 47, (week_of_year >= 48) & (week_of_year <= 51), week_of_year == 52],
+                     [0.35, 0.25 + 0.2 * (week_of_year - 47), 0.3], 0.0)
+    years = np.arange(n_weeks) / 52.0
+
+    store_factor = (size / 150_000) ** 0.8 * rng.lognormal(0, 0.2)
+    season = 1 + profiles['season_amp'][dept_ix, None] * np.sin(
+        2 * np.pi * week_of_year[None, :] / 52 + profiles['season_phase'][dept_ix, None])
+    holiday = 1 + profiles['holiday_boost'][dept_ix, None] * ramp[None, :] + 0.06 * is_holiday[None, :]
+    trend = 1 + rng.normal(0.02, 0.03, (len(depts), 1)) * years[None, :]
+    noise = rng.lognormal(0, 0.15, (len(depts), n_weeks))
+
+    sales = profiles['level'][dept_ix, None] * store_factor * season * holiday * trend * noise
+    # Returns: a few rows with small negative sales (dropped by 02_data_cleaning.py)
+    returns = rng.random(sales.shape) < 0.003
+    sales[returns] = -rng.uniform(0, 50, returns.sum())
+    present = rng.random(sales.shape) >= 0.03
+
+    dept_grid = np.repeat(depts, n_weeks).reshape(len(depts), n_weeks)
+    week_grid = np.broadcast_to(np.arange(n_weeks), sales.shape)
+    return pd.DataFrame({
+        'Store': store,
+        'Dept': dept_grid[present],
+        'Date': dates.strftime('%Y-%m-%d').to_numpy()[week_grid[present]],
+        'Weekly_Sales': np.round(sales[present], 2),
+        'IsHoliday': is_holiday[week_grid[present]]
+    })
+
+
+def features_block(store, dates, is_holiday, n_history, fuel_walk, seed):
+    """
+    features.csv rows of one store (one per week, history + future weeks).
+    """
+    rng = np.random.default_rng([seed, 3, store])
+    n = len(dates)
+    week_of_year = dates.isocalendar().week.to_numpy(dtype=float)
+    years = np.arange(n) / 52.0
+
+    climate = rng.uniform(35, 75)
+    temperature = climate - 22 * np.cos(2 * np.pi * (week_of_year - 3) / 52) + rng.normal(0, 6, n)
+    cpi = rng.uniform(126, 228) * (1 + 0.018 * years) + rng.normal(0, 0.15, n)
+    unemployment = np.clip(rng.uniform(4, 12) + np.cumsum(rng.normal(-0.01, 0.05, n)), 3.0, 15.0)
+
+    frame = {
+        'Store': store,
+        'Date': dates.strftime('%Y-%m-%d'),
+        'Temperature': np.round(temperature, 2),
+        'Fuel_Price': np.round(fuel_walk + rng.normal(0, 0.05), 3)
+    }
+    # Markdowns: none before MARKDOWN_START_WEEK, then present in a share of the weeks (larger in holiday weeks)
+    for i, presence in enumerate(MARKDOWN_PRESENCE, start=1):
+        values = rng.lognormal(8.0 + 0.3 * (i % 3), 1.0, n) * (1 + 2 * is_holiday)
+        values[(np.arange(n) < MARKDOWN_START_WEEK) | (rng.random(n) >= presence)] = np.nan
+        frame[f'MarkDown{i}'] = np.round(values, 2)
+    # CPI / Unemployment are published with a lag: unknown for the last 13 weeks
+    unknown = np.arange(n) >= max(n_history, n - 13)
+    frame['CPI'] = np.where(unknown, np.nan, cpi)
+    frame['Unemployment'] = np.where(unknown, np.nan, np.round(unemployment, 3))
+    frame['IsHoliday'] = is_holiday
+    return pd.DataFrame(frame)
+
+
+class CsvAppender:
+    """
+    Appends DataFrame chunks to a CSV file (header written once).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', newline='')
+        self.rows = 0
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        self.file.close()
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {name: out_dir / f"{name}.csv" for name in ['train', 'features', 'stores']}
+    existing = [str(path) for path in paths.values() if path.exists()]
+    if existing and not args.overwrite:
+        raise SystemExit(f"Refusing to overwrite {existing} (use --overwrite).")
+
+    start_time = time.perf_counter()
+    all_dates = pd.date_range(args.start, periods=args.weeks + args.future_weeks, freq='7D')
+    all_holidays = holiday_weeks(all_dates)
+    dates, is_holiday = all_dates[:args.weeks], all_holidays[:args.weeks]
+    week_of_year = dates.isocalendar().week.to_numpy(dtype=int)
+
+    stores = make_stores(args.stores, args.seed)
+    stores.to_csv(paths['stores'], index=False)
+    profiles = make_dept_profiles(args.depts, args.seed)
+    fuel_walk = 2.7 + np.cumsum(np.random.default_rng([args.seed, 4]).normal(0.004, 0.04, len(all_dates)))
+
+    chunk_rows = max(args.weeks * DEPT_BLOCK, int(args.memory_budget_mb * 1e6 / BYTES_PER_ROW))
+    expected_rows = args.stores * args.depts * args.weeks * 0.97
+    print(f"Generating ~{expected_rows:,.0f} train rows ({args.stores} stores x {args.depts} depts x {args.weeks} weeks), "
+          f"chunks of ~{chunk_rows:,} rows")
+
+    train_writer, features_writer = CsvAppender(paths['train']), CsvAppender(paths['features'])
+    try:
+        pending, pending_rows, n_chunks = [], 0, 0
+        for store, size in zip(stores['Store'], stores['Size']):
+            features_writer.write(features_block(store, all_dates, all_holidays, args.weeks, fuel_walk, args.seed))
+            for first_dept in range(1, args.depts + 1, DEPT_BLOCK):
+                depts = np.arange(first_dept, min(first_dept + DEPT_BLOCK, args.depts + 1))
+                block = sales_block(store, size, depts, dates, week_of_year, is_holiday, profiles, args.seed)
+                pending.append(block)
+                pending_rows += len(block)
+                if pending_rows >= chunk_rows:
+                    train_writer.write(pd.concat(pending, ignore_index=True))
+                    pending, pending_rows, n_chunks = [], 0, n_chunks + 1
+                    print(f"Chunk {n_chunks}: {train_writer.rows:,} rows written")
+        if pending:
+            train_writer.write(pd.concat(pending, ignore_index=True))
+    finally:
+        train_writer.close()
+        features_writer.close()
+
+    print(f"\ntrain.csv   : {train_writer.rows:,} rows")
+    print(f"features.csv: {features_writer.rows:,} rows")
+    print(f"stores.csv  : {len(stores):,} rows")
+    if peak_rss_mb() is not None:
+        print(f"Peak RSS: {peak_rss_mb():,.1f} MB")
+    print(f"\nSUCCESS: Synthetic data written to {out_dir} ({time.perf_counter() - start_time:.2f}s)")
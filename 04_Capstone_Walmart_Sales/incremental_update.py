@@ -0,0 +1,110 @@
+import argparse
+import time
+import pandas as pd
+from chunk_processing import HISTORY, STATE_COLS, ChunkProcessor, extend_features
+from lag_engine import series_tail
+from pipeline_io import DATA_DIR, append_table, load_table, save_table
+from schema import load_raw_table
+
+"""
+Incremental Weekly Update
+-------------------------
+Each week only one new week of sales arrives, but 04_feature_engineering.py recomputes every
+lag and moving average over the whole history. This script updates the training data in O(new rows):
+1. Load the per-series state (last 52 weeks of every Store/Dept) saved by 04 / the previous update
+2. Merge + clean the new week's rows (same logic as stages 01 and 02)
+3. Compute lag / MA4 features for the new rows from the state only
+4. Append the new rows to walmart_cleaned_data and final_train_data, and save the updated state
+
+Usage:
+    python incremental_update.py --new-rows new_week.csv [--append-raw]
+    python incremental_update.py --verify     # equivalence test + timing against a full recompute
+
+The new rows file uses the train.csv layout (Store, Dept, Date, Weekly_Sales, IsHoliday).
+"""
+
+parser = argparse.ArgumentParser(description='Append one new week to the training data incrementally.')
+parser.add_argument('--new-rows', help='CSV with the new week of sales (train.csv layout).')
+parser.add_argument('--append-raw', action='store_true', help='Also append the new rows to train.csv for future full rebuilds.')
+parser.add_argument('--verify', action='store_true', help='Check incremental == full recompute on the last weeks of the cleaned data.')
+parser.add_argument('--verify-weeks', type=int, default=1, help='Number of trailing weeks treated as "new" in --verify mode.')
+args = parser.parse_args()
+
+
+def verify_equivalence(verify_weeks):
+    """
+    Treats the last weeks of walmart_cleaned_data as new rows and checks that the incremental
+    features equal a full recompute, then times both for growing history lengths.
+    """
+    df = load_table('walmart_cleaned_data')
+    dates = df['Date'].drop_duplicates().sort_values()
+    first_new_date = dates.iloc[-verify_weeks]
+
+    history = df[df['Date'] < first_new_date]
+    new_rows = df[df['Date'] >= first_new_date].reset_index(drop=True)
+
+    # --- Equivalence Test ---
+    full_final, _ = extend_features(df, None)
+    expected = full_final[full_final['Date'] >= first_new_date].reset_index(drop=True)
+
+    state = series_tail(history[STATE_COLS], HISTORY)
+    incremental, _ = extend_features(new_rows, state)
+
+    pd.testing.assert_frame_equal(expected, incremental.reset_index(drop=True))
+    print(f"EQUIVALENCE OK: {len(incremental):,} incremental rows match the full recompute exactly.")
+
+    # --- Timing: full recompute grows with history, the update does not ---
+    results = []
+    history_dates = dates[dates < first_new_date]
+    for fraction in [0.25, 0.5, 1.0]:
+        start_date = history_dates.iloc[-max(HISTORY, int(len(history_dates) * fraction))]
+        subset = df[df['Date'] >= start_date]
+
+        start = time.perf_counter()
+        extend_features(subset, None)
+        full_time = time.perf_counter() - start
+
+        subset_state = series_tail(subset.loc[subset['Date'] < first_new_date, STATE_COLS], HISTORY)
+        start = time.perf_counter()
+        extend_features(new_rows, subset_state)
+        incremental_time = time.perf_counter() - start
+
+        results.append({
+            'History Rows': len(subset) - len(new_rows),
+            'New Rows': len(new_rows),
+            'Full Recompute (s)': full_time,
+            'Incremental (s)': incremental_time
+        })
+
+    print("\nTIMING REPORT:")
+    print(pd.DataFrame(results).to_string(index=False, float_format=lambda x: f"{x:,.4f}"))
+
+
+if args.verify:
+    verify_equivalence(args.verify_weeks)
+
+elif args.new_rows:
+    start_time = time.perf_counter()
+
+    state = load_table('feature_state')
+    processor = ChunkProcessor()
+    new_raw = load_raw_table('train', path=args.new_rows)
+
+    cleaned, final, new_state = processor.process(new_raw, state)
+
+    # --- Append (O(new rows), nothing is rewritten) ---
+    append_table(cleaned, 'walmart_cleaned_data')
+    append_table(final, 'final_train_data')
+    save_table(new_state, 'feature_state')
+    if args.append_raw:
+        new_raw.to_csv(DATA_DIR / 'train.csv', mode='a', header=False, index=False)
+
+    print(f"Validation - All IsHoliday columns match: {processor.stats['holiday_mismatches'] == 0}")
+    print(f"Dropped {processor.stats['negative_rows']} rows with negative sales.")
+    print(f"Rows without full history (dropped, like dropna() in stage 04): {len(cleaned) - len(final)}")
+    print(f"\nSUCCESS: Appended {len(final):,} feature rows for "
+          f"{new_raw['Date'].min().date()} - {new_raw['Date'].max().date()} "
+          f"in {time.perf_counter() - start_time:.3f}s")
+
+else:
+    parser.error('Pass --new-rows <file> or --verify.')
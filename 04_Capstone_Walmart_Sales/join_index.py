@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+"""
+Indexed Raw-Table Join
+----------------------
+01_data_loading_and_merging.py used to run three hash merges over the train table (an inner merge only to
+compare the two IsHoliday flags, then train + stores and + features with validate='m:1') and then scan the
+result again for missing values and the tables for key uniqueness.
+
+Here the lookup tables are indexed once:
+- stores:   Store -> row (direct-address array, stores are few)
+- features: (Store, Date) -> row (sorted int64 keys, binary search)
+Building an index also validates it: a duplicated key raises pandas' MergeError, like validate='m:1'.
+
+Then a single pass over train (or a chunk of it) resolves every row's two positions, from which everything is derived:
+- the IsHoliday consistency check (on the rows that have a features match, like the inner merge did)
+- the enriched table (every lookup column gathered with one take(); same rows, order, columns and dtypes
+  as the two left merges)
+- missing-value counts per column (nulls of the train columns + unmatched rows + nulls picked up by the lookups)
+"""
+
+
+def store_date_keys(store, date):
+    """
+    One int64 key per (Store, Date) pair: Store in the high bits, days since 1970-01-01 in the low 32 bits.
+    """
+    days = np.asarray(date, dtype='datetime64[D]').astype(np.int64)
+    return (np.asarray(store, dtype=np.int64) << 32) | (days & 0xFFFFFFFF)
+
+
+class SortedKeyIndex:
+    """
+    Unique int64 keys of a lookup table -> row positions, via binary search.
+    """
+
+    def __init__(self, keys, name):
+        keys = np.asarray(keys, dtype=np.int64)
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+        if len(keys) > 1 and (self.sorted_keys[1:] == self.sorted_keys[:-1]).any():
+            raise pd.errors.MergeError(f"Merge keys are not unique in right dataset ({name}); not a many-to-one merge")
+        self.n_rows = len(keys)
+
+    def lookup(self, keys):
+        """
+        Row position of every key (-1 where the key is not in the index).
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.n_rows == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        slots = np.minimum(np.searchsorted(self.sorted_keys, keys), self.n_rows - 1)
+        found = self.sorted_keys[slots] == keys
+        return np.where(found, self.order[slots], -1)
+
+
+class DirectIndex:
+    """
+    Unique small non-negative integer keys -> row positions, through a direct-address array.
+    """
+
+    def __init__(self, keys, name):
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(np.unique(keys)) != len(keys):
+            raise pd.errors.MergeError(f"Merge keys are not unique in right dataset ({name}); not a many-to-one merge")
+        self.positions = np.full(int(keys.max()) + 2 if len(keys) else 1, -1, dtype=np.int64)
+        self.positions[keys] = np.arange(len(keys))
+
+    def lookup(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        in_range = (keys >= 0) & (keys < len(self.positions))
+        return np.where(in_range, self.positions[np.where(in_range, keys, 0)], -1)
+
+
+def small_keys_unique(keys):
+    """
+    Uniqueness of small non-negative integer keys by counting (one pass, no sort or hash table).
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    return len(keys) == 0 or int(np.bincount(keys).max()) <= 1
+
+
+def gather(table, positions, columns):
+    """
+    Lookup columns for every left row (NaN where positions == -1), upcast the same way a left merge does.
+    """
+    matched_all = (positions >= 0).all()
+    gathered = {}
+    for col in columns:
+        values = table[col].array
+        gathered[col] = values.take(positions) if matched_all else take(values, positions, allow_fill=True)
+    return gathered
+
+
+class RawTableJoin:
+    """
+    Indexes stores (on Store) and features (on Store, Date) once; join() then enriches any slice of train
+    (the whole table in 01, chunk after chunk in chunk_processing.py) with a single pass over it.
+    """
+
+    def __init__(self, features, stores):
+        # Duplicate keys fail here, like validate='m:1'
+        self.features = features
+        self.stores = stores
+        self.store_index = DirectIndex(stores['Store'], 'stores')
+        self.features_index = SortedKeyIndex(store_date_keys(features['Store'], features['Date']), 'features')
+        self.store_cols = [col for col in stores.columns if col != 'Store']
+        self.feature_cols = [col for col in features.columns if col not in ('Store', 'Date', 'IsHoliday')]
+
+    def join(self, train):
+        """
+        Returns:
+            merged (DataFrame): train columns, then stores' and features' columns (features' IsHoliday excluded),
+                                identical to pd.merge(..., how='left', validate='m:1') twice.
+            report (dict): holiday_mismatches / holiday_consistent (rows present in both train and features),
+                           matched_features, unmatched_stores, unmatched_features,
+                           missing_values (Series of null counts per merged column).
+        """
+        # --- Single pass over train: both lookups ---
+        store_positions = self.store_index.lookup(train['Store'])
+        feature_positions = self.features_index.lookup(store_date_keys(train['Store'], train['Date']))
+        matched = feature_positions >= 0
+
+        # Consistency check on the rows present in both tables (the former inner merge)
+        train_holiday = train['IsHoliday'].to_numpy()[matched]
+        features_holiday = self.features['IsHoliday'].to_numpy()[feature_positions[matched]]
+        holiday_mismatches = int((train_holiday != features_holiday).sum())
+
+        # --- Enrichment ---
+        merged = pd.DataFrame({
+            **{col: train[col].array for col in train.columns},
+            **gather(self.stores, store_positions, self.store_cols),
+            **gather(self.features, feature_positions, self.feature_cols)
+        }, index=pd.RangeIndex(len(train)))
+
+        # --- Missing values: derived from the lookups instead of rescanning the merged table ---
+        missing = {col: int(train[col].isna().sum()) for col in train.columns}
+        for table, positions, cols in [(self.stores, store_positions, self.store_cols),
+                                       (self.features, feature_positions, self.feature_cols)]:
+            hit = positions[positions >= 0]
+            for col in cols:
+                missing[col] = int((positions < 0).sum()) + int(table[col].isna().to_numpy()[hit].sum())
+
+        report = {
+            'holiday_mismatches': holiday_mismatches,
+            'holiday_consistent': holiday_mismatches == 0,
+            'matched_features': int(matched.sum()),
+            'unmatched_stores': int((store_positions < 0).sum()),
+            'unmatched_features': int((~matched).sum()),
+            'missing_values': pd.Series(missing, dtype='int64')
+        }
+        return merged, report
+
+
+def join_raw_tables(train, features, stores):
+    """
+    Enriches train with stores (on Store) and features (on Store, Date): RawTableJoin(...).join(train),
+    plus the key uniqueness flags printed by 01 (report['store_unique']).
+    """
+    merged, report = RawTableJoin(features, stores).join(train)
+    # Store is a key of stores (checked when indexing); it repeats over weeks in features and train
+    report['store_unique'] = {
+        'features': small_keys_unique(features['Store']),
+        'train': small_keys_unique(train['Store']),
+        'stores': True
+    }
+    return merged, report
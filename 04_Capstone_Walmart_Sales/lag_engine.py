@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+"""
+Lag & Rolling Feature Engine
+----------------------------
+Builds time-series features for many series (e.g. every Store/Dept pair) in one vectorized pass:
+1. Sort once by (series keys, date) with a stable sort
+2. Compute the group boundaries once (start of each series, position of each row inside it)
+3. Emit every lag and rolling statistic directly on the contiguous NumPy array
+
+This replaces one groupby().shift() per lag and a groupby().transform(lambda ...) per rolling
+window, which re-groups the data every time and calls a Python function once per series.
+
+Rolling statistics and EWMs are computed on the 1-week lag of the target (not the target
+itself) so a row never sees its own week's sales (no data leakage).
+"""
+
+# Each Store/Dept pair is one weekly time series
+SERIES_KEYS = ['Store', 'Dept']
+
+# Feature set used by the capstone model (04_feature_engineering.py)
+FEATURE_LAGS = [1, 4, 52]
+FEATURE_WINDOWS = [4]
+
+ROLLING_NAMES = {'mean': 'MA', 'std': 'STD', 'min': 'MIN', 'max': 'MAX'}
+
+# Rows reduced per block, so std/min/max over sliding windows never allocate more than block x window values
+BLOCK_ROWS = 1 << 20
+
+
+def sort_series(df, group_cols=SERIES_KEYS, order_col='Date'):
+    """
+    Stable sort by series keys, then time. Returns a new DataFrame with a fresh RangeIndex.
+    """
+    sort_keys = [df[order_col].to_numpy()] + [df[col].to_numpy() for col in reversed(group_cols)]
+    order = np.lexsort(sort_keys)
+    return df.iloc[order].reset_index(drop=True)
+
+
+def series_positions(df, group_cols=SERIES_KEYS):
+    """
+    For a DataFrame already sorted by series, returns (row position inside its series, series id).
+    """
+    n_rows = len(df)
+    is_start = np.zeros(n_rows, dtype=bool)
+    if n_rows:
+        is_start[0] = True
+    for col in group_cols:
+        values = df[col].to_numpy()
+        is_start[1:] |= values[1:] != values[:-1]
+
+    starts = np.flatnonzero(is_start)
+    series_id = np.cumsum(is_start) - 1
+    positions = np.arange(n_rows) - starts[series_id]
+    return positions, series_id
+
+
+def required_history(lags=FEATURE_LAGS, windows=FEATURE_WINDOWS):
+    """
+    Number of past weeks per series needed to compute the lags and rolling windows (on the 1-week lag) of a new week.
+    """
+    return max(list(lags) + list(windows))
+
+
+def series_tail(df, n, group_cols=SERIES_KEYS, order_col='Date', presorted=False):
+    """
+    Returns the last n rows of every series (the state needed to extend the series later).
+    """
+    if not presorted:
+        df = sort_series(df, group_cols, order_col)
+    positions, series_id = series_positions(df, group_cols)
+    lengths = np.bincount(series_id)
+    return df[positions >= lengths[series_id] - n].reset_index(drop=True)
+
+
+def shift_within(values, positions, k):
+    """
+    Lag k inside each series: NaN for the first k rows of every series.
+    """
+    shifted = np.full(len(values), np.nan)
+    if k < len(values):
+        shifted[k:] = values[:len(values) - k]
+    shifted[positions < k] = np.nan
+    return shifted
+
+
+def rolling_within(values, positions, window, stat):
+    """
+    Trailing rolling statistic of a fixed window inside each series.
+    Matches pandas rolling(window) defaults: a window containing NaN (or crossing a series start) gives NaN.
+    """
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+
+    windows = sliding_window_view(values, window)
+    reducers = {
+        'mean': lambda block: block.mean(axis=1),
+        'std': lambda block: block.std(axis=1, ddof=1),
+        'min': lambda block: block.min(axis=1),
+        'max': lambda block: block.max(axis=1)
+    }
+    reduce = reducers[stat]
+    for start in range(0, len(windows), BLOCK_ROWS):
+        block = windows[start:start + BLOCK_ROWS]
+        result[window - 1 + start:window - 1 + start + len(block)] = reduce(block)
+
+    result[positions < window - 1] = np.nan
+    return result
+
+
+def ewm_within(values, series_id, span):
+    """
+    Exponentially weighted mean inside each series (pandas ewm(span).mean() semantics).
+    Uses a single grouped Cython pass over the already-sorted data.
+    """
+    series = pd.Series(values)
+    ewm = series.groupby(series_id, sort=False).ewm(span=span).mean()
+    return ewm.reset_index(level=0, drop=True).sort_index().to_numpy()
+
+
+def add_lag_features(df, value_col='Weekly_Sales', group_cols=SERIES_KEYS, order_col='Date',
+                     lags=(1, 4, 52), windows=(4,), stats=('mean',), ewm_spans=(), prefix='Sales'):
+    """
+    Adds lag, rolling and EWM features for every series in one pass.
+
+    Args:
+        df (DataFrame): Input data (any row order).
+        value_col (str): Column to build features from.
+        group_cols (list): Series keys, e.g. ['Store'] or ['Store', 'Dept'].
+        order_col (str): Time column.
+        lags (list): Lags to emit as '<prefix>_Lag_<k>'.
+        windows (list): Rolling window sizes (computed on the 1-week lag).
+        stats (list): Rolling statistics: 'mean' ('<prefix>_MA<w>'), 'std', 'min', 'max'.
+        ewm_spans (list): EWM spans to emit as '<prefix>_EWM<span>' (computed on the 1-week lag).
+        prefix (str): Prefix for the new column names.
+
+    Returns:
+        DataFrame sorted by (group_cols, order_col) with the new columns appended.
+    """
+    df = sort_series(df, group_cols, order_col)
+    positions, series_id = series_positions(df, group_cols)
+    values = df[value_col].to_numpy(dtype='float64')
+
+    features = {}
+    for k in lags:
+        features[f"{prefix}_Lag_{k}"] = shift_within(values, positions, k)
+
+    lag_1 = features.get(f"{prefix}_Lag_1")
+    if lag_1 is None:
+        lag_1 = shift_within(values, positions, 1)
+
+    for window in windows:
+        for stat in stats:
+            features[f"{prefix}_{ROLLING_NAMES[stat]}{window}"] = rolling_within(lag_1, positions, window, stat)
+
+    for span in ewm_spans:
+        features[f"{prefix}_EWM{span}"] = ewm_within(lag_1, series_id, span)
+
+    return pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
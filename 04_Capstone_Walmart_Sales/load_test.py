@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import requests
+from test_api import sample_data
+
+"""
+API Load Test
+-------------
+test_api.py sends one request. This script puts the API under sustained load and measures it:
+
+1. Starts the server locally (app.py, or serve.py with --server serve), or targets --url
+2. Replays payloads drawn from final_train_data (--payloads data) or randomized copies of
+   test_api.py's sample (--payloads synthetic)
+3. Drives the load in one of two modes, with keep-alive sessions (connection reuse):
+   - closed loop (--concurrency N): N clients, each sends its next request when the previous answered
+   - open loop (--rps R): requests are scheduled at a fixed rate, whatever the response times.
+     Latency is measured from the *scheduled* send time, so a slow server is not hidden by the
+     load generator falling behind (coordinated omission).
+4. Reports throughput, error rate and p50 / p95 / p99 / max latency, and writes them (with the
+   git commit and settings) to a JSON file, so runs can be compared across commits (--compare).
+
+Usage:
+    python load_test.py --concurrency 8 --duration 20
+    python load_test.py --rps 200 --duration 30 --server serve --workers 4 --compare load_tests/previous.json
+"""
+
+parser = argparse.ArgumentParser(description='Load test the prediction API.')
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument('--concurrency', type=int, default=8, help='Closed loop: number of concurrent clients.')
+mode.add_argument('--rps', type=float, help='Open loop: target requests per second.')
+parser.add_argument('--duration', type=float, default=20, help='Seconds of load (after warm-up).')
+parser.add_argument('--warmup', type=float, default=2, help='Seconds of unrecorded load before measuring.')
+parser.add_argument('--endpoint', default='/predict', help='Endpoint to load.')
+parser.add_argument('--payloads', choices=['data', 'synthetic'], default='data', help='Payload source.')
+parser.add_argument('--n-payloads', type=int, default=5000, help='Number of distinct payloads to replay.')
+parser.add_argument('--url', help='Target an already running server (e.g. http://127.0.0.1:5000) instead of starting one.')
+parser.add_argument('--server', choices=['app', 'serve'], default='app', help='Server started locally: app.py or serve.py.')
+parser.add_argument('--workers', type=int, default=2, help='Workers when --server serve.')
+parser.add_argument('--port', type=int, default=5060, help='Port of the locally started server.')
+parser.add_argument('--output', help='Results file (default: load_tests/<timestamp>_<commit>.json).')
+parser.add_argument('--compare', help='Previous results file to compare against.')
+args = parser.parse_args()
+
+current_dir = Path(__file__).parent
+
+
+def build_payloads(source, n):
+    """
+    Feature dicts to replay: real rows of final_train_data, or randomized variations of sample_data.
+    """
+    rng = np.random.default_rng(42)
+    if source == 'data':
+        from pipeline_io import load_table
+        df = load_table('final_train_data', exclude=['Type', 'Date', 'Weekly_Sales'])
+        df = df.sample(n=min(n, len(df)), random_state=42)
+        df['IsHoliday'] = df['IsHoliday'].astype(int)
+        return json.loads(df.to_json(orient='records'))
+
+    payloads = []
+    for _ in range(n):
+        lag = rng.uniform(1000, 60000)
+        payloads.append(dict(sample_data, Store=int(rng.integers(1, 46)), Dept=int(rng.integers(1, 100)),
+                             Week=int(rng.integers(1, 53)), Sales_Lag_1=lag, Sales_Lag_4=lag * rng.uniform(0.8, 1.2),
+                             Sales_MA4=lag * rng.uniform(0.9, 1.1), Temperature=rng.uniform(10, 95)))
+    return payloads
+
+
+def start_server():
+    """
+    Starts app.py / serve.py in its own process group and waits until it answers.
+    """
+    env = {**os.environ, 'WALMART_PORT': str(args.port)}
+    if args.server == 'app':
+        command = [sys.executable, 'app.py']
+    else:
+        command = [sys.executable, 'serve.py', '--workers', str(args.workers), '--bind', f'127.0.0.1:{args.port}']
+    # Own process group: app.py's debug reloader runs the server in a child process
+    server = subprocess.Popen(command, cwd=current_dir, env=env, start_new_session=True,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{args.port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/stats", timeout=5).ok:
+                return server, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    stop_server(server)
+    raise SystemExit('Server did not start in time.')
+
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    server.wait(timeout=60)
+
+
+class Recorder:
+    """
+    Thread-safe collection of (latency, ok) samples; samples are only kept once recording is on.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recording = False
+        self.latencies, self.errors, self.status_codes = [], 0, {}
+
+    def add(self, latency, status, ok):
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies.append(latency)
+            self.errors += not ok
+            self.status_codes[status] = self.status_codes.get(status, 0) + 1
+
+
+def send(session, target, payload, recorder, start):
+    try:
+        response = session.post(target, json=payload, timeout=30)
+        ok = response.status_code == 200 and response.json().get('status', 'success') == 'success'
+        status = str(response.status_code)
+    except requests.RequestException as e:
+        ok, status = False, type(e).__name__
+    recorder.add(time.perf_counter() - start, status, ok)
+
+
+def run_closed_loop(target, payloads, recorder, stop_at):
+    def client(offset):
+        with requests.Session() as session:
+            i = offset
+            while time.perf_counter() < stop_at:
+                send(session, target, payloads[i % len(payloads)], recorder, time.perf_counter())
+                i += args.concurrency
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(client, range(args.concurrency)))
+
+
+def run_open_loop(target, payloads, recorder, stop_at):
+    # One keep-alive session per sender thread
+    local = threading.local()
+
+    def scheduled_send(payload, scheduled):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        send(local.session, target, payload, recorder, scheduled)
+
+    interval = 1 / args.rps
+    with ThreadPoolExecutor(max(8, int(args.rps * 0.1))) as pool:
+        next_send, i = time.perf_counter(), 0
+        while next_send < stop_at:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(scheduled_send, payloads[i % len(payloads)], next_send)
+            next_send += interval
+            i += 1
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=current_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(recorder, elapsed):
+    latencies_ms = np.array(recorder.latencies) * 1000
+    total = len(latencies_ms)
+    return {
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'error_rate': round(recorder.errors / total, 6) if total else None,
+        'status_codes': recorder.status_codes,
+        'latency_ms': {name: round(float(np.percentile(latencies_ms, q)), 3) if total else None
+                       for name, q in [('p50', 50), ('p95', 95), ('p99', 99), ('max', 100)]}
+    }
+
+
+payloads = build_payloads(args.payloads, args.n_payloads)
+server, url = (None, args.url.rstrip('/')) if args.url else start_server()
+target = url + args.endpoint
+recorder = Recorder()
+
+try:
+    run = run_open_loop if args.rps else run_closed_loop
+    mode_label = f"open loop, {args.rps:g} rps" if args.rps else f"closed loop, concurrency {args.concurrency}"
+    print(f"Load test: {target} ({mode_label}, {len(payloads):,} {args.payloads} payloads)")
+
+    # Warm-up (not recorded), then the measured run
+    run(target, payloads, recorder, time.perf_counter() + args.warmup)
+    recorder.recording = True
+    start = time.perf_counter()
+    run(target, payloads, recorder, start + args.duration)
+    elapsed = time.perf_counter() - start
+finally:
+    if server is not None:
+        stop_server(server)
+
+results = {
+    'timestamp': datetime.now().isoformat(timespec='seconds'),
+    'commit': git_commit(),
+    'settings': {**vars(args), 'host_cpus': os.cpu_count(), 'python': platform.python_version()},
+    'results': summarize(recorder, elapsed)
+}
+
+summary = results['results']
+# Error rate and percentiles are None when no request completed during the measured run
+print(f"\nRequests   : {summary['requests']:,} in {elapsed:.1f}s ({summary['throughput_rps']:,.1f} req/s)")
+error_rate = 'n/a' if summary['error_rate'] is None else f"{summary['error_rate']:.2%}"
+print(f"Error rate : {error_rate}  {summary['status_codes']}")
+print("Latency ms : " + ' | '.join(f"{k} {'n/a' if v is None else f'{v:,.2f}'}" for k, v in summary['latency_ms'].items()))
+
+output = Path(args.output) if args.output else current_dir / 'load_tests' / f"{datetime.now():%Y%m%d_%H%M%S}_{results['commit']}.json"
+output.parent.mkdir(parents=True, exist_ok=True)
+output.write_text(json.dumps(results, indent=2))
+print(f"Results saved to: {output}")
+
+if summary['requests'] == 0:
+    sys.exit("No request was recorded during the measured run: increase --duration (or --rps in open loop mode).")
+
+if args.compare:
+    previous = json.loads(Path(args.compare).read_text())['results']
+    print(f"\nCOMPARISON vs {args.compare}:")
+    rows = [('throughput_rps', previous['throughput_rps'], summary['throughput_rps'])]
+    rows += [(f"latency {k}", previous['latency_ms'][k], v) for k, v in summary['latency_ms'].items()]
+    for name, before, after in rows:
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else float('nan')
+        print(f"  {name:<15} {before:>12,.2f} -> {after:>12,.2f} ({change:+.1%})")
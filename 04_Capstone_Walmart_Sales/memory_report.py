@@ -0,0 +1,73 @@
+import json
+import sys
+import time
+import pandas as pd
+from pipeline_io import DATA_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+"""
+Memory Report
+-------------
+Records how much memory each pipeline stage uses, so dtype savings can be confirmed as the data grows:
+1. Peak RSS of the running process
+2. Bytes used by every column of the stage's tables (deep, i.e. including string contents)
+
+Reports are printed and also persisted to memory_report.json (one entry per stage).
+"""
+
+REPORT_PATH = DATA_DIR / 'memory_report.json'
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of the current process in MB (None if the platform does not expose it).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+
+def column_bytes(df):
+    """
+    Per-column memory usage in bytes (index excluded).
+    """
+    return df.memory_usage(index=False, deep=True)
+
+
+def report_memory(stage, tables):
+    """
+    Prints and persists the memory footprint of a stage.
+
+    Args:
+        stage (str): Stage name (e.g. '01_merge').
+        tables (dict): Mapping of table name -> DataFrame to measure.
+    """
+    entry = {
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'peak_rss_mb': peak_rss_mb(),
+        'tables': {}
+    }
+
+    print(f"\n--- MEMORY REPORT ({stage}) ---")
+    for name, df in tables.items():
+        usage = column_bytes(df)
+        entry['tables'][name] = {
+            'rows': int(df.shape[0]),
+            'total_mb': float(usage.sum() / 1e6),
+            'columns': {col: int(size) for col, size in usage.items()}
+        }
+        print(f"{name}: {df.shape[0]:,} rows, {usage.sum() / 1e6:,.2f} MB")
+        print(pd.DataFrame({'MB': usage / 1e6, 'dtype': df.dtypes.astype(str)}).to_string(float_format=lambda x: f"{x:,.3f}"))
+
+    if entry['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {entry['peak_rss_mb']:,.1f} MB")
+
+    report = json.loads(REPORT_PATH.read_text()) if REPORT_PATH.exists() else {}
+    report[stage] = entry
+    REPORT_PATH.write_text(json.dumps(report, indent=2))
@@ -0,0 +1,190 @@
+import bisect
+from abc import ABC, abstractmethod
+import threading
+import time
+
+"""
+Service Metrics
+---------------
+Minimal, dependency-free metrics for the prediction API, rendered in the Prometheus text format
+(GET /metrics in app.py):
+
+- walmart_request_stage_seconds (histogram): time spent in each stage of a request
+  (parse -> align -> predict -> serialize), per endpoint
+- walmart_request_duration_seconds (histogram): total handler time per endpoint
+- walmart_requests_total / walmart_request_errors_total (counters)
+- walmart_requests_in_flight (gauge)
+
+Recording a stage costs one perf_counter() call, a bucket bisect and an uncontended lock,
+so the instrumentation stays on in production.
+With serve.py, every worker keeps its own metrics: each scrape reports the worker that answered it.
+"""
+
+# Upper bounds of the histogram buckets, in seconds (50 us ... 2.5 s)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Metric(ABC):
+    """
+    Base class: one metric name, with one child (value holder) per label combination.
+    Subclasses define the child type (_new_child) and its exposition lines (_render_child);
+    a metric type missing either can't be instantiated.
+    """
+    kind = None
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """
+        New value holder for one label combination.
+        """
+
+    @abstractmethod
+    def _render_child(self, values, child):
+        """
+        Exposition lines of one child.
+        """
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{format_labels(self.labelnames, values)} {child.value:g}"]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+
+class _HistogramValues:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramValues(self.buckets)
+
+    def _render_child(self, values, child):
+        lines, cumulative = [], 0
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else f'{bound:g}'
+            lines.append(f"{self.name}_bucket{format_labels(self.labelnames, values, ('le', le))} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labelnames, values)} {total:.6f}")
+        lines.append(f"{self.name}_count{format_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+# --- SERVICE METRICS ---
+STAGE_SECONDS = Histogram('walmart_request_stage_seconds', 'Time spent in each stage of a request.', ['endpoint', 'stage'])
+REQUEST_SECONDS = Histogram('walmart_request_duration_seconds', 'Total request handling time.', ['endpoint'])
+REQUESTS = Counter('walmart_requests_total', 'Requests handled.', ['endpoint'])
+ERRORS = Counter('walmart_request_errors_total', 'Requests that ended in an error.', ['endpoint'])
+IN_FLIGHT = Gauge('walmart_requests_in_flight', 'Requests currently being handled.', ['endpoint'])
+
+REGISTRY = [STAGE_SECONDS, REQUEST_SECONDS, REQUESTS, ERRORS, IN_FLIGHT]
+
+
+def render_metrics():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class RequestTimer:
+    """
+    Instruments one request: `with RequestTimer('/predict') as timer:` then timer.stage('parse') after each stage.
+    Each stage is timed from the end of the previous one. An exception leaving the block, or timer.error(),
+    counts the request as an error.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.failed = False
+
+    def __enter__(self):
+        IN_FLIGHT.labels(self.endpoint).inc()
+        self.start = self.last = time.perf_counter()
+        return self
+
+    def stage(self, name):
+        now = time.perf_counter()
+        STAGE_SECONDS.labels(self.endpoint, name).observe(now - self.last)
+        self.last = now
+
+    def error(self):
+        self.failed = True
+
+    def __exit__(self, exc_type, exc, tb):
+        REQUEST_SECONDS.labels(self.endpoint).observe(time.perf_counter() - self.start)
+        REQUESTS.labels(self.endpoint).inc()
+        if self.failed or exc_type is not None:
+            ERRORS.labels(self.endpoint).inc()
+        IN_FLIGHT.labels(self.endpoint).dec()
+        return False
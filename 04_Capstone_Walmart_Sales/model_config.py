@@ -0,0 +1,10 @@
+"""
+Model Settings
+--------------
+Random Forest settings of the production model (05_train_model.py), shared by the scripts that
+train comparable models: the full-refit baseline of retrain_incremental.py and the default
+tree counts of backtest.py and train_partitions.py.
+"""
+
+N_ESTIMATORS = 100
+RANDOM_STATE = 42
@@ -0,0 +1,193 @@
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from forest_export import FlatForest
+
+"""
+Partitioned Models
+------------------
+Layout and serving side of the per-partition models trained by train_partitions.py
+(one Random Forest per Store, or per store Type):
+
+partition_models/
+- manifest.json: partitioning ('store' / 'type'), Store -> partition map, and per partition its
+  training rows, data hash and export folder
+- <partition>/: the partition's flattened forest (forest_export.py layout)
+
+PartitionRouter (used by app.py) maps a request's Store to its partition's model.
+Rows arrive in the serving model's column order; they are reordered to the manifest's feature list,
+and served by the global model instead when a partition feature is missing from them.
+Models are loaded lazily (memory-mapped) and at most max_loaded of them are kept,
+least recently used first out, so memory stays bounded however many partitions exist.
+"""
+
+PARTITION_DIR = Path(__file__).parent / "partition_models"
+MANIFEST_NAME = 'manifest.json'
+
+
+def load_manifest(partition_dir=PARTITION_DIR):
+    """
+    The partition manifest, or None when no partitioned models were trained.
+    """
+    path = Path(partition_dir) / MANIFEST_NAME
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def write_manifest(manifest, partition_dir=PARTITION_DIR):
+    # Written last and renamed into place: routers reload on a complete manifest only
+    path = Path(partition_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    tmp_path.replace(path)
+
+
+class PartitionRouter:
+    """
+    Store -> partition model, with lazy loading and LRU eviction.
+    """
+
+    def __init__(self, partition_dir=PARTITION_DIR, max_loaded=8):
+        self.partition_dir = Path(partition_dir)
+        self.max_loaded = max_loaded
+        self.manifest = None
+        self.store_partitions = {}
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = None
+        self._layouts = {}
+        self.hits = self.loads = self.evictions = self.misses = 0
+        self.refresh()
+
+    def signature(self):
+        path = self.partition_dir / MANIFEST_NAME
+        return (path.stat().st_size, path.stat().st_mtime_ns) if path.exists() else None
+
+    def refresh(self):
+        """
+        Re-reads the manifest if it changed. Loaded models whose partition was retrained are dropped
+        (the others stay loaded). Returns True when the manifest changed.
+        """
+        signature = self.signature()
+        if signature == self._signature:
+            return False
+        try:
+            manifest = load_manifest(self.partition_dir)
+        except (OSError, ValueError) as e:
+            print(f"Partition manifest not reloaded: {e}")
+            return False
+
+        with self._lock:
+            partitions = manifest['partitions'] if manifest else {}
+            old_partitions = self.manifest['partitions'] if self.manifest else {}
+            for key in list(self._models):
+                if key not in partitions or partitions[key]['data_hash'] != old_partitions.get(key, {}).get('data_hash'):
+                    del self._models[key]
+            self.manifest = manifest
+            self.store_partitions = {int(store): key for store, key in (manifest or {}).get('stores', {}).items()}
+            self._layouts = {}
+            self._signature = signature
+        return True
+
+    def layout(self, features):
+        """
+        Column positions that reorder rows laid out as `features` to the partition models' feature list,
+        () when the order already matches, or None when a partition feature is missing
+        (the rows then go to the global model).
+        """
+        features = tuple(features)
+        with self._lock:
+            if features in self._layouts:
+                return self._layouts[features]
+            expected = self.manifest['features'] if self.manifest else []
+            positions = {name: i for i, name in enumerate(features)}
+            missing = [name for name in expected if name not in positions]
+            if missing:
+                print(f"Partition models expect features the served model lacks {missing}: using the global model")
+                layout = None
+            elif list(features) == list(expected):
+                layout = ()
+            else:
+                layout = np.array([positions[name] for name in expected])
+            self._layouts[features] = layout
+            return layout
+
+
+    def model_for(self, store):
+        """
+        Model of the partition serving this Store, or None (unknown store / no partitions:
+        the caller falls back to the global model).
+        """
+        try:
+            key = self.store_partitions.get(int(store))
+        except (TypeError, ValueError):
+            key = None
+        if key is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+
+            model = FlatForest.load(self.partition_dir / self.manifest['partitions'][key]['path'], mmap_mode='r')
+            self._models[key] = model
+            self.loads += 1
+            while len(self._models) > self.max_loaded:
+                self._models.popitem(last=False)
+                self.evictions += 1
+            return model
+
+    def predict_row(self, store, row, features):
+        """
+        Prediction of one row (laid out as `features`) by its Store's partition model,
+        or None when the global model has to serve it.
+        """
+        layout = self.layout(features)
+        model = self.model_for(store) if layout is not None else None
+        if model is None:
+            return None
+        return model.predict(row[:, layout] if len(layout) else row)[0]
+
+    def predict_frame(self, X, stores, fallback):
+        """
+        Predicts a batch (DataFrame in the fallback model's column order), each row with its Store's
+        partition model. Rows of unknown stores (every row on a feature mismatch) are predicted by the fallback model.
+        """
+        layout = self.layout(X.columns)
+        if layout is None:
+            return fallback.predict(X)
+        values = X.to_numpy(dtype=np.float32)
+        if len(layout):
+            values = values[:, layout]
+        stores = np.asarray(stores)
+        predictions = np.empty(len(X))
+        routed = np.zeros(len(X), dtype=bool)
+        for store in np.unique(stores):
+            model = self.model_for(store)
+            if model is not None:
+                rows = stores == store
+                predictions[rows] = model.predict(values[rows])
+                routed |= rows
+        if not routed.all():
+            predictions[~routed] = fallback.predict(X[~routed])
+        return predictions
+
+    def stats(self):
+        with self._lock:
+            loaded = list(self._models)
+        return {
+            'partition_by': self.manifest['partition_by'] if self.manifest else None,
+            'partitions': len(self.manifest['partitions']) if self.manifest else 0,
+            'loaded': loaded,
+            'max_loaded': self.max_loaded,
+            'hits': self.hits,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'unrouted': self.misses
+        }
@@ -0,0 +1,233 @@
+import os
+import time
+import pandas as pd
+from pathlib import Path
+
+"""
+Pipeline Storage Helpers
+------------------------
+Shared read/write helpers for the tables handed from one capstone stage to the next
+(merged_raw_data -> walmart_cleaned_data -> final_train_data).
+
+Intermediate tables are stored in a typed columnar format (Parquet by default), so:
+1. Dtypes survive the hand-off (datetime 'Date', boolean 'IsHoliday', UInt32 'Week', categoricals).
+2. Consumers can load only the columns they need (column projection).
+3. No stage has to re-parse text or re-run pd.to_datetime.
+
+Configuration (environment variables):
+- WALMART_PIPELINE_FORMAT: 'parquet' (default), 'feather' (Arrow IPC) or 'csv' (legacy text format).
+- WALMART_DATA_DIR: folder holding the raw CSVs and intermediate tables (default: this folder).
+"""
+
+DATA_DIR = Path(os.environ.get('WALMART_DATA_DIR', Path(__file__).parent))
+PIPELINE_FORMAT = os.environ.get('WALMART_PIPELINE_FORMAT', 'parquet')
+
+FILE_EXTENSIONS = {
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'csv': '.csv'
+}
+
+
+def table_path(name, fmt=None):
+    """
+    Returns the on-disk path of an intermediate table.
+
+    Args:
+        name (str): Table name without extension (e.g. 'merged_raw_data').
+        fmt (str): Storage format. Defaults to PIPELINE_FORMAT.
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    if fmt not in FILE_EXTENSIONS:
+        raise ValueError(f"Unknown pipeline format '{fmt}'. Choose from: {list(FILE_EXTENSIONS)}")
+    return DATA_DIR / f"{name}{FILE_EXTENSIONS[fmt]}"
+
+
+def parts_dir(name, fmt=None):
+    """
+    Folder holding the chunks appended to a table by append_table (e.g. 'final_train_data.parts').
+    """
+    return DATA_DIR / f"{name}.parts"
+
+
+def clear_parts(name, fmt=None):
+    """
+    Removes the appended chunks of a table (called whenever the table is rewritten in full).
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    folder = parts_dir(name, fmt)
+    if folder.exists():
+        for part in folder.glob(f"*{FILE_EXTENSIONS[fmt]}"):
+            part.unlink()
+
+
+def table_columns(name, fmt=None):
+    """
+    Reads only the column names of a stored table (no data is loaded).
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    path = table_path(name, fmt)
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    if fmt == 'feather':
+        import pyarrow.ipc as ipc
+        with ipc.open_file(path) as reader:
+            return reader.schema.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def save_table(df, name, fmt=None):
+    """
+    Writes an intermediate table and returns its path.
+
+    Args:
+        df (DataFrame): Table to store.
+        name (str): Table name without extension.
+        fmt (str): Storage format. Defaults to PIPELINE_FORMAT.
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    path = table_path(name, fmt)
+
+    # Written next to the target and renamed over it, so readers (e.g. the API's feature store)
+    # never see a half-written table
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    if fmt == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    elif fmt == 'feather':
+        # Feather requires a default RangeIndex
+        df.reset_index(drop=True).to_feather(tmp_path)
+    else:
+        df.to_csv(tmp_path, index=False)
+    clear_parts(name, fmt)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_table(name, columns=None, exclude=None, fmt=None):
+    """
+    Loads an intermediate table with its original dtypes.
+
+    Args:
+        name (str): Table name without extension.
+        columns (list): Only load these columns (column projection).
+        exclude (list): Load every column except these.
+        fmt (str): Storage format. Defaults to PIPELINE_FORMAT.
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    path = table_path(name, fmt)
+
+    if exclude:
+        columns = [col for col in (columns or table_columns(name, fmt)) if col not in exclude]
+
+    # Chunks added later by append_table are read together with the base table
+    paths = [path] + sorted(parts_dir(name, fmt).glob(f"*{FILE_EXTENSIONS[fmt]}"))
+
+    if fmt == 'parquet':
+        frames = [pd.read_parquet(p, columns=columns) for p in paths]
+    elif fmt == 'feather':
+        frames = [pd.read_feather(p, columns=columns) for p in paths]
+    else:
+        # Legacy CSV path: dates have to be parsed again on every read
+        header = columns or table_columns(name, fmt)
+        parse_dates = ['Date'] if 'Date' in header else None
+        frames = [pd.read_csv(path, usecols=columns, parse_dates=parse_dates)]
+
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def append_table(df, name, fmt=None):
+    """
+    Appends rows to a stored table without rewriting it, so the cost is O(new rows).
+    Columnar formats get a new part file (read back transparently by load_table); CSV is appended in place.
+
+    Args:
+        df (DataFrame): Rows to append (same columns as the table).
+        name (str): Table name without extension.
+        fmt (str): Storage format. Defaults to PIPELINE_FORMAT.
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    if fmt == 'csv':
+        df.to_csv(table_path(name, fmt), mode='a', header=False, index=False)
+        return table_path(name, fmt)
+
+    folder = parts_dir(name, fmt)
+    folder.mkdir(exist_ok=True)
+    part_path = folder / f"part-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}{FILE_EXTENSIONS[fmt]}"
+    if fmt == 'parquet':
+        df.to_parquet(part_path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(part_path)
+    return part_path
+
+
+class TableWriter:
+    """
+    Writes an intermediate table chunk by chunk (used by the streaming / incremental modes),
+    so the full table never has to be held in memory.
+
+    Chunks go to a temporary file next to the table; it replaces the table (and its appended parts)
+    only when the `with` block exits without an error, like save_table. A failed run leaves the
+    previous table untouched instead of a truncated one.
+
+    Usage:
+        with TableWriter('final_train_data') as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, name, fmt=None):
+        self.name = name
+        self.fmt = fmt or PIPELINE_FORMAT
+        self.path = table_path(name, self.fmt)
+        self.tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        self.rows_written = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self.tmp_path, mode='w' if self.rows_written == 0 else 'a',
+                      header=self.rows_written == 0, index=False)
+            self.rows_written += len(df)
+            return
+
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.tmp_path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def commit(self):
+        """
+        Closes the file and renames it over the table (previously appended parts are removed).
+        """
+        self.close()
+        if self.tmp_path.exists():
+            clear_parts(self.name, self.fmt)
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+"""
+Prediction Cache
+----------------
+Bounded in-memory cache of single-row predictions for app.py.
+
+Dashboards refresh and clients retry with identical payloads, so the same feature vector is
+predicted over and over. Entries are keyed by the aligned feature row (float32, in
+model.feature_names_in_ order, defaults filled), so two payloads that differ only in key order,
+omitted zero-valued features or ignored extra keys share one entry.
+
+Eviction:
+- LRU: the least recently used entry goes first when the entry limit is reached
+- TTL: entries older than ttl_seconds are treated as misses and dropped
+- Memory cap: entries are evicted (LRU first) until the estimated size fits in max_bytes
+
+Counters (hits, misses, evictions by reason, invalidations) are exposed by stats() for sizing.
+"""
+
+# Approximate per-entry overhead on top of the key/value objects (OrderedDict node + tuple + timestamp)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def row_key(row):
+    """
+    Canonical cache key of an aligned feature row (-0.0 and 0.0 map to the same key).
+    """
+    return (row + 0.0).tobytes()
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with TTL expiry and a memory cap.
+
+    Args:
+        max_entries (int): Maximum number of cached predictions (0 disables the cache).
+        ttl_seconds (float): Lifetime of an entry (None: no expiry).
+        max_bytes (int): Cap on the estimated memory used by the entries.
+    """
+
+    def __init__(self, max_entries=100_000, ttl_seconds=300, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'evictions_lru': 0, 'evictions_ttl': 0,
+                         'evictions_memory': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def _entry_bytes(key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+    def _remove(self, key, reason):
+        value, _ = self._entries.pop(key)
+        self._bytes -= self._entry_bytes(key, value)
+        self.counters[f'evictions_{reason}'] += 1
+
+    def get(self, key):
+        """
+        Returns the cached value, or None on a miss (absent or expired).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                self._remove(key, 'ttl')
+                entry = None
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[0]
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._entries:
+                old_value, _ = self._entries.pop(key)
+                self._bytes -= self._entry_bytes(key, old_value)
+            self._entries[key] = (value, time.monotonic())
+            self._bytes += self._entry_bytes(key, value)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)), 'lru')
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)), 'memory')
+
+    def clear(self):
+        """
+        Drops every entry (e.g. after a model change). Counted as one invalidation.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': round(self.counters['hits'] / lookups, 4) if lookups else None,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds
+            }
@@ -0,0 +1,159 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from memory_report import peak_rss_mb
+
+"""
+Stage Profiling
+---------------
+Timed, memory-tracked spans around the logical steps of the capstone scripts:
+
+    from profiling import span
+    with span('merge'):
+        ...
+
+Disabled by default: span() is then a no-op. With WALMART_PROFILE=1 every span records
+- wall time and CPU time of the process
+- peak Python-level memory allocated inside the span (tracemalloc; NumPy / pandas buffers included)
+  and the memory still held when it ends. Set WALMART_PROFILE_MEMORY=0 to skip tracemalloc (it slows
+  allocation-heavy code down)
+- the process peak RSS so far (native allocations that tracemalloc can't see, e.g. sklearn's tree
+  building, only show up here)
+
+At exit, a per-span summary is printed and the run is written to profiles/<script>_<timestamp>.json
+in the Chrome trace event format: open it in chrome://tracing, https://ui.perfetto.dev or speedscope
+for a flame graph of nested spans. `python profiling.py` prints the span durations of the saved runs
+side by side, to follow trends across nightly runs.
+"""
+
+PROFILE_ENABLED = os.environ.get('WALMART_PROFILE') == '1'
+TRACK_MEMORY = PROFILE_ENABLED and os.environ.get('WALMART_PROFILE_MEMORY', '1') != '0'
+PROFILE_DIR = Path(os.environ.get('WALMART_PROFILE_DIR', Path(__file__).parent / 'profiles'))
+
+_events = []
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """
+    One profiled step. Nested spans are tracked per thread; a child's memory peak counts towards its parent.
+    """
+
+    def __init__(self, name, args=None):
+        self.name = name
+        self.args = args or {}
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+
+        self.child_peak = 0
+        if TRACK_MEMORY:
+            # The peak is reset per span: the parent's own peak is restored from child_peak on exit
+            self.memory_start, _ = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.child_peak = max(self.parent.child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.cpu_start = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        event_args = {**self.args, 'cpu_ms': round((time.process_time() - self.cpu_start) * 1000, 3)}
+        if TRACK_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.child_peak)
+            event_args['mem_peak_mb'] = round((peak - self.memory_start) / 1e6, 3)
+            event_args['mem_delta_mb'] = round((current - self.memory_start) / 1e6, 3)
+            if self.parent is not None:
+                self.parent.child_peak = max(self.parent.child_peak, peak)
+        event_args['rss_peak_mb'] = peak_rss_mb()
+        if exc_type is not None:
+            event_args['error'] = exc_type.__name__
+
+        _events.append({
+            'name': self.name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+            'ts': round((self.start - _origin) * 1e6, 1), 'dur': round((end - self.start) * 1e6, 1),
+            'args': event_args
+        })
+        _local.stack.pop()
+        return False
+
+
+def span(name, **args):
+    """
+    Context manager profiling one step (no-op unless WALMART_PROFILE=1). Keyword arguments are stored with the span.
+    """
+    return Span(name, args) if PROFILE_ENABLED else _NO_SPAN
+
+
+def write_report():
+    """
+    Prints the span summary and writes the Chrome trace of this run (called at exit).
+    """
+    if not _events:
+        return None
+    script = Path(sys.argv[0]).stem or 'interactive'
+    print(f"\n--- PROFILE ({script}) ---")
+    for event in sorted(_events, key=lambda event: event['ts']):
+        args = event['args']
+        memory = f"  peak {args['mem_peak_mb']:>9,.1f} MB  held {args['mem_delta_mb']:>+9,.1f} MB" if 'mem_peak_mb' in args else ''
+        print(f"{event['name']:<24} {event['dur'] / 1e6:>9.3f}s  cpu {args['cpu_ms'] / 1000:>8.3f}s{memory}")
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{script}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    path.write_text(json.dumps({
+        'traceEvents': _events,
+        'displayTimeUnit': 'ms',
+        'otherData': {'script': script, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                      'memory_tracked': TRACK_MEMORY}
+    }))
+    print(f"Profile saved to: {path}")
+    return path
+
+
+if PROFILE_ENABLED:
+    if TRACK_MEMORY:
+        tracemalloc.start()
+    atexit.register(write_report)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    # --- TRENDS: span durations (s) of every saved run, one column per run ---
+    runs = {}
+    for path in sorted(PROFILE_DIR.glob('*.json')):
+        trace = json.loads(path.read_text())
+        script = trace.get('otherData', {}).get('script', path.stem)
+        durations = {}
+        for event in trace['traceEvents']:
+            durations[event['name']] = durations.get(event['name'], 0) + event['dur'] / 1e6
+        runs.setdefault(script, {})[path.stem.removeprefix(f"{script}_")] = durations
+
+    if not runs:
+        print(f"No profiles in {PROFILE_DIR} (run a script with WALMART_PROFILE=1).")
+    for script, script_runs in runs.items():
+        print(f"\n{script}:")
+        print(pd.DataFrame(script_runs).round(3).to_string())
@@ -0,0 +1,171 @@
+import argparse
+import copy
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from forest_export import export_forest
+from model_config import N_ESTIMATORS, RANDOM_STATE
+from pipeline_io import load_table
+
+"""
+Incremental Retraining
+----------------------
+05_train_model.py refits all 100 trees on the full history, although every week only adds a thin slice of rows.
+This script updates the current model instead:
+
+- warm (default): keeps every existing tree and adds --new-trees trees fitted on the recent weeks
+  (RandomForestRegressor warm start), so the ensemble grows by --new-trees per update
+- sliding: same, then drops the oldest --new-trees trees, so the ensemble keeps its size and gradually
+  forgets old regimes
+
+New trees are fitted on the last --window-weeks weeks only, so an update costs a fraction of a refit.
+
+Evaluation: the last --holdout-weeks weeks are held out. The update and a full refit (same estimator as
+05_train_model.py, on every week before the holdout) are both timed and scored on them.
+Each update is saved as a new version under models/ (random_forest_model_v<N>.pkl) and listed in
+models/registry.json; --promote also installs it as random_forest_model.pkl (+ forest_arrays/) for app.py.
+Registry entries record the version they were built on (parent_version: the version whose file matches the
+served model, None for a model trained by 05_train_model.py), so chains of promotions stay traceable.
+Warm updates grow the ensemble; past --max-trees the oldest trees are dropped (with a warning).
+
+Usage:
+    python retrain_incremental.py --new-trees 20 --window-weeks 26
+    python retrain_incremental.py --mode sliding --holdout-weeks 0 --promote   # production update
+"""
+
+parser = argparse.ArgumentParser(description='Add trees trained on recent weeks to the current model.')
+parser.add_argument('--mode', choices=['warm', 'sliding'], default='warm', help='Grow the ensemble or replace its oldest trees.')
+parser.add_argument('--new-trees', type=int, default=20, help='Trees added per update.')
+parser.add_argument('--window-weeks', type=int, default=26, help='Recent weeks the new trees are fitted on.')
+parser.add_argument('--holdout-weeks', type=int, default=8, help='Latest weeks held out for the comparison (0: no comparison).')
+parser.add_argument('--skip-full-refit', action='store_true', help='Only time and score the incremental update.')
+parser.add_argument('--promote', action='store_true', help='Install the new version as random_forest_model.pkl.')
+parser.add_argument('--max-trees', type=int, default=300, help='Ensemble size limit; warm updates beyond it drop the oldest trees.')
+args = parser.parse_args()
+
+current_dir = Path(__file__).parent
+model_path = current_dir / "random_forest_model.pkl"
+models_dir = current_dir / "models"
+registry_path = models_dir / "registry.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def score(model, X, y):
+    if len(X) == 0:
+        return {'mae': None, 'r2': None}
+    y_pred = model.predict(X)
+    return {'mae': round(mean_absolute_error(y, y_pred), 2), 'r2': round(r2_score(y, y_pred), 4)}
+
+
+# --- DATA ---
+df = load_table('final_train_data', exclude=['Type'])
+df['IsHoliday'] = df['IsHoliday'].astype(int)
+
+weeks = np.sort(df['Date'].unique())
+if not 0 <= args.holdout_weeks < len(weeks):
+    parser.error(f"--holdout-weeks must be between 0 and {len(weeks) - 1} (the data has {len(weeks)} weeks).")
+holdout_start = weeks[-args.holdout_weeks] if args.holdout_weeks else weeks[-1] + np.timedelta64(1, 'D')
+window_start = weeks[max(0, len(weeks) - args.holdout_weeks - args.window_weeks)]
+
+history_df = df[df['Date'] < holdout_start]
+recent_df = history_df[history_df['Date'] >= window_start]
+holdout_df = df[df['Date'] >= holdout_start]
+
+base_model = joblib.load(model_path)
+# Version the served model came from: promoted copies are byte-identical to their version file
+registry = json.loads(registry_path.read_text()) if registry_path.exists() else []
+base_sha256 = file_sha256(model_path)
+parent_version = next((entry['version'] for entry in reversed(registry) if entry.get('sha256') == base_sha256), None)
+features = list(base_model.feature_names_in_)
+X_holdout, y_holdout = holdout_df[features], holdout_df['Weekly_Sales']
+
+print(f"Base model   : {len(base_model.estimators_)} trees ({model_path.name}, "
+      f"{f'version {parent_version}' if parent_version else 'not a registered version'})")
+print(f"Recent window: {len(recent_df):,} rows ({pd.Timestamp(window_start).date()} .. {pd.Timestamp(holdout_start).date()})")
+print(f"Holdout      : {len(holdout_df):,} rows ({args.holdout_weeks} weeks)")
+
+# --- INCREMENTAL UPDATE ---
+start = time.perf_counter()
+# The update works on a copy: base_model stays as loaded
+model = copy.deepcopy(base_model)
+n_existing = len(model.estimators_)
+# Warm start: fit() keeps the fitted trees and only grows the missing ones
+model.set_params(warm_start=True, n_estimators=n_existing + args.new_trees)
+model.fit(recent_df[features], recent_df['Weekly_Sales'])
+if args.mode == 'sliding':
+    model.estimators_ = model.estimators_[args.new_trees:]
+    model.n_estimators = len(model.estimators_)
+elif len(model.estimators_) > args.max_trees:
+    print(f"WARNING: warm update grows the ensemble to {len(model.estimators_)} trees; "
+          f"dropping the {len(model.estimators_) - args.max_trees} oldest to stay at --max-trees {args.max_trees}")
+    model.estimators_ = model.estimators_[-args.max_trees:]
+    model.n_estimators = len(model.estimators_)
+model.set_params(warm_start=False)
+update_time = time.perf_counter() - start
+
+results = {f'incremental ({args.mode})': {'trees': len(model.estimators_), 'train_rows': len(recent_df),
+                                          'wall_s': round(update_time, 2), **score(model, X_holdout, y_holdout)}}
+
+# --- FULL REFIT (baseline) ---
+if args.holdout_weeks and not args.skip_full_refit:
+    start = time.perf_counter()
+    full_model = RandomForestRegressor(n_estimators=N_ESTIMATORS, n_jobs=-1, random_state=RANDOM_STATE)
+    full_model.fit(history_df[features], history_df['Weekly_Sales'])
+    refit_time = time.perf_counter() - start
+    results['full refit'] = {'trees': len(full_model.estimators_), 'train_rows': len(history_df),
+                             'wall_s': round(refit_time, 2), **score(full_model, X_holdout, y_holdout)}
+
+report = pd.DataFrame.from_dict(results, orient='index')
+print("\nRETRAINING COMPARISON:")
+print(report.to_string())
+if 'full refit' in results:
+    print(f"Incremental update is {results['full refit']['wall_s'] / max(update_time, 1e-9):,.1f}x faster than a full refit")
+
+# --- VERSIONED SAVE ---
+models_dir.mkdir(exist_ok=True)
+version = len(registry) + 1
+version_path = models_dir / f"random_forest_model_v{version}.pkl"
+joblib.dump(model, version_path)
+
+registry.append({
+    'version': version,
+    'path': version_path.name,
+    'parent_version': parent_version,
+    'parent_trees': n_existing,
+    'mode': args.mode,
+    'trees': len(model.estimators_),
+    'trained_through': str(pd.Timestamp(history_df['Date'].max()).date()),
+    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'update_s': round(update_time, 2),
+    'holdout': results[f'incremental ({args.mode})'] if args.holdout_weeks else None,
+    'promoted': args.promote,
+    'sha256': file_sha256(version_path)
+})
+tmp_path = registry_path.with_name(f"{registry_path.name}.tmp")
+tmp_path.write_text(json.dumps(registry, indent=2))
+os.replace(tmp_path, registry_path)
+print(f"\nModel version {version} saved to: {version_path}")
+
+# --- PROMOTE ---
+# Copied next to the served file and renamed over it, then re-exported: app.py reloads on the change
+if args.promote:
+    tmp_path = model_path.with_name(f"{model_path.name}.tmp")
+    shutil.copyfile(version_path, tmp_path)
+    os.replace(tmp_path, model_path)
+    export_forest(model, current_dir / "forest_arrays", source_path=model_path)
+    print(f"Version {version} promoted to: {model_path}")
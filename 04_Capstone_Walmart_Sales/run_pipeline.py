@@ -0,0 +1,329 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from pipeline_io import DATA_DIR, table_path
+
+"""
+Cached Pipeline Runner
+----------------------
+Runs the capstone stages (01 -> 05) as a DAG with declared inputs and outputs.
+
+Each stage gets a fingerprint built from:
+1. The code of its script and of every local helper module it imports (e.g. pipeline_io.py)
+2. The content hashes of its input files
+3. The WALMART_* settings that change stage outputs (FINGERPRINT_SETTINGS: paths, formats and dtypes);
+   runtime-only settings such as WALMART_PROFILE leave the fingerprints, and so the cache, untouched
+
+If a fingerprint was seen before, the stage's outputs are restored from the on-disk
+artifact cache instead of re-running the script. Because downstream fingerprints use the
+*content* of their inputs, a code change that produces identical outputs stops the
+invalidation from propagating further down the DAG.
+
+The cache is bounded: least recently used entries are evicted once it exceeds --cache-size-mb.
+
+Usage:
+    python run_pipeline.py                  # run everything that is out of date
+    python run_pipeline.py --dry-run        # only show what would run
+    python run_pipeline.py --force features # re-run one stage (and whatever it invalidates)
+    python run_pipeline.py --with-eda       # also run the (uncached) EDA stage
+"""
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get('WALMART_CACHE_DIR', SCRIPT_DIR / '.pipeline_cache'))
+HASH_INDEX_PATH = CACHE_DIR / 'file_hashes.json'
+# Environment variables that change what the stages write (see pipeline_io.py and schema.py)
+FINGERPRINT_SETTINGS = ['WALMART_DATA_DIR', 'WALMART_PIPELINE_FORMAT', 'WALMART_FLOAT32']
+
+# --- STAGE DEFINITIONS ---
+# Dependencies between stages are inferred by matching outputs to inputs.
+STAGES = {
+    'merge': {
+        'script': '01_data_loading_and_merging.py',
+        'inputs': [DATA_DIR / 'train.csv', DATA_DIR / 'features.csv', DATA_DIR / 'stores.csv'],
+        'outputs': [table_path('merged_raw_data')]
+    },
+    'cleaning': {
+        'script': '02_data_cleaning.py',
+        'inputs': [table_path('merged_raw_data')],
+        'outputs': [table_path('walmart_cleaned_data')]
+    },
+    'eda': {
+        'script': '03_eda_analysis.py',
+        'inputs': [table_path('walmart_cleaned_data')],
+        'outputs': [],
+        'optional': True
+    },
+    'features': {
+        'script': '04_feature_engineering.py',
+        'inputs': [table_path('walmart_cleaned_data')],
+        'outputs': [table_path('final_train_data'), table_path('feature_state')]
+    },
+    'training': {
+        'script': '05_train_model.py',
+        'inputs': [table_path('final_train_data')],
+        # forest_arrays/ is the export of the .pkl served by app.py: both are cached and restored together
+        'outputs': [SCRIPT_DIR / 'random_forest_model.pkl', SCRIPT_DIR / 'model_performance_plot.png',
+                    SCRIPT_DIR / 'forest_arrays']
+    }
+}
+
+
+def topological_order(stages):
+    """
+    Orders stages so that every stage runs after the stages producing its inputs.
+    """
+    producers = {path: name for name, stage in stages.items() for path in stage['outputs']}
+    ordered, visiting = [], set()
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Cycle detected in pipeline at stage '{name}'")
+        visiting.add(name)
+        for path in stages[name]['inputs']:
+            if path in producers:
+                visit(producers[path])
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in stages:
+        visit(name)
+    return ordered
+
+
+def local_code_files(script_path):
+    """
+    Returns the script plus every helper module from this folder that it imports (recursively).
+    """
+    found, pending = [], [script_path]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        tree = ast.parse(path.read_text())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                candidate = SCRIPT_DIR / f"{module.split('.')[0]}.py"
+                if candidate.exists():
+                    pending.append(candidate)
+    return sorted(found)
+
+
+def file_hash(path, hash_index):
+    """
+    Content hash of a file. Hashes are memoized by (size, mtime) so large inputs are only read once.
+    """
+    stat = path.stat()
+    key = str(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    cached = hash_index.get(key)
+    if cached and cached['signature'] == signature:
+        return cached['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    hash_index[key] = {'signature': signature, 'sha256': digest.hexdigest()}
+    return hash_index[key]['sha256']
+
+
+def stage_fingerprint(name, stage, hash_index):
+    """
+    Fingerprint of a stage: code hashes + input content hashes + output-affecting settings.
+    """
+    digest = hashlib.sha256(name.encode())
+    for code_path in local_code_files(SCRIPT_DIR / stage['script']):
+        digest.update(f"code:{code_path.name}:{file_hash(code_path, hash_index)}".encode())
+    for input_path in stage['inputs']:
+        # Rows appended by incremental_update.py live next to the table in '<name>.parts'
+        parts = sorted((input_path.parent / f"{input_path.stem}.parts").glob(f"*{input_path.suffix}"))
+        for path in [input_path] + parts:
+            digest.update(f"input:{path.name}:{file_hash(path, hash_index)}".encode())
+    for key in FINGERPRINT_SETTINGS:
+        if key in os.environ:
+            digest.update(f"env:{key}={os.environ[key]}".encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_entries():
+    """
+    Lists every cache entry as (manifest path, manifest dict).
+    """
+    return [(path, json.loads(path.read_text())) for path in CACHE_DIR.glob('*/*/manifest.json')]
+
+
+def output_files(path):
+    """
+    Files of a stage output: the file itself, or every file of an output folder (meta.json last).
+    """
+    if not path.is_dir():
+        return [path]
+    return sorted((p for p in path.iterdir() if p.is_file()), key=lambda p: (p.name == 'meta.json', p.name))
+
+
+def store_in_cache(name, fingerprint, outputs):
+    """
+    Copies a stage's outputs (files or folders) into the cache under its fingerprint.
+    """
+    entry_dir = CACHE_DIR / name / fingerprint
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    for path in outputs:
+        if path.is_dir():
+            shutil.copytree(path, entry_dir / path.name, dirs_exist_ok=True)
+        else:
+            shutil.copy2(path, entry_dir / path.name)
+
+    manifest = {
+        'stage': name,
+        'fingerprint': fingerprint,
+        'outputs': [str(path) for path in outputs],
+        'size_bytes': sum(f.stat().st_size for path in outputs for f in output_files(path)),
+        'last_used': time.time()
+    }
+    (entry_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+
+
+def restore_file(cached_file, output, hash_index):
+    """
+    Copies one cached file over the working copy (renamed into place, like the stages' own writes).
+    The copy is skipped when content and mtime already match (mtimes matter: forest_arrays/meta.json
+    records the size and mtime of the model file it was exported from).
+    """
+    if output.exists() and output.stat().st_mtime_ns == cached_file.stat().st_mtime_ns \
+            and file_hash(output, hash_index) == file_hash(cached_file, hash_index):
+        return
+    tmp_path = output.with_name(f"{output.name}.tmp")
+    shutil.copy2(cached_file, tmp_path)
+    os.replace(tmp_path, output)
+
+
+def restore_from_cache(name, fingerprint, hash_index, outputs):
+    """
+    Restores a stage's outputs from the cache. Returns False on a cache miss
+    (including entries stored when the stage declared other outputs).
+    """
+    manifest_path = CACHE_DIR / name / fingerprint / 'manifest.json'
+    if not manifest_path.exists():
+        return False
+
+    manifest = json.loads(manifest_path.read_text())
+    if manifest['outputs'] != [str(path) for path in outputs]:
+        return False
+    for output in map(Path, manifest['outputs']):
+        cached = manifest_path.parent / output.name
+        if cached.is_dir():
+            # Folder outputs: every file is restored, then files the cached version doesn't have are removed
+            output.mkdir(parents=True, exist_ok=True)
+            cached_files = output_files(cached)
+            for cached_file in cached_files:
+                restore_file(cached_file, output / cached_file.name, hash_index)
+            for stale in set(p.name for p in output_files(output)) - set(p.name for p in cached_files):
+                (output / stale).unlink()
+        else:
+            restore_file(cached, output, hash_index)
+
+    manifest['last_used'] = time.time()
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return True
+
+
+def evict_cache(max_bytes, protected):
+    """
+    Evicts least recently used cache entries until the cache fits in max_bytes.
+    Entries used by the current run are never evicted.
+    """
+    entries = sorted(cache_entries(), key=lambda item: item[1]['last_used'])
+    total = sum(manifest['size_bytes'] for _, manifest in entries)
+
+    for manifest_path, manifest in entries:
+        if total <= max_bytes:
+            break
+        if (manifest['stage'], manifest['fingerprint']) in protected:
+            continue
+        shutil.rmtree(manifest_path.parent)
+        total -= manifest['size_bytes']
+        print(f"  Evicted cache entry {manifest['stage']}/{manifest['fingerprint']} ({manifest['size_bytes'] / 1e6:.1f} MB)")
+
+
+def run_stage(stage):
+    """
+    Runs a stage script in a subprocess. Plots are rendered off-screen so runs never block.
+    """
+    env = dict(os.environ, MPLBACKEND='Agg')
+    result = subprocess.run([sys.executable, stage['script']], cwd=SCRIPT_DIR, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"Stage script {stage['script']} failed with exit code {result.returncode}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the capstone pipeline with caching.')
+    parser.add_argument('--force', nargs='*', default=[], help='Stages to re-run even if cached.')
+    parser.add_argument('--with-eda', action='store_true', help='Also run the EDA stage (never cached).')
+    parser.add_argument('--dry-run', action='store_true', help='Print the plan without running anything.')
+    parser.add_argument('--cache-size-mb', type=float, default=2048, help='Maximum size of the artifact cache.')
+    args = parser.parse_args()
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    hash_index = json.loads(HASH_INDEX_PATH.read_text()) if HASH_INDEX_PATH.exists() else {}
+    used_entries = set()
+    pending_outputs = set()
+    start_time = time.perf_counter()
+
+    for name in topological_order(STAGES):
+        stage = STAGES[name]
+
+        if stage.get('optional'):
+            if args.with_eda:
+                print(f"[{name}] running (not cached)...")
+                if not args.dry_run:
+                    run_stage(stage)
+            continue
+
+        if args.dry_run:
+            # Inputs produced by a stage that would re-run are not known yet
+            if any(path in pending_outputs or not path.exists() for path in stage['inputs']):
+                print(f"[{name}] would run (upstream changes)")
+                pending_outputs.update(stage['outputs'])
+                continue
+            fingerprint = stage_fingerprint(name, stage, hash_index)
+            if name not in args.force and (CACHE_DIR / name / fingerprint / 'manifest.json').exists():
+                print(f"[{name}] cached ({fingerprint})")
+            else:
+                print(f"[{name}] would run ({fingerprint})")
+                pending_outputs.update(stage['outputs'])
+            continue
+
+        fingerprint = stage_fingerprint(name, stage, hash_index)
+        used_entries.add((name, fingerprint))
+
+        if name not in args.force and restore_from_cache(name, fingerprint, hash_index, stage['outputs']):
+            print(f"[{name}] cached ({fingerprint})")
+            continue
+
+        print(f"[{name}] running ({fingerprint})...")
+        stage_start = time.perf_counter()
+        run_stage(stage)
+        store_in_cache(name, fingerprint, stage['outputs'])
+        print(f"[{name}] finished in {time.perf_counter() - stage_start:.2f}s")
+
+    if not args.dry_run:
+        evict_cache(args.cache_size_mb * 1e6, used_entries)
+    HASH_INDEX_PATH.write_text(json.dumps(hash_index))
+
+    print(f"\nPipeline finished in {time.perf_counter() - start_time:.2f}s")
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from pipeline_io import DATA_DIR, FILE_EXTENSIONS, PIPELINE_FORMAT, parts_dir, table_path
+
+"""
+Sales Cube
+----------
+03_eda_analysis.py used to reload the whole cleaned table and re-aggregate every row for each chart.
+The cube holds everything the EDA figures need, pre-aggregated and persisted under sales_cube/:
+
+- cells.parquet:    Weekly_Sales sum and row count per Date x Store x Dept x IsHoliday (rolls up to any grain)
+- by_date.parquet:  the same rolled up per Date x IsHoliday (trend line, top-N dates, holiday bar plot)
+- sketches.parquet: a quantile sketch of Weekly_Sales per Date x IsHoliday (holiday box plot)
+- manifest.json:    source files already absorbed + co-moments of the numeric columns (correlation heatmap)
+
+Every part is mergeable: sums, counts and co-moments add up, and the sketches are log-scale histograms
+(DDSketch-style: every estimated quantile is within SKETCH_ALPHA relative error) whose bucket counts add up.
+So refresh_cube() only aggregates the parts appended to walmart_cleaned_data since the last refresh
+(incremental_update.py) and merges them in; the cube is rebuilt only when the base table was rewritten.
+A cell holds a single row at the Kaggle grain, so sketches are kept per Date x IsHoliday (merged further
+for the box plot), not per cell.
+
+Usage:
+    python sales_cube.py            # build / refresh
+    python sales_cube.py --rebuild
+"""
+
+CUBE_DIR = DATA_DIR / 'sales_cube'
+SOURCE_TABLE = 'walmart_cleaned_data'
+CELL_KEYS = ['Date', 'Store', 'Dept', 'IsHoliday']
+SKETCH_KEYS = ['Date', 'IsHoliday']
+
+# Sketch buckets: |x| <= SKETCH_MIN_VALUE falls into bucket 0; otherwise bucket sign(x) * k with
+# SKETCH_MIN_VALUE * gamma^(k-1) < |x| <= SKETCH_MIN_VALUE * gamma^k
+SKETCH_ALPHA = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+SKETCH_MIN_VALUE = 1e-2
+
+
+# --- QUANTILE SKETCH ---
+
+def sketch_buckets(values):
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    k = np.ceil(np.log(np.maximum(magnitude, SKETCH_MIN_VALUE) / SKETCH_MIN_VALUE) / np.log(SKETCH_GAMMA))
+    return (np.sign(values) * np.where(magnitude > SKETCH_MIN_VALUE, k, 0)).astype(np.int32)
+
+
+def bucket_values(buckets):
+    """
+    Representative value of every bucket (at most SKETCH_ALPHA relative error from any value in it).
+    """
+    buckets = np.asarray(buckets, dtype=np.float64)
+    magnitude = SKETCH_MIN_VALUE * 2 * SKETCH_GAMMA ** np.abs(buckets) / (SKETCH_GAMMA + 1)
+    return np.sign(buckets) * magnitude
+
+
+def sketch_quantiles(buckets, counts, quantiles):
+    """
+    Estimated quantiles of the values summarized by (buckets, counts) (one merged sketch).
+    """
+    order = np.argsort(buckets)
+    buckets, cumulative = np.asarray(buckets)[order], np.cumsum(np.asarray(counts)[order])
+    ranks = np.asarray(quantiles) * (cumulative[-1] - 1)
+    return bucket_values(buckets[np.searchsorted(cumulative, ranks, side='right')])
+
+
+# --- AGGREGATION ---
+
+def numeric_columns(df):
+    """
+    Columns of the correlation heatmap: numeric columns except the 'Store' ID (as 03 always selected them).
+    """
+    return [col for col in df.select_dtypes(include='number').columns if col != 'Store']
+
+
+def co_moments(df, columns, shift):
+    """
+    Pairwise-complete co-moments (NaNs skipped per pair, like DataFrame.corr()). Values are shifted by
+    fixed per-column constants first (the first batch's means) to keep the sums well conditioned.
+    """
+    values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan) - np.asarray(shift)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    masks = valid.astype(np.float64)
+    return {
+        'n': masks.T @ masks,                  # rows where both i and j are present
+        'sum': filled.T @ masks,               # sum of x_i over those rows
+        'sum_sq': (filled ** 2).T @ masks,     # sum of x_i^2 over those rows
+        'sum_prod': filled.T @ filled          # sum of x_i * x_j
+    }
+
+
+def aggregate(df, columns, shift):
+    """
+    Cube of one batch of cleaned rows.
+    """
+    cells = (df.groupby(CELL_KEYS, observed=True, sort=False)['Weekly_Sales']
+             .agg(sales_sum='sum', count='count').reset_index())
+    sketches = (df.assign(bucket=sketch_buckets(df['Weekly_Sales']))
+                .groupby(SKETCH_KEYS + ['bucket'], observed=True, sort=False).size()
+                .rename('count').reset_index())
+    return {'cells': cells, 'sketches': sketches, 'moments': co_moments(df, columns, shift)}
+
+
+def merge(cube, batch):
+    """
+    Merges two cubes: counts, sums and co-moments add up.
+    """
+    cells = pd.concat([cube['cells'], batch['cells']], ignore_index=True)
+    cells = cells.groupby(CELL_KEYS, observed=True, sort=False)[['sales_sum', 'count']].sum().reset_index()
+    sketches = pd.concat([cube['sketches'], batch['sketches']], ignore_index=True)
+    sketches = sketches.groupby(SKETCH_KEYS + ['bucket'], observed=True, sort=False)['count'].sum().reset_index()
+    moments = {key: cube['moments'][key] + batch['moments'][key] for key in cube['moments']}
+    return {'cells': cells, 'sketches': sketches, 'moments': moments}
+
+
+# --- PERSISTENCE ---
+
+def source_files(name=SOURCE_TABLE, fmt=None):
+    """
+    (base table, appended parts) of a pipeline table, with the signature of the base file.
+    """
+    fmt = fmt or PIPELINE_FORMAT
+    path = table_path(name, fmt)
+    stat = path.stat()
+    parts = sorted(parts_dir(name, fmt).glob(f"*{FILE_EXTENSIONS[fmt]}")) if fmt != 'csv' else []
+    return {'file': path.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, parts
+
+
+def read_file(path, fmt=None):
+    fmt = fmt or PIPELINE_FORMAT
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    if fmt == 'feather':
+        return pd.read_feather(path)
+    return pd.read_csv(path, parse_dates=['Date'])
+
+
+def write_cube(cube, manifest, cube_dir=CUBE_DIR):
+    """
+    Writes every part next to its target and renames it over it; the manifest goes last.
+    """
+    cube_dir.mkdir(parents=True, exist_ok=True)
+    by_date = cube['cells'].groupby(SKETCH_KEYS, observed=True)[['sales_sum', 'count']].sum().reset_index()
+    for name, frame in [('cells', cube['cells']), ('by_date', by_date), ('sketches', cube['sketches'])]:
+        tmp_path = cube_dir / f"{name}.parquet.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cube_dir / f"{name}.parquet")
+
+    manifest = {**manifest, 'moments': {key: value.tolist() for key, value in cube['moments'].items()},
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    tmp_path = cube_dir / 'manifest.json.tmp'
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, cube_dir / 'manifest.json')
+
+
+def load_manifest(cube_dir=CUBE_DIR):
+    path = cube_dir / 'manifest.json'
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def load_cube(cube_dir=CUBE_DIR):
+    """
+    Full cube (cells, sketches, moments as arrays) and its manifest, for merging new batches in.
+    """
+    manifest = load_manifest(cube_dir)
+    cube = {
+        'cells': pd.read_parquet(cube_dir / 'cells.parquet'),
+        'sketches': pd.read_parquet(cube_dir / 'sketches.parquet'),
+        'moments': {key: np.asarray(value) for key, value in manifest['moments'].items()}
+    }
+    return cube, manifest
+
+
+def refresh_cube(name=SOURCE_TABLE, cube_dir=CUBE_DIR, rebuild=False):
+    """
+    Brings the cube up to date with the stored table: merges the parts appended since the last refresh,
+    or rebuilds it when the base table changed (or was never aggregated).
+
+    Returns:
+        (status: 'fresh' | 'updated' | 'rebuilt', rows aggregated in this call)
+    """
+    base, parts = source_files(name)
+    manifest = load_manifest(cube_dir)
+    rebuild = rebuild or manifest is None \
+        or manifest['source'] != {'table': name, 'format': PIPELINE_FORMAT, 'base': base} \
+        or not set(manifest['parts']) <= {part.name for part in parts}
+    if rebuild:
+        files, cube, manifest = [table_path(name)] + parts, None, None
+    else:
+        files = [part for part in parts if part.name not in set(manifest['parts'])]
+        if not files:
+            return 'fresh', 0
+        cube, manifest = load_cube(cube_dir)
+
+    rows = 0
+    for path in files:
+        df = read_file(path)
+        if manifest is None:
+            columns = numeric_columns(df)
+            shift = df[columns].astype('float64').mean().fillna(0).tolist()
+            manifest = {'source': {'table': name, 'format': PIPELINE_FORMAT, 'base': base}, 'parts': [],
+                        'rows': 0, 'sketch_alpha': SKETCH_ALPHA, 'columns': columns, 'shift': shift}
+        batch = aggregate(df, manifest['columns'], manifest['shift'])
+        cube = batch if cube is None else merge(cube, batch)
+        rows += len(df)
+
+    manifest['parts'] = [part.name for part in parts]
+    manifest['rows'] += rows
+    write_cube(cube, manifest, cube_dir)
+    return 'rebuilt' if rebuild else 'updated', rows
+
+
+# --- QUERIES (read only the small rollups) ---
+
+def sales_by_date(cube_dir=CUBE_DIR):
+    """
+    Total Weekly_Sales per Date (the trend line).
+    """
+    by_date = pd.read_parquet(cube_dir / 'by_date.parquet', columns=['Date', 'sales_sum'])
+    return by_date.groupby('Date')['sales_sum'].sum().rename('Weekly_Sales')
+
+
+def holiday_means(cube_dir=CUBE_DIR):
+    """
+    Average Weekly_Sales of holiday / non-holiday rows.
+    """
+    by_date = pd.read_parquet(cube_dir / 'by_date.parquet')
+    totals = by_date.groupby('IsHoliday')[['sales_sum', 'count']].sum()
+    return (totals['sales_sum'] / totals['count']).rename('Weekly_Sales')
+
+
+def holiday_box_stats(cube_dir=CUBE_DIR, whis=1.5):
+    """
+    Box plot statistics of Weekly_Sales per IsHoliday (matplotlib's Axes.bxp format), from the merged sketches.
+    Outliers are drawn once per sketch bucket.
+    """
+    sketches = pd.read_parquet(cube_dir / 'sketches.parquet')
+    merged = sketches.groupby(['IsHoliday', 'bucket'])['count'].sum().reset_index()
+    stats = []
+    for is_holiday, group in merged.groupby('IsHoliday'):
+        q1, med, q3 = sketch_quantiles(group['bucket'], group['count'], [0.25, 0.5, 0.75])
+        values = np.sort(bucket_values(group['bucket'].to_numpy()))
+        low, high = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+        inside = values[(values >= low) & (values <= high)]
+        stats.append({'label': str(is_holiday), 'med': med, 'q1': q1, 'q3': q3,
+                      'whislo': inside.min(), 'whishi': inside.max(),
+                      'fliers': values[(values < low) | (values > high)]})
+    return stats
+
+
+def correlation_matrix(cube_dir=CUBE_DIR):
+    """
+    Pearson correlation of the numeric columns from the stored co-moments (same as DataFrame.corr()).
+    """
+    manifest = load_manifest(cube_dir)
+    m = {key: np.asarray(value) for key, value in manifest['moments'].items()}
+    covariance = m['n'] * m['sum_prod'] - m['sum'] * m['sum'].T
+    variance = m['n'] * m['sum_sq'] - m['sum'] ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.clip(covariance / np.sqrt(variance * variance.T), -1, 1)
+    diagonal = np.diag_indices_from(corr)
+    corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+    return pd.DataFrame(corr, index=manifest['columns'], columns=manifest['columns'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or incrementally refresh the EDA sales cube.')
+    parser.add_argument('--rebuild', action='store_true', help='Re-aggregate the whole table.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    status, rows = refresh_cube(rebuild=args.rebuild)
+    print(f"Sales cube {status}: {rows:,} rows aggregated in {time.perf_counter() - start:.2f}s -> {CUBE_DIR}")
@@ -0,0 +1,75 @@
+import os
+import pandas as pd
+from pipeline_io import DATA_DIR
+
+"""
+Raw Table Schema
+----------------
+Declared dtypes for the raw Walmart tables (train.csv, features.csv, stores.csv).
+
+Loading with pandas defaults makes every ID an int64, 'Type' a Python-object column,
+every measure a float64 and 'Date' a string that is copied through both merges.
+The schema below keeps the same values in a fraction of the memory:
+- Store / Dept / Size: small unsigned integers
+- Type: categorical (only 'A', 'B', 'C')
+- IsHoliday: boolean
+- Date: parsed once, at load time
+- Measures (sales, temperature, prices, markdowns, CPI...): float64, or float32 when
+  WALMART_FLOAT32=1 (halves their memory, at the cost of ~7 significant digits)
+"""
+
+MEASURE_DTYPE = 'float32' if os.environ.get('WALMART_FLOAT32') == '1' else 'float64'
+
+MARKDOWN_COLS = ['MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5']
+
+TRAIN_DTYPES = {
+    'Store': 'uint16',
+    'Dept': 'uint16',
+    'Weekly_Sales': MEASURE_DTYPE,
+    'IsHoliday': 'bool'
+}
+
+FEATURES_DTYPES = {
+    'Store': 'uint16',
+    'Temperature': MEASURE_DTYPE,
+    'Fuel_Price': MEASURE_DTYPE,
+    **{col: MEASURE_DTYPE for col in MARKDOWN_COLS},
+    'CPI': MEASURE_DTYPE,
+    'Unemployment': MEASURE_DTYPE,
+    'IsHoliday': 'bool'
+}
+
+STORES_DTYPES = {
+    'Store': 'uint16',
+    'Type': 'category',
+    'Size': 'uint32'
+}
+
+# Date parts created in 02_data_cleaning.py ('Week' stays nullable, like isocalendar() returns it)
+CALENDAR_DTYPES = {
+    'Year': 'uint16',
+    'Month': 'uint8',
+    'Week': 'UInt8'
+}
+
+RAW_TABLES = {
+    'train': (TRAIN_DTYPES, ['Date']),
+    'features': (FEATURES_DTYPES, ['Date']),
+    'stores': (STORES_DTYPES, [])
+}
+
+
+def load_raw_table(name, data_dir=None, path=None, **read_csv_kwargs):
+    """
+    Loads one of the raw Walmart CSVs with its declared schema.
+
+    Args:
+        name (str): 'train', 'features' or 'stores'.
+        data_dir (Path): Folder containing the CSV files. Defaults to DATA_DIR.
+        path (Path): Read this file instead (e.g. a new week of train rows) with the schema of `name`.
+        **read_csv_kwargs: Extra arguments for pd.read_csv (e.g. chunksize).
+    """
+    dtypes, date_cols = RAW_TABLES[name]
+    path = path or (data_dir or DATA_DIR) / f"{name}.csv"
+    return pd.read_csv(path, dtype=dtypes, parse_dates=date_cols or None,
+                       date_format='%Y-%m-%d', **read_csv_kwargs)
@@ -0,0 +1,91 @@
+import argparse
+import os
+from gunicorn.app.base import BaseApplication
+
+"""
+Production Serving Mode
+-----------------------
+`python app.py` starts Flask's single-process development server. This script serves the same
+app with a gunicorn prefork worker pool:
+
+- Shared model: every worker memory-maps the flattened forest (forest_arrays/, see forest_export.py)
+  read-only, so N workers share one copy of the model in the OS page cache instead of
+  holding N private copies (a pickled sklearn forest is always copied into each process:
+  export the flat forest first by running 05_train_model.py or forest_export.py).
+- Lazy loading: workers import app.py after the fork (no preload), so a worker restart or a
+  retrained model on disk is picked up without restarting the master.
+- Graceful lifecycle:
+    SIGTERM / SIGINT -> stop accepting connections, finish in-flight requests (up to --graceful-timeout)
+    SIGHUP           -> replace every worker with a fresh one (zero-downtime reload)
+    --max-requests   -> recycle each worker after N requests (with jitter, so they don't restart together)
+  A worker that stops responding for --timeout seconds is killed and replaced by the master.
+
+Usage:
+    python serve.py --workers 4 --bind 0.0.0.0:5000
+    python bench_serving.py   # throughput vs number of workers
+"""
+
+parser = argparse.ArgumentParser(description='Serve app.py with a prefork worker pool.')
+parser.add_argument('--bind', default=os.environ.get('WALMART_BIND', '127.0.0.1:5000'), help='Address to listen on.')
+parser.add_argument('--workers', type=int, default=int(os.environ.get('WALMART_WORKERS', os.cpu_count() or 1)),
+                    help='Number of worker processes (default: one per core).')
+parser.add_argument('--threads', type=int, default=1, help='Threads per worker (>1 switches to the gthread worker).')
+parser.add_argument('--timeout', type=int, default=30, help='Seconds before an unresponsive worker is replaced.')
+parser.add_argument('--graceful-timeout', type=int, default=30, help='Seconds to finish in-flight requests on shutdown.')
+parser.add_argument('--max-requests', type=int, default=0, help='Recycle a worker after this many requests (0: never).')
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started")
+
+
+def post_worker_init(worker):
+    # app.py has been imported at this point: report what this worker serves
+    from app import model
+    worker.log.info(f"Worker {worker.pid} serving {type(model).__name__}")
+
+
+def worker_int(worker):
+    worker.log.info(f"Worker {worker.pid} interrupted, finishing in-flight requests")
+
+
+def worker_exit(server, worker):
+    server.log.info(f"Worker {worker.pid} exited")
+
+
+class ServingApplication(BaseApplication):
+    """
+    Embedded gunicorn application: configuration comes from the command line instead of a config file.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+        return app
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    ServingApplication({
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread' if args.threads > 1 else 'sync',
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'preload_app': False,
+        'chdir': os.path.dirname(os.path.abspath(__file__)),
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'worker_int': worker_int,
+        'worker_exit': worker_exit
+    }).run()
@@ -0,0 +1,93 @@
+import argparse
+import time
+from contextlib import nullcontext
+from chunk_processing import ChunkProcessor
+from lag_engine import SERIES_KEYS
+from memory_report import peak_rss_mb
+from pipeline_io import TableWriter, save_table
+from schema import load_raw_table
+
+"""
+Out-of-Core Streaming Pipeline
+------------------------------
+Runs merge (01), cleaning (02) and feature engineering (04) over train.csv in bounded chunks,
+for extracts that do not fit in memory. Output is identical to running the three stages in batch.
+
+How it works:
+1. stores.csv and features.csv are small lookup tables and stay in memory.
+2. train.csv is read chunk by chunk; each chunk is merged, imputed, filtered and enriched (chunk_processing.py).
+3. Lag / rolling features need the past: the last 52 weeks of every Store/Dept series are carried
+   from one chunk to the next (the per-series state), so features are exact across chunk boundaries.
+4. Finished rows are appended to final_train_data (and optionally walmart_cleaned_data) on disk.
+
+Chunk size is derived from --memory-budget-mb after a small probe chunk measures the bytes per row.
+
+Requirement: every Store/Dept series must arrive in date order (train.csv is sorted by Store, Dept, Date).
+
+Usage:
+    python stream_pipeline.py --memory-budget-mb 512 --write-cleaned
+"""
+
+parser = argparse.ArgumentParser(description='Chunked merge + cleaning + feature engineering.')
+parser.add_argument('--memory-budget-mb', type=float, default=512, help='Target peak memory of the process.')
+parser.add_argument('--write-cleaned', action='store_true', help='Also write walmart_cleaned_data (needed by the EDA stage).')
+args = parser.parse_args()
+
+# Raw chunk, merged copy, cleaned copy, lag frames, final copy and the Arrow buffer coexist while a chunk
+# is processed (measured: ~8x the bytes of a finished row)
+COPY_FACTOR = 8
+PROBE_ROWS = 10_000
+
+# --- Lookup Tables (small, kept in memory) ---
+processor = ChunkProcessor()
+
+# --- Streaming Loop ---
+start_time = time.perf_counter()
+stats = {'rows_read': 0, 'chunks': 0}
+state = None
+
+reader = load_raw_table('train', iterator=True)
+chunk_rows = PROBE_ROWS
+
+# Both tables are written to temporary files and only replace the previous ones if the whole run succeeds
+with TableWriter('final_train_data') as final_writer, \
+        (TableWriter('walmart_cleaned_data') if args.write_cleaned else nullcontext()) as cleaned_writer:
+    while True:
+        try:
+            chunk = reader.get_chunk(chunk_rows)
+        except StopIteration:
+            break
+
+        cleaned, final, state = processor.process(chunk, state)
+
+        # Size the remaining chunks from the probe: bytes per row x copies held while processing
+        # (checked before anything is written, so a budget error leaves no partial output)
+        if stats['chunks'] == 0 and len(final):
+            bytes_per_row = final.memory_usage(deep=True).sum() / len(final) * COPY_FACTOR
+            available_mb = args.memory_budget_mb - (peak_rss_mb() or 0)
+            if available_mb <= 0:
+                raise ValueError(f"Memory budget of {args.memory_budget_mb} MB is below the baseline "
+                                 f"footprint ({peak_rss_mb():.0f} MB). Increase --memory-budget-mb.")
+            chunk_rows = max(PROBE_ROWS, int(available_mb * 1e6 / bytes_per_row))
+            print(f"Chunk size set to {chunk_rows:,} rows ({bytes_per_row:,.0f} bytes/row, {available_mb:,.0f} MB available)")
+
+        final_writer.write(final)
+        if cleaned_writer:
+            cleaned_writer.write(cleaned)
+
+        stats['rows_read'] += len(chunk)
+        stats['chunks'] += 1
+
+        print(f"Chunk {stats['chunks']}: {stats['rows_read']:,} rows read, {final_writer.rows_written:,} rows written")
+
+# Per-series state, so incremental_update.py can continue the series next week
+save_table(state, 'feature_state')
+
+# --- Summary ---
+print(f"\nValidation - All IsHoliday columns match: {processor.stats['holiday_mismatches'] == 0}")
+print(f"Dropped {processor.stats['negative_rows']} rows with negative sales.")
+print(f"Carried state: {len(state):,} rows for {state.groupby(SERIES_KEYS).ngroups:,} series")
+if peak_rss_mb() is not None:
+    print(f"Peak RSS: {peak_rss_mb():,.1f} MB (budget: {args.memory_budget_mb:,.0f} MB)")
+print(f"\nSUCCESS: Streamed {stats['rows_read']:,} rows in {stats['chunks']} chunks "
+      f"({time.perf_counter() - start_time:.2f}s) to: {final_writer.path}")
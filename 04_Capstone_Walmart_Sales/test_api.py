@@ -1,3 +1,4 @@
+import time
 import requests
 import pandas as pd
 
@@ -5,10 +6,15 @@ import pandas as pd
 API Test Script
 ---------------
 This script simulates a client sending data to the Flask API to get a sales prediction.
+It then compares the throughput of the single-row endpoint (/predict) with the batch endpoint (/predict_batch).
 """
 
 # Target URL (Localhost)
 url = 'http://127.0.0.1:5000/predict'
+batch_url = 'http://127.0.0.1:5000/predict_batch'
+
+# Number of rows used for the throughput comparison
+N_ROWS = 500
 
 # Sample Payload Data
 # Manually impute missing values with averages to satisfy the model's requirements.
@@ -46,28 +52,78 @@ sample_data = {
     'MarkDown5': 0.0
 }
 
-print("Sending data to server...")
+# Network calls only when run as a script (load_test.py imports the sample payload)
+if __name__ == '__main__':
+    print("Sending data to server...")
 
-# Send POST Request
-try:
-    response = requests.post(url, json=sample_data)
+    # Send POST Request
+    try:
+        response = requests.post(url, json=sample_data)
     
-    # Handle Response
-    if response.status_code == 200:
-        result = response.json()
+        # Handle Response
+        if response.status_code == 200:
+            result = response.json()
         
-        if result.get('status') == 'error':
-            print("\nSERVER ERROR:")
-            print(result.get('message'))
-        else:
-            print("\nSUCCESS! PREDICTION RECEIVED:")
-            print(f"Predicted Weekly Sales: ${result.get('predicted_sales', 'N/A')}")
+            if result.get('status') == 'error':
+                print("\nSERVER ERROR:")
+                print(result.get('message'))
+            else:
+                print("\nSUCCESS! PREDICTION RECEIVED:")
+                print(f"Predicted Weekly Sales: ${result.get('predicted_sales', 'N/A')}")
             
-    else:
-        print("CONNECTION ERROR!")
-        print(f"Status Code: {response.status_code}")
-        print(response.text)
-
-except Exception as e:
-    print(f"Connection failed: {e}")
-    print("Ensure app.py is running in a separate terminal.")
\ No newline at end of file
+        else:
+            print("CONNECTION ERROR!")
+            print(f"Status Code: {response.status_code}")
+            print(response.text)
+
+    except Exception as e:
+        print(f"Connection failed: {e}")
+        print("Ensure app.py is running in a separate terminal.")
+
+    # --- FEATURE STORE: identity + date only ---
+    # The server fills the lag / moving-average / calendar features from the latest per-series history
+    minimal_data = {'Store': 1, 'Dept': 1, 'Date': '2012-11-02', 'Size': 151315, 'IsHoliday': 0}
+    try:
+        result = requests.post(url, json=minimal_data).json()
+        print(f"\nPrediction from Store/Dept/Date only: ${result.get('predicted_sales', 'N/A')}")
+    except Exception as e:
+        print(f"Feature store request failed: {e}")
+
+    # --- FEATURE STORE: batch mixing keyed and unkeyed rows ---
+    # Rows without Store / Dept / Date are scored like any other row (features they omit count as 0)
+    mixed_rows = [minimal_data, {'Store': 1, 'Dept': 1, 'Size': 151315}, {'Dept': 1, 'Date': '2012-11-02'},
+                  {'Store': 1, 'Dept': 1, 'Date': None}]
+    try:
+        response = requests.post(batch_url, json=mixed_rows)
+        print(f"\nMixed batch: status {response.status_code} (expected 200), "
+              f"{len(response.json().get('predicted_sales', []))}/{len(mixed_rows)} predictions, "
+              f"rows without served lags: {response.headers.get('X-Unserved-Feature-Rows', 0)}")
+    except Exception as e:
+        print(f"Mixed batch request failed: {e}")
+
+    # --- THROUGHPUT COMPARISON: Single-Row vs Batch ---
+    # A planner needs a forecast for every Store x Dept: simulate N_ROWS different rows
+    rows = [dict(sample_data, Store=(i % 45) + 1, Dept=(i % 99) + 1) for i in range(N_ROWS)]
+
+    print(f"\nThroughput comparison with {N_ROWS} rows...")
+
+    try:
+        with requests.Session() as session:
+            # A. One HTTP request (and one model call) per row
+            start = time.perf_counter()
+            single_predictions = [session.post(url, json=row).json().get('predicted_sales') for row in rows]
+            single_time = time.perf_counter() - start
+
+            # B. One HTTP request (and one model call) for all rows
+            start = time.perf_counter()
+            batch_response = session.post(batch_url, json=rows)
+            batch_predictions = batch_response.json().get('predicted_sales', [])
+            batch_time = time.perf_counter() - start
+
+        print(f"Single-row endpoint: {single_time:.2f}s ({N_ROWS / single_time:,.0f} rows/s)")
+        print(f"Batch endpoint     : {batch_time:.2f}s ({N_ROWS / batch_time:,.0f} rows/s)")
+        print(f"Speedup            : {single_time / batch_time:,.1f}x")
+        print(f"Predictions match  : {single_predictions == batch_predictions}")
+
+    except Exception as e:
+        print(f"Throughput comparison failed: {e}")
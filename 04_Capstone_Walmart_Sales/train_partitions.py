@@ -0,0 +1,140 @@
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from forest_export import export_forest
+from model_config import N_ESTIMATORS, RANDOM_STATE
+from partitions import PARTITION_DIR, load_manifest, write_manifest
+from pipeline_io import load_table
+
+"""
+Partitioned Model Training
+--------------------------
+Alternative to the single global model of 05_train_model.py: one Random Forest per Store
+(--by store) or per store Type (--by type), trained in parallel in a process pool.
+
+Every partition is fingerprinted by a hash of its training rows and the model settings.
+A re-run only refits the partitions whose hash changed (e.g. stores that received new weeks),
+the others keep their model. --force refits everything.
+
+Each model is exported as a flattened forest under partition_models/<partition>/ and listed in
+partition_models/manifest.json. app.py serves them with WALMART_PARTITIONED=1 (see partitions.py).
+
+With --eval-split DATE, partitions are trained on the rows before DATE and scored on the rest
+(same split as 05_train_model.py), so the partitioned setup can be compared with the global model.
+
+Usage:
+    python train_partitions.py --by store --workers 4
+    python train_partitions.py --eval-split 2012-02-01
+"""
+
+DROP_COLS = ['Weekly_Sales', 'Date', 'Type']
+
+parser = argparse.ArgumentParser(description='Train one model per Store (or store Type).')
+parser.add_argument('--by', choices=['store', 'type'], default='store', help='Partitioning key.')
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes.')
+parser.add_argument('--n-estimators', type=int, default=N_ESTIMATORS, help='Trees per partition model.')
+parser.add_argument('--eval-split', help='Train before this date and report MAE / R² on the rows after it.')
+parser.add_argument('--force', action='store_true', help='Refit every partition, even unchanged ones.')
+
+
+def partition_hash(train_df, settings):
+    """
+    Fingerprint of a partition's training rows and the model settings.
+    """
+    digest = hashlib.sha256(repr(sorted(settings.items())).encode())
+    digest.update(pd.util.hash_pandas_object(train_df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def train_partition(key, X_train, y_train, X_test, n_estimators, out_dir):
+    """
+    Fits and exports one partition model, and predicts its test rows (runs in a worker process).
+    Only the predictions travel back to the parent, not the forest.
+    """
+    start = time.perf_counter()
+    # Same estimator as 05_train_model.py, single-threaded: parallelism comes from the partitions
+    model = RandomForestRegressor(n_estimators=n_estimators, n_jobs=1, random_state=RANDOM_STATE)
+    model.fit(X_train, y_train)
+    export_forest(model, out_dir)
+    y_pred = model.predict(X_test) if len(X_test) else np.empty(0)
+    return key, time.perf_counter() - start, y_pred
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+
+    df = load_table('final_train_data')
+    df['IsHoliday'] = df['IsHoliday'].astype(int)
+    df['partition'] = df['Store'].map(lambda store: f"store_{store}") if args.by == 'store' \
+        else df['Type'].astype(str).map(lambda store_type: f"type_{store_type}")
+
+    train_df = df[df['Date'] < args.eval_split] if args.eval_split else df
+    test_df = df[df['Date'] >= args.eval_split] if args.eval_split else df.iloc[:0]
+    features = df.drop(columns=DROP_COLS + ['partition'], errors='ignore').select_dtypes(include=['number']).columns
+    settings = {'by': args.by, 'n_estimators': args.n_estimators, 'eval_split': args.eval_split,
+                'features': list(features)}
+
+    # --- STALE PARTITIONS ---
+    previous = load_manifest() or {}
+    if previous.get('partition_by') != args.by:
+        previous = {}
+    partitions, stale = {}, []
+    for key, part in train_df.groupby('partition', sort=True):
+        data_hash = partition_hash(part[list(features) + ['Weekly_Sales']], settings)
+        partitions[key] = {'path': key, 'rows': len(part), 'data_hash': data_hash}
+        old = previous.get('partitions', {}).get(key)
+        if args.force or old is None or old['data_hash'] != data_hash:
+            stale.append(key)
+        else:
+            partitions[key] = old
+
+    print(f"{len(partitions)} partitions by {args.by}: {len(stale)} to (re)train, "
+          f"{len(partitions) - len(stale)} up to date")
+
+    # --- PARALLEL TRAINING ---
+    start = time.perf_counter()
+    PARTITION_DIR.mkdir(exist_ok=True)
+    train_groups, test_groups = train_df.groupby('partition'), dict(list(test_df.groupby('partition')))
+    test_parts, test_predictions = [], []
+    with ProcessPoolExecutor(max(1, min(args.workers, len(stale)))) as pool:
+        futures = []
+        for key in stale:
+            part = train_groups.get_group(key)
+            test_part = test_groups.get(key, test_df.iloc[:0])
+            futures.append(pool.submit(train_partition, key, part[features], part['Weekly_Sales'],
+                                       test_part[features], args.n_estimators, PARTITION_DIR / key))
+            test_parts.append(test_part)
+        for future, test_part in zip(futures, test_parts):
+            key, fit_time, y_pred = future.result()
+            partitions[key]['fit_s'] = round(fit_time, 2)
+            partitions[key]['trained_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+            if len(test_part):
+                partitions[key]['test_mae'] = round(mean_absolute_error(test_part['Weekly_Sales'], y_pred), 2)
+                test_predictions.append(y_pred)
+            print(f"  {key:<10} {partitions[key]['rows']:>8,} rows  {fit_time:6.2f}s")
+    print(f"Training wall time: {time.perf_counter() - start:.2f}s")
+
+    # --- EVALUATION (partitions retrained in this run) ---
+    if test_predictions:
+        y_test = pd.concat([part['Weekly_Sales'] for part in test_parts if len(part)])
+        y_pred = np.concatenate(test_predictions)
+        print(f"\nPARTITIONED MODELS ON {len(y_test):,} TEST ROWS (>= {args.eval_split}):")
+        print(f"Mean Absolute Error (MAE): ${mean_absolute_error(y_test, y_pred):,.2f}")
+        print(f"R² Score (Accuracy)      : {r2_score(y_test, y_pred):.4f}")
+
+    # --- MANIFEST ---
+    # Store -> partition map, so requests (which carry Store but not Type) can be routed
+    stores = df.drop_duplicates('Store').set_index('Store')['partition']
+    write_manifest({
+        'partition_by': args.by,
+        'features': list(features),
+        'stores': {str(store): key for store, key in stores.items() if key in partitions},
+        'partitions': partitions
+    })
+    print(f"Manifest saved to: {PARTITION_DIR / 'manifest.json'}")